@@ -0,0 +1,243 @@
+"""
+Consolidated columnar copy of the per-race JSON archive.
+
+The dataset is a directory of Arrow IPC files, one per season, laid out as
+``<dataset>/year=<year>/pitstops.arrow``. Every file holds all races of the
+season with a ``Race`` column; ``Race``, ``Team`` and ``Driver`` are
+dictionary-encoded. Files are written uncompressed so that readers can
+memory-map them and only touch the columns they select.
+
+pyarrow 14 or later (for ``concat_tables(promote_options=...)``) is needed
+only by this module and is imported on first use.
+"""
+
+import glob
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from pitstop import COMPACT_SUFFIX
+
+DATASET_DIR = "dataset"
+PARTITION_FILENAME = "pitstops.arrow"
+PYARROW_MIN_VERSION = 14  # first release with concat_tables(promote_options=...)
+_PARTITION_RE = re.compile(r"year=(\d{4})$")
+
+
+def list_year_dirs(root: str = ".") -> Dict[int, str]:
+    """
+    Find the season folders of a JSON archive.
+
+    Args:
+        root: Directory containing the ``<year>/`` race folders
+
+    Returns:
+        Mapping of year to folder path, in year order
+    """
+    return {
+        int(name): os.path.join(root, name)
+        for name in sorted(os.listdir(root))
+        if re.fullmatch(r"\d{4}", name) and os.path.isdir(os.path.join(root, name))
+    }
+
+
+def iter_race_files(year_dir: str) -> List[Tuple[str, str]]:
+    """
+    List the race files of a season folder, skipping compact copies.
+
+    Args:
+        year_dir: Directory holding ``<Race>.json`` files
+
+    Returns:
+        (race name, file path) pairs in file name order
+    """
+    return [
+        (os.path.basename(file_path)[: -len(".json")], file_path)
+        for file_path in sorted(glob.glob(os.path.join(year_dir, "*.json")))
+        if not file_path.endswith(COMPACT_SUFFIX)
+    ]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError(
+            f"The 'pyarrow' library is required for the columnar dataset. Please install it (`pip install 'pyarrow>={PYARROW_MIN_VERSION}'`)."
+        )
+    if int(pyarrow.__version__.split(".")[0]) < PYARROW_MIN_VERSION:
+        raise ImportError(
+            f"pyarrow {pyarrow.__version__} is too old for the columnar dataset, {PYARROW_MIN_VERSION}.0 or later is required."
+        )
+    return pyarrow
+
+
+def _schema():
+    pa = _import_pyarrow()
+    dictionary = pa.dictionary(pa.int16(), pa.string())
+    return pa.schema(
+        [
+            ("Race", dictionary),
+            ("Pos.", pa.int32()),
+            ("Team", dictionary),
+            ("Driver", dictionary),
+            ("Time (sec)", pa.float64()),
+            ("Lap", pa.int32()),
+            ("Points", pa.int32()),
+        ]
+    )
+
+
+def _as_int(value: Any) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def build_year_table(year_dir: str):
+    """
+    Collect every race file of a season directory into one Arrow table.
+
+    Args:
+        year_dir: Directory holding ``<Race>.json`` files (compact copies are ignored)
+
+    Returns:
+        pyarrow.Table with the dataset schema, races in file name order
+    """
+    pa = _import_pyarrow()
+    columns: Dict[str, List[Any]] = {name: [] for name in _schema().names}
+    for race, file_path in iter_race_files(year_dir):
+        with open(file_path, encoding="utf-8") as f:
+            records = json.load(f)
+        for record in records:
+            columns["Race"].append(race)
+            columns["Pos."].append(_as_int(record.get("Pos.")))
+            columns["Team"].append(record.get("Team"))
+            columns["Driver"].append(record.get("Driver"))
+            columns["Time (sec)"].append(record.get("Time (sec)"))
+            columns["Lap"].append(_as_int(record.get("Lap")))
+            columns["Points"].append(_as_int(record.get("Points")))
+    return pa.table(columns, schema=_schema())
+
+
+def write_dataset(
+    root: str = ".", dataset_dir: str = DATASET_DIR, years: List[int] = None
+) -> List[str]:
+    """
+    Write (or refresh) season partitions of the columnar dataset.
+
+    Args:
+        root: Directory containing the ``<year>/`` race folders
+        dataset_dir: Output dataset directory
+        years: Seasons to (re)write (defaults to every year folder under root)
+
+    Returns:
+        Paths of the partition files written
+    """
+    pa = _import_pyarrow()
+    if years is None:
+        years = list(list_year_dirs(root))
+
+    written = []
+    for year in years:
+        year_dir = os.path.join(root, str(year))
+        if not os.path.isdir(year_dir):
+            continue
+        table = build_year_table(year_dir)
+        partition_dir = os.path.join(dataset_dir, f"year={year}")
+        os.makedirs(partition_dir, exist_ok=True)
+        file_path = os.path.join(partition_dir, PARTITION_FILENAME)
+        tmp_path = f"{file_path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, file_path)
+        written.append(file_path)
+    return written
+
+
+def list_partitions(dataset_dir: str = DATASET_DIR) -> Dict[int, str]:
+    """
+    Find the season partitions of a dataset.
+
+    Args:
+        dataset_dir: Dataset directory
+
+    Returns:
+        Mapping of year to partition file path
+    """
+    partitions = {}
+    if not os.path.isdir(dataset_dir):
+        return partitions
+    for name in os.listdir(dataset_dir):
+        match = _PARTITION_RE.match(name)
+        file_path = os.path.join(dataset_dir, name, PARTITION_FILENAME)
+        if match and os.path.exists(file_path):
+            partitions[int(match.group(1))] = file_path
+    return dict(sorted(partitions.items()))
+
+
+def load_dataset(
+    dataset_dir: str = DATASET_DIR,
+    columns: List[str] = None,
+    years: List[int] = None,
+    races: List[str] = None,
+    as_pandas: bool = False,
+):
+    """
+    Read pit stops from the columnar dataset.
+
+    Partitions are memory-mapped, so unselected columns are never read from
+    disk. The year filter prunes whole partitions; the race filter is
+    evaluated on the dictionary-encoded ``Race`` column.
+
+    Args:
+        dataset_dir: Dataset directory
+        columns: Columns to return, from the dataset schema plus "Year" (defaults to all)
+        years: Only return these seasons
+        races: Only return these race names (e.g. "Monaco Grand Prix")
+        as_pandas: Return a pandas DataFrame instead of a pyarrow Table
+
+    Returns:
+        pyarrow.Table (or pandas DataFrame) with a "Year" column first
+    """
+    pa = _import_pyarrow()
+    pc = pa.compute
+
+    partitions = list_partitions(dataset_dir)
+    if years is not None:
+        wanted_years = set(years)
+        partitions = {y: p for y, p in partitions.items() if y in wanted_years}
+
+    schema = _schema()
+    selected = list(columns) if columns is not None else ["Year"] + schema.names
+    file_columns = [name for name in selected if name != "Year"]
+    unknown = set(file_columns) - set(schema.names)
+    if unknown:
+        raise ValueError(f"Unknown dataset columns: {', '.join(sorted(unknown))}")
+
+    tables = []
+    for year, file_path in partitions.items():
+        source = pa.memory_map(file_path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        if races is not None:
+            table = table.filter(pc.is_in(table["Race"], value_set=pa.array(races)))
+        table = table.select(file_columns)
+        if "Year" in selected:
+            year_column = pa.array([year] * table.num_rows, type=pa.int16())
+            table = table.add_column(selected.index("Year"), "Year", year_column)
+        tables.append(table)
+
+    if tables:
+        result = pa.concat_tables(tables, promote_options="permissive")
+    else:
+        result = pa.table(
+            {
+                name: pa.array(
+                    [], type=pa.int16() if name == "Year" else schema.field(name).type
+                )
+                for name in selected
+            }
+        )
+    return result.to_pandas() if as_pandas else result
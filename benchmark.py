@@ -0,0 +1,1825 @@
+"""
+Benchmarks for the pit stop pipeline.
+
+Everything runs against local data: a stub HTTP server that serves
+DHL-shaped payloads built from the archived race files, so no request
+ever reaches inmotion.dhl.
+
+Usage:
+    python benchmark.py fetch [--events 24] [--latency 0.1]
+    python benchmark.py parse [--repeat 5]
+    python benchmark.py records [--repeat 5]
+    python benchmark.py names [--repeat 1000]
+    python benchmark.py dataset [--runs 5]
+    python benchmark.py query [--repeat 100]
+    python benchmark.py standings [--repeat 5]
+    python benchmark.py replay [--events 24] [--repeat 5]
+    python benchmark.py logging [--events 240] [--repeat 3]
+    python benchmark.py memo [--events 24]
+    python benchmark.py transfer [--recording NAME]
+    python benchmark.py changes
+    python benchmark.py suite [--events 240] [--baseline FILE] [--update-baseline]
+    python benchmark.py faults [--years 2024 2025] [--seed 0]
+    python benchmark.py pipeline [--events-per-year 24] [--latency 0.02]
+"""
+
+import argparse
+import glob
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pitstop
+from fake_api import FakeDHLServer, FaultProfile, records_to_html_table
+
+ARCHIVE_GLOB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "20*", "*.json")
+SUITE_RESULTS = os.path.join(".cache", "benchmark", "results.json")  # latest suite run
+# Compared with every suite run; committed, so each clone and CI run has one
+SUITE_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json"
+)
+
+
+def load_archive_tables() -> List[str]:
+    """Return one HTML table per non-empty archived race file."""
+    tables = []
+    for path in sorted(glob.glob(ARCHIVE_GLOB)):
+        if path.endswith(pitstop.COMPACT_SUFFIX):
+            continue
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+        if records:
+            tables.append(records_to_html_table(records))
+    return tables
+
+
+class StubServer(FakeDHLServer):
+    """FakeDHLServer serving one stub season at ``/events`` and ``/event``."""
+
+    def __init__(
+        self,
+        num_events: int = 24,
+        latency: float = 0.0,
+        events: Optional[List[Dict]] = None,
+        tables: Optional[List[str]] = None,
+    ):
+        """
+        Initialize the StubServer.
+
+        Args:
+            num_events: Number of events listed by the events endpoint
+            latency: Seconds each response is delayed by
+            events: Events to serve instead of stub events (num_events is
+                then ignored), e.g. from synthetic_season()
+            tables: HTML table of each event (defaults to the archived tables)
+        """
+        super().__init__(seasons={}, faults=FaultProfile(latency=latency))
+        tables = tables or load_archive_tables()
+        self.events = events or [
+            {"id": 1000 + i, "title": f"FORMULA 1 STUB GRAND PRIX {i}"}
+            for i in range(num_events)
+        ]
+        self.num_events = len(self.events)
+        self.bodies["events", None] = json.dumps(
+            {"data": {"chart": {"events": self.events}}}
+        ).encode()
+        for i, event in enumerate(self.events):
+            self.set_payload(
+                event["id"], {"htmlList": {"table": tables[i % len(tables)]}}
+            )
+
+    def set_payload(self, event_id: Any, payload: Dict) -> None:
+        """Serve payload for an event from now on."""
+        self.bodies["event", str(event_id)] = json.dumps(payload).encode()
+
+
+def bench_fetch(num_events: int, latency: float, levels: List[int]) -> None:
+    """
+    Time fetch_event_specific_data against the stub server per concurrency level.
+
+    Args:
+        num_events: Number of events in the stub season
+        latency: Per-response server latency in seconds
+        levels: Concurrency levels to measure
+    """
+    with StubServer(num_events=num_events, latency=latency) as server:
+        print(f"fetch: {num_events} events, {latency * 1000:.0f} ms server latency")
+        print(f"{'workers':>8} {'wall (s)':>10} {'events/s':>10} {'conns':>6}")
+        for level in levels:
+            fetcher = pitstop.F1DataFetcher(max_workers=level)
+            events = fetcher.fetch_events_data(f"{server.base_url}/events")
+            start = time.perf_counter()
+            results = fetcher.fetch_event_specific_data(
+                events, base_url=f"{server.base_url}/event"
+            )
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for data in results.values() if "error" in data)
+            connections = fetcher.get_timing_summary()["connections"]
+            fetcher.close()
+            print(
+                f"{level:>8} {elapsed:>10.3f} {len(results) / elapsed:>10.1f} {connections:>6}"
+                + (f"  ({failed} failed)" if failed else "")
+            )
+
+
+def bench_parse(repeat: int) -> None:
+    """
+    Compare the dedicated DHL table parser with pd.read_html on every saved race.
+
+    Both parsers must produce identical records for every table.
+
+    Args:
+        repeat: Number of passes over the archive per parser
+    """
+    import pandas as pd
+
+    tables = load_archive_tables()
+    mismatches = 0
+    for table in tables:
+        fast = pitstop.DataProcessor.html_table_to_dataframe(
+            {"htmlList": {"table": table}}
+        )
+        slow = pd.read_html(io.StringIO(table))[0]
+        if fast.to_json(orient="records") != slow.to_json(orient="records"):
+            mismatches += 1
+
+    def time_per_table(parse) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for table in tables:
+                parse(table)
+        return (time.perf_counter() - start) / (repeat * len(tables))
+
+    def fast_parse(table):
+        return pitstop.PitStopTable.from_parsed(
+            pitstop.parse_dhl_table(table)
+        ).to_dataframe()
+
+    results = [
+        ("pd.read_html", time_per_table(lambda t: pd.read_html(io.StringIO(t))[0])),
+        ("parse_dhl_table", time_per_table(pitstop.parse_dhl_table)),
+        ("parse_dhl_table + DataFrame", time_per_table(fast_parse)),
+    ]
+    print(f"parse: {len(tables)} archived tables, {mismatches} mismatches vs read_html")
+    print(f"{'parser':<30} {'ms/table':>10} {'speedup':>8}")
+    for name, seconds in results:
+        print(f"{name:<30} {seconds * 1000:>10.3f} {results[0][1] / seconds:>7.1f}x")
+
+
+def bench_records(repeat: int) -> None:
+    """
+    Compare in-memory representations of parsed event tables over the whole archive.
+
+    Every archived race goes through the parse-and-serialise path once per
+    pass, as in a full backfill. CPU is per event; memory is what holding
+    the parsed tables of every event costs, measured with tracemalloc.
+
+    Args:
+        repeat: Number of timed passes over the archive
+    """
+    import tracemalloc
+
+    import pandas as pd
+
+    tables = load_archive_tables()
+    payloads = [{"htmlList": {"table": table}} for table in tables]
+
+    def dataframe_path(payload):
+        df = pitstop.PitStopTable.from_parsed(
+            pitstop.parse_dhl_table(payload["htmlList"]["table"])
+        ).to_dataframe()
+        return df, df.to_json(orient="records", indent=4)
+
+    def dict_path(payload):
+        columns = pitstop.parse_dhl_table(payload["htmlList"]["table"])
+        names = list(columns)
+        values = [column_values for column_values, _ in columns.values()]
+        records = [dict(zip(names, row)) for row in zip(*values)]
+        return records, pitstop.format_records_json(records)
+
+    def table_path(payload):
+        table = pitstop.DataProcessor.html_table_to_table(payload)
+        return table, table.to_json()
+
+    paths = [
+        ("DataFrame per event", dataframe_path),
+        ("dict per row", dict_path),
+        ("PitStopTable", table_path),
+    ]
+    pd.DataFrame(
+        {"warm": [1]}
+    ).to_json()  # keep pandas' lazy imports out of the timings
+
+    print(f"records: {len(payloads)} archived events per pass")
+    print(f"{'representation':<22} {'us/event':>9} {'held KiB':>9} {'B/event':>8}")
+    for name, path in paths:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for payload in payloads:
+                path(payload)
+        per_event = (time.perf_counter() - start) / (repeat * len(payloads))
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        held = [path(payload)[0] for payload in payloads]
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del held
+        print(
+            f"{name:<22} {per_event * 1e6:>9.1f} {size / 1024:>9.0f} "
+            f"{size / len(payloads):>8.0f}"
+        )
+
+
+def load_historical_titles() -> Dict[int, List[str]]:
+    """Collect the API titles noted next to each F1_RACES entry, by year."""
+    source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pitstop.py")
+    with open(source_path, encoding="utf-8") as f:
+        source = f.read()
+    titles: Dict[int, List[str]] = {}
+    year = None
+    for line in source[source.index("F1_RACES = {") :].splitlines():
+        year_match = re.match(r"\s+(\d{4}): \{", line)
+        if year_match:
+            year = int(year_match.group(1))
+        title_match = re.search(r'# From "([^"]+)"', line)
+        if year and title_match:
+            titles.setdefault(year, []).append(title_match.group(1))
+        if line == "}":
+            break
+    return titles
+
+
+def linear_scan_race_name(event_title: str, year: int):
+    """The original first-substring-hit lookup, for comparison."""
+    year_races = pitstop.F1_RACES.get(year) or pitstop.F1_RACES[max(pitstop.F1_RACES)]
+    for key, proper_name in year_races.items():
+        if key in event_title.upper():
+            return proper_name
+    return None
+
+
+def bench_names(repeat: int) -> None:
+    """
+    Compare RaceNameResolver with the linear F1_RACES scan over historical titles.
+
+    Args:
+        repeat: Number of passes over all titles per method
+    """
+    titles = [
+        (year, title)
+        for year, year_titles in load_historical_titles().items()
+        for title in year_titles
+    ]
+    resolvers = {
+        year: pitstop.RaceNameResolver(pitstop.F1_RACES[year]) for year, _ in titles
+    }
+
+    resolved = [(resolvers[year].resolve(title), year, title) for year, title in titles]
+    differences = [
+        (year, title, old, new)
+        for (new, year, title), old in zip(
+            resolved, (linear_scan_race_name(title, year) for year, title in titles)
+        )
+        if old != new
+    ]
+
+    def time_per_title(resolve) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for year, title in titles:
+                resolve(title, year)
+        return (time.perf_counter() - start) / (repeat * len(titles))
+
+    # Uncached timings measure the automaton itself; cached ones the per-event path
+    uncached = {
+        year: pitstop.RaceNameResolver(pitstop.F1_RACES[year]) for year, _ in titles
+    }
+    results = [
+        ("linear scan", time_per_title(linear_scan_race_name)),
+        ("Aho-Corasick", time_per_title(lambda t, y: uncached[y].find_keys(t))),
+        ("resolver (cached)", time_per_title(lambda t, y: resolvers[y].resolve(t))),
+    ]
+
+    print(f"names: {len(titles)} historical titles")
+    print(f"{'method':<20} {'us/title':>10}")
+    for name, seconds in results:
+        print(f"{name:<20} {seconds * 1e6:>10.2f}")
+    ambiguous = {t: c for r in resolvers.values() for t, c in r.ambiguous.items()}
+    unmatched = [t for r in resolvers.values() for t in r.unmatched]
+    print(f"ambiguous: {len(ambiguous)}, unmatched: {len(unmatched)}")
+    for title, candidates in ambiguous.items():
+        print(f"  ambiguous: {title} -> {', '.join(candidates)}")
+    for title in unmatched:
+        print(f"  unmatched: {title}")
+    print(f"differences from linear scan: {len(differences)}")
+    for year, title, old, new in differences:
+        print(f"  {year} {title}: {old} -> {new}")
+
+
+# Each loader runs in a fresh interpreter and reports (seconds, RSS growth in KiB)
+_DATASET_LOADERS = {
+    "glob + json + pandas": """
+import glob
+import json
+import os
+
+import pandas as pd
+frames = []
+for path in glob.glob(os.path.join(root, "20*", "*.json")):
+    if path.endswith(".min.json"):
+        continue
+    with open(path, encoding="utf-8") as f:
+        df = pd.DataFrame(json.load(f))
+    df["Year"] = int(os.path.basename(os.path.dirname(path)))
+    df["Race"] = os.path.splitext(os.path.basename(path))[0]
+    frames.append(df)
+result = pd.concat(frames, ignore_index=True)
+""",
+    "dataset -> pandas": """
+import archive
+result = archive.load_dataset(dataset, as_pandas=True)
+""",
+    "dataset -> arrow": """
+import archive
+result = archive.load_dataset(dataset)
+""",
+    "dataset -> arrow, 2 cols, 1 year": """
+import archive
+result = archive.load_dataset(dataset, columns=["Team", "Time (sec)"], years=[2025])
+""",
+}
+
+_LOADER_HARNESS = """
+import resource
+import sys
+import time
+
+root, dataset = sys.argv[1], sys.argv[2]
+{imports}
+
+def rss_kib():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+rss_before = rss_kib()
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+rss_after = rss_kib()
+print(elapsed, rss_after - rss_before, len(result))
+"""
+
+
+def bench_dataset(runs: int) -> None:
+    """
+    Compare loading the whole archive from the columnar dataset and from JSON files.
+
+    Each measurement runs in a fresh interpreter. Imports are done before
+    the timer starts, so the times cover only the loading itself.
+
+    Args:
+        runs: Number of fresh interpreters per loader (median is reported)
+    """
+    import archive
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as dataset:
+        archive.write_dataset(root, dataset)
+        size = sum(
+            os.path.getsize(path) for path in archive.list_partitions(dataset).values()
+        )
+        json_size = sum(
+            os.path.getsize(path)
+            for path in glob.glob(ARCHIVE_GLOB)
+            if not path.endswith(pitstop.COMPACT_SUFFIX)
+        )
+        print(
+            f"dataset: {json_size / 1024:.0f} KiB of JSON, {size / 1024:.0f} KiB as Arrow"
+        )
+        print(f"{'loader':<34} {'rows':>6} {'ms':>8} {'+RSS MiB':>9}")
+        for name, body in _DATASET_LOADERS.items():
+            # Import the heavy modules up front so they are not timed
+            imports = "import pandas, pyarrow, pyarrow.compute, pyarrow.ipc"
+            code = _LOADER_HARNESS.format(imports=imports, body=body)
+            samples = []
+            for _ in range(runs):
+                output = subprocess.run(
+                    [sys.executable, "-c", code, root, dataset],
+                    cwd=root,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout.split()
+                samples.append((float(output[0]), int(output[1]), int(output[2])))
+            seconds = statistics.median(sample[0] for sample in samples)
+            rss = statistics.median(sample[1] for sample in samples)
+            print(
+                f"{name:<34} {samples[0][2]:>6} {seconds * 1000:>8.1f} {rss / 1024:>9.1f}"
+            )
+
+
+def bench_query(repeat: int) -> None:
+    """
+    Compare answering archive queries by scanning the JSON files with the query index.
+
+    Args:
+        repeat: Number of times each indexed query is run
+    """
+    import query
+
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    def scan_fastest_per_team_season():
+        best = {}
+        for path in glob.glob(ARCHIVE_GLOB):
+            if path.endswith(pitstop.COMPACT_SUFFIX):
+                continue
+            year = int(os.path.basename(os.path.dirname(path)))
+            with open(path, encoding="utf-8") as f:
+                for record in json.load(f):
+                    key = (year, record["Team"])
+                    if key not in best or record["Time (sec)"] < best[key]:
+                        best[key] = record["Time (sec)"]
+        return best
+
+    start = time.perf_counter()
+    scanned = scan_fastest_per_team_season()
+    scan_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, "pitstops.idx")
+        start = time.perf_counter()
+        index = query.PitStopIndex.from_archive(root)
+        build_s = time.perf_counter() - start
+        index.save(index_path)
+        start = time.perf_counter()
+        index = query.PitStopIndex.load(index_path)
+        load_s = time.perf_counter() - start
+        index_size = os.path.getsize(index_path)
+
+    indexed = {
+        key: rows[0]["Time (sec)"]
+        for key, rows in index.fastest_by(("year", "team")).items()
+    }
+    mismatches = sum(scanned[key] != indexed.get(key) for key in scanned)
+
+    queries = {
+        "fastest per team per season": lambda: index.fastest_by(("year", "team")),
+        "time statistics per driver": lambda: index.stats_by("driver"),
+        "top 10 of one driver": lambda: index.fastest(10, driver="Norris"),
+        "top 10, team + season": lambda: index.fastest(10, team="Ferrari", year=2024),
+        "stops in 1.9-2.0 s": lambda: index.between(1.9, 2.0),
+    }
+    print(f"query: {len(index)} stops, index file {index_size / 1024:.0f} KiB")
+    print(f"  JSON scan, fastest per team per season  {scan_s * 1000:8.1f} ms")
+    print(f"  index build from JSON                   {build_s * 1000:8.1f} ms")
+    print(f"  index load from binary file             {load_s * 1000:8.1f} ms")
+    for name, run in queries.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"  {name:<39} {elapsed * 1e6:8.1f} us")
+    print(f"  mismatches against the scan: {mismatches}")
+
+
+def loop_standings(year_dir: str) -> List[tuple]:
+    """Reference standings computed with plain Python loops over the race files."""
+    teams: Dict[str, Dict] = {}
+    for path in glob.glob(os.path.join(year_dir, "*.json")):
+        if path.endswith(pitstop.COMPACT_SUFFIX):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for record in json.load(f):
+                team = teams.setdefault(
+                    record["Team"], {"points": 0.0, "counts": {}, "fastest": None}
+                )
+                if record["Points"]:
+                    team["points"] += record["Points"]
+                    counts = team["counts"]
+                    counts[record["Points"]] = counts.get(record["Points"], 0) + 1
+                if team["fastest"] is None or record["Time (sec)"] < team["fastest"]:
+                    team["fastest"] = record["Time (sec)"]
+    values = sorted({value for team in teams.values() for value in team["counts"]})
+    ranked = sorted(
+        teams.items(),
+        key=lambda item: (
+            -item[1]["points"],
+            *(-item[1]["counts"].get(value, 0) for value in reversed(values)),
+            item[1]["fastest"],
+        ),
+    )
+    return [(name, team["points"]) for name, team in ranked]
+
+
+def bench_standings(repeat: int) -> bool:
+    """
+    Check the standings engine against plain loops and time full vs incremental updates.
+
+    Args:
+        repeat: Number of timed runs of each variant
+
+    Returns:
+        True if every season matches the reference
+    """
+    import standings
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    years = sorted(
+        int(name) for name in os.listdir(root) if re.fullmatch(r"20\d\d", name)
+    )
+    ok = True
+    for year in years:
+        table = standings.compute_standings(year, root)
+        engine = list(zip(table.index, table["Points"]))
+        reference = loop_standings(os.path.join(root, str(year)))
+        if engine != reference:
+            ok = False
+            print(f"MISMATCH {year}: {engine} != {reference}")
+    print(f"standings: {len(years)} seasons checked against loops, ok={ok}")
+
+    year = years[-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(root, str(year)), os.path.join(tmp, str(year)))
+        races = [
+            race for race, _ in standings.iter_race_files(os.path.join(tmp, str(year)))
+        ]
+        last_path = os.path.join(tmp, str(year), f"{races[-1]}.json")
+        with open(last_path, encoding="utf-8") as f:
+            last_race = f.read()
+
+        full_times, incremental_times = [], []
+        for _ in range(repeat):
+            os.remove(last_path)
+            season = standings.SeasonStandings(year, tmp)
+            season.refresh()
+            season.standings()
+            # The new race file lands
+            with open(last_path, "w", encoding="utf-8") as f:
+                f.write(last_race)
+
+            start = time.perf_counter()
+            full = standings.compute_standings(year, tmp)
+            full_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            season.refresh()
+            incremental = season.standings()
+            incremental_times.append(time.perf_counter() - start)
+
+            if not full.equals(incremental):
+                ok = False
+                print("MISMATCH between full and incremental standings")
+
+    print(f"{year}, {len(races)} races, one new race file:")
+    print(f"  full recompute      {statistics.median(full_times) * 1000:8.1f} ms")
+    print(
+        f"  incremental update  {statistics.median(incremental_times) * 1000:8.1f} ms"
+    )
+    return ok
+
+
+def run_recorded_pipeline(
+    fetcher: pitstop.F1DataFetcher, base_url: str, output_dir: str
+) -> Dict[str, float]:
+    """
+    Fetch a stub season with a fetcher and process every event into output_dir.
+
+    Returns:
+        Seconds spent fetching and processing, and the number of files saved
+    """
+    year = max(pitstop.F1_URLS)
+    start = time.perf_counter()
+    events = fetcher.fetch_events_data(f"{base_url}/events")
+    event_data = fetcher.fetch_event_specific_data(events, base_url=f"{base_url}/event")
+    fetched = time.perf_counter()
+    manifest = pitstop.SeasonManifest(output_dir)
+    statuses = [
+        pitstop.process_event(
+            event,
+            event_data.get(event["id"]),
+            year,
+            output_dir,
+            manifest,
+            incremental=False,
+        )[0]
+        for event in events
+    ]
+    processed = time.perf_counter()
+    fetcher.close()
+    return {
+        "fetch": fetched - start,
+        "process": processed - fetched,
+        "saved": statuses.count("saved"),
+    }
+
+
+def read_outputs(output_dir: str) -> Dict[str, bytes]:
+    """Return the contents of every race file in a directory, by file name."""
+    outputs = {}
+    for path in glob.glob(os.path.join(output_dir, "*.json")):
+        with open(path, "rb") as f:
+            outputs[os.path.basename(path)] = f.read()
+    return outputs
+
+
+def bench_replay(num_events: int, repeat: int) -> bool:
+    """
+    Record a stub season, then re-run the pipeline from the recording offline.
+
+    The stub server is shut down before replaying, so any request that
+    reaches the network fails. Every replay must write the same files,
+    byte for byte, as the recorded run.
+
+    Args:
+        num_events: Number of events in the stub season
+        repeat: Number of replayed runs
+
+    Returns:
+        True if every replay reproduced the recorded run's outputs
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "replay")
+        store = pitstop.ReplayStore("bench", mode="record", root=root)
+        with StubServer(num_events=num_events) as server:
+            base_url = server.base_url
+            live = run_recorded_pipeline(
+                pitstop.F1DataFetcher(replay_store=store),
+                base_url,
+                os.path.join(tmp, "live"),
+            )
+        store.save()
+        expected = read_outputs(os.path.join(tmp, "live"))
+
+        runs, ok = [], live["saved"] == num_events
+        for i in range(repeat):
+            output_dir = os.path.join(tmp, f"replay{i}")
+            runs.append(
+                run_recorded_pipeline(
+                    pitstop.F1DataFetcher(
+                        replay_store=pitstop.ReplayStore("bench", root=root)
+                    ),
+                    base_url,
+                    output_dir,
+                )
+            )
+            if read_outputs(output_dir) != expected:
+                ok = False
+
+        raw_bytes = sum(map(len, server.bodies.values()))
+        stored_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(store.objects_dir)
+        )
+
+    print(
+        f"replay: {num_events} events, {len(store.responses)} responses recorded, "
+        f"{raw_bytes / 1024:.0f} KiB raw -> {stored_bytes / 1024:.0f} KiB stored"
+    )
+    print(f"{'run':<10} {'fetch (ms)':>11} {'process (ms)':>13} {'saved':>6}")
+    print(
+        f"{'live':<10} {live['fetch'] * 1000:>11.1f} "
+        f"{live['process'] * 1000:>13.1f} {live['saved']:>6}"
+    )
+    print(
+        f"{'replay':<10} {statistics.median(r['fetch'] for r in runs) * 1000:>11.1f} "
+        f"{statistics.median(r['process'] for r in runs) * 1000:>13.1f} "
+        f"{runs[-1]['saved'] if runs else 0:>6}"
+    )
+    if not ok:
+        print("FAIL: replayed outputs differ from the recorded run")
+    return ok
+
+
+_PIPELINE_HARNESS = """
+import logging
+import os
+import resource
+import sys
+import time
+
+import pitstop
+
+root, output_root, mode, parse_workers, latency = sys.argv[1:6]
+years = [int(year) for year in sys.argv[6:]]
+logging.getLogger().setLevel(logging.WARNING)
+store = pitstop.ReplayStore("bench", root=root)
+if float(latency):
+    # Stand in for the network round trip the recording removes
+    load = store.load
+    def delayed_load(url):
+        time.sleep(float(latency))
+        return load(url)
+    store.load = delayed_load
+start = time.perf_counter()
+fetcher = pitstop.F1DataFetcher(replay_store=store)
+manifests = {
+    year: pitstop.SeasonManifest(os.path.join(output_root, str(year)))
+    for year in years
+}
+if mode == "batch":
+    # Every payload of every season is fetched before anything is parsed
+    fetched = []
+    for year in years:
+        urls = pitstop.F1_URLS[year]
+        events = fetcher.fetch_events_data(urls["EVENT_DATA_URL"])
+        event_data = fetcher.fetch_event_specific_data(
+            events, base_url=urls["EVENT_SPECIFIC_URL"]
+        )
+        fetched.append((year, events, event_data))
+    for year, events, event_data in fetched:
+        manifest = manifests[year]
+        for event in events:
+            pitstop.process_event(
+                event, event_data.get(event["id"]), year, manifest.output_dir,
+                manifest, incremental=False,
+            )
+else:
+    jobs = []
+    for year in years:
+        urls = pitstop.F1_URLS[year]
+        for event in fetcher.fetch_events_data(urls["EVENT_DATA_URL"]):
+            jobs.append((year, event, urls["EVENT_SPECIFIC_URL"], manifests[year]))
+    pipeline = pitstop.EventPipeline(
+        fetcher, parse_workers=int(parse_workers), incremental=False
+    )
+    pipeline.run(jobs)
+for manifest in manifests.values():
+    manifest.save()
+fetcher.close()
+elapsed = time.perf_counter() - start
+main_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+worker_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+print(elapsed, main_rss, worker_rss)
+"""
+
+
+def _letters(number: int) -> str:
+    """Spell a number in base 26 with the letters A-Z."""
+    letters = ""
+    while True:
+        number, digit = divmod(number, 26)
+        letters = chr(ord("A") + digit) + letters
+        if not number:
+            return letters
+
+
+def record_stub_seasons(root: str, years: List[int], events_per_year: int) -> int:
+    """
+    Record stub events lists and tables under the real URLs of several seasons.
+
+    Returns:
+        Number of events recorded
+    """
+    tables = load_archive_tables()
+    store = pitstop.ReplayStore("bench", mode="record", root=root)
+    count = 0
+    for year in years:
+        # Distinct all-letter titles, so every event gets its own race file
+        events = [
+            {
+                "id": year * 1000 + i,
+                "title": f"FORMULA 1 STUB{_letters(year)}{_letters(i)} GRAND PRIX",
+            }
+            for i in range(events_per_year)
+        ]
+        urls = pitstop.F1_URLS[year]
+        store.record(
+            urls["EVENT_DATA_URL"],
+            json.dumps({"data": {"chart": {"events": events}}}).encode(),
+        )
+        for event in events:
+            body = {"htmlList": {"table": tables[count % len(tables)]}}
+            store.record(
+                f"{urls['EVENT_SPECIFIC_URL']}?event={event['id']}",
+                json.dumps(body).encode(),
+            )
+            count += 1
+    store.save()
+    return count
+
+
+def check_pipeline_window(
+    num_events: int = 300, max_pending: int = 8, parse_workers: int = 0
+) -> bool:
+    """
+    Check that EventPipeline never has more than max_pending events in flight.
+
+    Events are counted from the start of their fetch until on_done() reports
+    them, independently of the pipeline's own bookkeeping. Fetches return
+    an archived table after a short, varying delay, so fetches and parses
+    complete in mixed order.
+
+    Args:
+        num_events: Events to run through the pipeline
+        max_pending: Window of the pipeline
+        parse_workers: Parse processes (0 parses in-process)
+
+    Returns:
+        True if the peak stayed within max_pending and every event finished
+    """
+    tables = load_archive_tables()
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    class Fetcher:
+        max_workers = 4
+
+        def _fetch_single_event(self, base_url, event_id, event_title, finalized):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            time.sleep(0.001 * (event_id % 3))
+            return {"htmlList": {"table": tables[event_id % len(tables)]}}, True
+
+    def on_done(year, event, status, file_path):
+        with lock:
+            in_flight["now"] -= 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = pitstop.SeasonManifest(tmp)
+        jobs = [
+            (
+                2025,
+                {"id": i, "title": f"FORMULA 1 STUB{_letters(i)} GRAND PRIX"},
+                "",
+                manifest,
+            )
+            for i in range(1, num_events + 1)
+        ]
+        pipeline = pitstop.EventPipeline(
+            Fetcher(),
+            parse_workers=parse_workers,
+            max_pending=max_pending,
+            dry_run=True,
+        )
+        counts = pipeline.run(jobs, on_done)
+    finished = sum(counts.values())
+    ok = (
+        in_flight["peak"] <= max_pending
+        and pipeline.peak_pending <= max_pending
+        and finished == num_events
+    )
+    print(
+        f"window, {parse_workers} procs: {finished}/{num_events} events finished, "
+        f"peak {in_flight['peak']} "
+        f"in flight (limit {max_pending}){'' if ok else '  FAIL'}"
+    )
+    return ok
+
+
+def bench_pipeline(
+    events_per_year: int, workers: List[int], latency: float, runs: int
+) -> bool:
+    """
+    Compare a recorded multi-season backfill, fetched in bulk or streamed.
+
+    "batch" fetches every payload of every season before parsing any, as
+    main() used to; "stream" feeds every season's events through one
+    EventPipeline with the given number of parse processes. Each run is a fresh interpreter,
+    so peak RSS is that of the run alone (the worker figure is the largest
+    parse process).
+
+    Args:
+        events_per_year: Stub events per season, for every season in F1_URLS
+        workers: Parse process counts to stream with (0 parses in-process)
+        latency: Seconds added to every replayed response, standing in for
+            the network (0 measures the pipeline's own overhead)
+        runs: Fresh interpreters per configuration (median is reported)
+
+    Returns:
+        True if the window check passed and every configuration wrote the
+        same files as the batch run
+    """
+    ok = all(check_pipeline_window(parse_workers=count) for count in workers)
+    years = sorted(pitstop.F1_URLS)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    configs = [("batch", 0)] + [("stream", count) for count in workers]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "replay")
+        num_events = record_stub_seasons(root, years, events_per_year)
+        print(
+            f"pipeline: {len(years)} seasons, {num_events} recorded events, "
+            f"{latency * 1000:g} ms per response, median of {runs} runs"
+        )
+        print(
+            f"{'configuration':<18} {'s':>7} {'events/s':>9} "
+            f"{'peak MiB':>9} {'worker MiB':>11}"
+        )
+        expected, same_outputs = None, True
+        for mode, parse_workers in configs:
+            samples = []
+            for i in range(runs):
+                output_root = os.path.join(tmp, f"{mode}{parse_workers}-{i}")
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        "-c",
+                        _PIPELINE_HARNESS,
+                        root,
+                        output_root,
+                        mode,
+                        str(parse_workers),
+                        str(latency),
+                        *map(str, years),
+                    ],
+                    cwd=cwd,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout.split()
+                samples.append((float(output[0]), int(output[1]), int(output[2])))
+                outputs = {
+                    year: read_outputs(os.path.join(output_root, str(year)))
+                    for year in years
+                }
+                if expected is None:
+                    expected = outputs
+                elif outputs != expected:
+                    same_outputs = False
+                shutil.rmtree(output_root)
+            seconds = statistics.median(sample[0] for sample in samples)
+            label = mode if mode == "batch" else f"stream, {parse_workers} procs"
+            print(
+                f"{label:<18} {seconds:>7.2f} {num_events / seconds:>9.0f} "
+                f"{statistics.median(s[1] for s in samples) / 1024:>9.1f} "
+                f"{statistics.median(s[2] for s in samples) / 1024:>11.1f}"
+            )
+    if not same_outputs:
+        print("FAIL: streamed outputs differ from the batch run")
+    return ok and same_outputs
+
+
+def bench_memo(num_events: int) -> bool:
+    """
+    Check the memo cache against two stub servers with the same event IDs.
+
+    Two fetchers share one MemoCache: repeated fetches, from either of
+    them, must not reach the network, while the second server (another
+    endpoint with the same event IDs) must be fetched in full. Expiry and
+    the size bound are exercised with small separate caches.
+
+    Args:
+        num_events: Number of events per stub server
+
+    Returns:
+        True if every step made the expected number of requests
+    """
+    memo = pitstop.MemoCache()
+    first, second = (
+        pitstop.F1DataFetcher(memo_cache=memo),
+        pitstop.F1DataFetcher(memo_cache=memo),
+    )
+    ok = True
+    with StubServer(num_events=num_events) as server, StubServer(
+        num_events=num_events
+    ) as other:
+
+        def fetch(fetcher: pitstop.F1DataFetcher, stub: StubServer) -> tuple:
+            before = fetcher.get_timing_summary()["requests"]
+            start = time.perf_counter()
+            events = fetcher.fetch_events_data(f"{stub.base_url}/events")
+            fetcher.fetch_event_specific_data(events, base_url=f"{stub.base_url}/event")
+            elapsed = time.perf_counter() - start
+            return fetcher.get_timing_summary()["requests"] - before, elapsed
+
+        print(f"memo: {num_events} events per stub server")
+        print(f"{'step':<28} {'requests':>9} {'expected':>9} {'ms':>8}")
+        steps = [
+            ("cold", first, server, memo, num_events + 1),
+            ("repeat, same fetcher", first, server, memo, 0),
+            ("repeat, second fetcher", second, server, memo, 0),
+            ("other endpoint, same IDs", second, other, memo, num_events + 1),
+        ]
+        for label, fetcher, stub, _, expected in steps:
+            requests_made, elapsed = fetch(fetcher, stub)
+            ok = ok and requests_made == expected
+            print(
+                f"{label:<28} {requests_made:>9} {expected:>9} {elapsed * 1000:>8.2f}"
+            )
+        shared = memo.stats()
+
+        short = pitstop.F1DataFetcher(memo_cache=pitstop.MemoCache(ttl=0.05))
+        fetch(short, server)
+        time.sleep(0.1)
+        requests_made, elapsed = fetch(short, server)
+        ok = ok and requests_made == num_events + 1
+        print(
+            f"{'after expiry':<28} {requests_made:>9} {num_events + 1:>9} "
+            f"{elapsed * 1000:>8.2f}"
+        )
+
+        bounded = pitstop.F1DataFetcher(
+            memo_cache=pitstop.MemoCache(max_entries=num_events // 2)
+        )
+        fetch(bounded, server)
+        requests_made, elapsed = fetch(bounded, server)
+        ok = ok and len(bounded.memo_cache) <= num_events // 2
+        print(
+            f"{f'bounded to {num_events // 2} entries':<28} {requests_made:>9} "
+            f"{'-':>9} {elapsed * 1000:>8.2f}"
+        )
+        for fetcher in (first, second, short, bounded):
+            fetcher.close()
+
+    print(
+        "shared memo: {entries} entries, {hits} hits, {misses} misses, "
+        "{evictions} evictions".format(**shared)
+    )
+    print(
+        "short TTL: {expirations} expirations; bounded: {evictions} evictions".format(
+            expirations=short.memo_cache.stats()["expirations"],
+            evictions=bounded.memo_cache.stats()["evictions"],
+        )
+    )
+    if not ok:
+        print("FAIL: unexpected number of requests")
+    return ok
+
+
+def bench_transfer(num_events: int, recording: str, repeat: int) -> None:
+    """
+    Measure compressed transfer and table extraction of event payloads.
+
+    Bytes on the wire are compared with and without Accept-Encoding
+    against the stub server. Decoding is timed on the bodies of a
+    recording made with ``pitstop.py --record NAME`` when one is given,
+    otherwise on the stub payloads, and on synthetic documents where the
+    table follows other data: the whole document with json.loads against
+    extract_json() of the fields the pipeline reads, with the peak and
+    retained memory of each (tracemalloc).
+
+    Args:
+        num_events: Number of events in the stub season
+        recording: Name of a recording in .cache/replay (stub payloads if empty)
+        repeat: Decodes of every body per measurement (median is reported)
+    """
+    with StubServer(num_events=num_events) as server:
+        print(f"transfer: {num_events} stub events")
+        print(f"{'Accept-Encoding':<22} {'requests':>9} {'KiB':>8} {'wire KiB':>9}")
+        for encoding in (None, "identity"):
+            fetcher = pitstop.F1DataFetcher()
+            if encoding:
+                fetcher.session.headers["Accept-Encoding"] = encoding
+            events = fetcher.fetch_events_data(f"{server.base_url}/events")
+            fetcher.fetch_event_specific_data(
+                events, base_url=f"{server.base_url}/event"
+            )
+            summary = fetcher.get_timing_summary()
+            fetcher.close()
+            print(
+                f"{encoding or fetcher.session.headers['Accept-Encoding']:<22} "
+                f"{summary['requests']:>9} {summary['bytes'] / 1024:>8.1f} "
+                f"{summary['wire_bytes'] / 1024:>9.1f}"
+            )
+        bodies = list(server.bodies.values())
+
+    if recording:
+        store = pitstop.ReplayStore(recording)
+        bodies = [store.load(url) for url in store.responses]
+    backend = "ijson" if pitstop._import_ijson() else "json, pruned"
+    print(
+        f"decode: {len(bodies)} bodies from {recording or 'the stub server'}, "
+        f"{sum(map(len, bodies)) / 1024:.0f} KiB; extract_json backend: {backend}"
+    )
+    print(f"{'decoder':<34} {'us/body':>8} {'peak KiB':>9} {'kept KiB':>9}")
+    _time_decoders("", bodies, repeat)
+
+    # The table after other fields, as in a payload carrying chart data
+    for kib in (16, 256, 2048):
+        series = [{"x": i, "y": i / 2, "label": f"lap {i}"} for i in range(kib * 21)]
+        body = json.dumps(
+            {"chart": {"series": series}, "htmlList": {"table": "<td>1</td>" * 500}}
+        ).encode()
+        _time_decoders(f"{len(body) // 1024} KiB synthetic, ", [body], repeat)
+
+
+def _time_decoders(label: str, bodies: List[bytes], repeat: int) -> None:
+    """Print the time and memory of json.loads and extract_json() on some bodies."""
+    import tracemalloc
+
+    paths = [
+        pitstop.EVENT_TABLE_PATH if b'"htmlList"' in body else pitstop.EVENTS_LIST_PATH
+        for body in bodies
+    ]
+    decoders = {
+        "json.loads": lambda body, path: json.loads(body),
+        "extract_json": pitstop.extract_json,
+    }
+    for name, decode in decoders.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for body, path in zip(bodies, paths):
+                decode(body, path)
+            times.append((time.perf_counter() - start) / len(bodies))
+        peak = kept = 0
+        for body, path in zip(bodies, paths):
+            tracemalloc.start()
+            value = decode(body, path)
+            kept = max(kept, tracemalloc.get_traced_memory()[0])
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del value
+        print(
+            f"{label + name:<34} {statistics.median(times) * 1e6:>8.1f} "
+            f"{peak / 1024:>9.1f} {kept / 1024:>9.1f}"
+        )
+
+
+def revise_race(records: List[Dict]) -> List[Dict]:
+    """
+    Revise a race table the way DHL does after a race.
+
+    The slowest stop's time is corrected to beat the fastest one, the
+    last-ranked stop is withdrawn and a late stop is added, then the rows
+    are re-ranked: positions move and points follow the new order.
+
+    Args:
+        records: Rows of a race file (at least three)
+
+    Returns:
+        Revised rows, ranked like a race file
+    """
+    revised = [dict(row) for row in records[:-1]]
+    slowest = max(revised, key=lambda row: row["Time (sec)"])
+    slowest["Time (sec)"] = round(min(r["Time (sec)"] for r in revised) - 0.01, 2)
+    late = dict(revised[0], Lap=(revised[0]["Lap"] or 0) + 1)
+    late["Time (sec)"] = round(max(r["Time (sec)"] for r in revised) + 1.0, 2)
+    revised.append(late)
+    revised.sort(key=lambda row: row["Time (sec)"])
+    for i, row in enumerate(revised):
+        row["Pos."] = i + 1
+        points = pitstop.AWARD_POINTS[i] if i < len(pitstop.AWARD_POINTS) - 1 else 0
+        row["Points"] = float(points) if points else None
+    return revised
+
+
+def bench_changes() -> bool:
+    """
+    Check the per-run change log on revised races and time diffing and applying it.
+
+    Every archived race is revised with revise_race(): its changes must
+    hold the corrected stop as an update, the withdrawn stop as a delete
+    and the late stop as an insert, and applying them to the old rows
+    must give the revised file. One race is then run through
+    process_event() in two runs, the second with the revised table, and
+    the change log left by the second run must describe the revision.
+    test_pitstop.py covers the same behaviour on small tables.
+
+    Returns:
+        True if every check passed
+    """
+    races = []
+    for path in sorted(glob.glob(ARCHIVE_GLOB)):
+        if path.endswith(pitstop.COMPACT_SUFFIX):
+            continue
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+        if len(records) >= 3 and all(r["Time (sec)"] is not None for r in records):
+            races.append((path, records, revise_race(records)))
+
+    ok, diff_seconds, apply_seconds, num_changes = True, 0.0, 0.0, 0
+    for path, old, new in races:
+        start = time.perf_counter()
+        changes = pitstop.diff_records(old, new)
+        diff_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        applied = pitstop.apply_changes(old, changes)
+        apply_seconds += time.perf_counter() - start
+        num_changes += len(changes)
+        ops = [change["op"] for change in changes]
+        if applied != new or ops.count("insert") != 1 or ops.count("delete") != 1:
+            print(f"FAIL: {path}: {ops.count('insert')} inserts, ", end="")
+            print(f"{ops.count('delete')} deletes, applied == new: {applied == new}")
+            ok = False
+    print(
+        f"changes: {len(races)} revised races, {num_changes} row changes; "
+        f"diff {diff_seconds / len(races) * 1e6:.0f} us/race, "
+        f"apply {apply_seconds / len(races) * 1e6:.0f} us/race"
+    )
+
+    # The same revision through process_event and the manifest
+    path, old, new = races[-1]
+    event = {"id": 1, "title": "FORMULA 1 STUB GRAND PRIX"}
+    with tempfile.TemporaryDirectory() as tmp:
+        for records in (old, new):
+            manifest = pitstop.SeasonManifest(tmp)
+            event_data = {"htmlList": {"table": records_to_html_table(records)}}
+            pitstop.process_event(event, event_data, 2025, tmp, manifest)
+            manifest.save()
+        with open(manifest.changes_path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+    logged = pitstop.apply_changes(old, lines)
+    corrected = [
+        line for line in lines if line["op"] == "update" and "Time (sec)" in line["old"]
+    ]
+    print(
+        f"process_event: {len(lines)} change log lines for {os.path.basename(path)} "
+        f"({len(corrected)} corrected time, "
+        f"{sum('Pos.' in line.get('old', {}) for line in lines)} moved)"
+    )
+    if logged != new or len(corrected) != 1:
+        print("FAIL: the change log does not describe the revision")
+        ok = False
+    return ok
+
+
+def synthetic_season(num_events: int, seed: int = 0) -> Tuple[List[Dict], List[str]]:
+    """
+    Generate DHL-shaped events and result tables, from one season to thousands of events.
+
+    Events cycle through the races of F1_RACES season by season, with
+    titles in the API's style ("FORMULA 1 <RACE> GRAND PRIX <year>") and
+    past dates. Every table has 40 to 60 stops by the team and driver
+    pairs of the archived races, ranked by time with award points for
+    the top ten, so it passes schema validation.
+
+    Args:
+        num_events: Number of events
+        seed: Seed of the random generator (same seed, same season)
+
+    Returns:
+        Tuple of (events list, HTML table of each event)
+    """
+    import random
+
+    pairs = set()
+    for path in glob.glob(ARCHIVE_GLOB):
+        if not path.endswith(pitstop.COMPACT_SUFFIX):
+            with open(path, encoding="utf-8") as f:
+                pairs.update((row["Team"], row["Driver"]) for row in json.load(f))
+    pairs = sorted(pairs)
+    calendar = [
+        (year, key)
+        for year in sorted(pitstop.F1_RACES)
+        for key in pitstop.F1_RACES[year]
+    ]
+    rng = random.Random(seed)
+    events, tables = [], []
+    for i in range(num_events):
+        year, key = calendar[i % len(calendar)]
+        events.append(
+            {
+                "id": 100000 + i,
+                "title": f"FORMULA 1 {key} GRAND PRIX {year}",
+                "date": {"date": f"{year}-06-01 14:00:00.000000"},
+            }
+        )
+        times = sorted(
+            round(rng.uniform(1.9, 6.0), 2) for _ in range(rng.randint(40, 60))
+        )
+        rows = []
+        for pos, time_sec in enumerate(times, 1):
+            team, driver = rng.choice(pairs)
+            points = pitstop.AWARD_POINTS[pos - 1] if pos <= 10 else None
+            rows.append(
+                {
+                    "Pos.": pos,
+                    "Team": team,
+                    "Driver": driver,
+                    "Time (sec)": time_sec,
+                    "Lap": rng.randint(1, 70),
+                    "Points": float(points) if points else None,
+                }
+            )
+        tables.append(records_to_html_table(rows))
+    return events, tables
+
+
+def _stage_result(
+    latencies: List[float], throughputs: List[float], peak: int
+) -> Dict[str, float]:
+    """Summarise one stage: median throughput, latency percentiles and peak memory."""
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    percentile = lambda p: (cuts[p - 1] if cuts else latencies[0]) * 1000
+    return {
+        "calls": len(latencies),
+        "throughput_per_s": statistics.median(throughputs),
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "peak_kib": peak / 1024,
+    }
+
+
+def _measure_stage(
+    items: List, call: Callable, repeat: int, setup: Optional[Callable] = None
+) -> Dict[str, float]:
+    """
+    Time a stage call by call, then measure its peak memory in an untimed pass.
+
+    Args:
+        items: Arguments of the calls (one call per item and repetition)
+        call: Stage function, called with (state, item)
+        repeat: Passes over the items
+        setup: Called before every pass to build the state (None state if absent)
+
+    Returns:
+        Result of _stage_result()
+    """
+    import tracemalloc
+
+    latencies, throughputs = [], []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        for item in items:
+            call_start = time.perf_counter()
+            call(state, item)
+            latencies.append(time.perf_counter() - call_start)
+        throughputs.append(len(items) / (time.perf_counter() - start))
+    state = setup() if setup else None
+    tracemalloc.start()
+    for item in items:
+        call(state, item)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return _stage_result(latencies, throughputs, peak)
+
+
+# Compared with the baseline: metric -> whether higher is better
+SUITE_METRICS = {"throughput_per_s": True, "p90_ms": False, "peak_kib": False}
+
+
+def compare_results(
+    results: Dict, baseline: Dict, tolerance: float
+) -> List[Tuple[str, str, float, bool]]:
+    """
+    Compare suite results with a baseline.
+
+    Args:
+        results: Output of run_suite()
+        baseline: Earlier output of run_suite()
+        tolerance: Relative change tolerated in the bad direction (0.25 = 25%)
+
+    Returns:
+        (stage, metric, current / baseline, whether it regressed) for every
+        metric of the stages present in both
+    """
+    rows = []
+    for stage, current in results["stages"].items():
+        previous = baseline["stages"].get(stage)
+        if previous is None:
+            continue
+        for metric, higher_is_better in SUITE_METRICS.items():
+            if not previous.get(metric):
+                continue
+            ratio = current[metric] / previous[metric]
+            regressed = (
+                ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+            )
+            rows.append((stage, metric, ratio, regressed))
+    return rows
+
+
+def run_suite(num_events: int, latency: float, repeat: int) -> Dict:
+    """
+    Time every pipeline stage on its own against a synthetic season.
+
+    Stages: events-list fetch and event fetch from the stub server (no
+    memo, no response cache, one request at a time), HTML table parse,
+    race name resolution, and JSON serialisation and write of each race
+    file to a temporary directory.
+
+    Args:
+        num_events: Events in the synthetic season
+        latency: Seconds the stub server delays every response
+        repeat: Passes over the events per stage
+
+    Returns:
+        Results: ``meta`` (run parameters and environment) and ``stages``
+        (calls, throughput, p50/p90/p99 latency and peak memory per stage)
+    """
+    import platform
+
+    events, tables = synthetic_season(num_events)
+    payloads = [{"htmlList": {"table": table}} for table in tables]
+    parsed = [pitstop.DataProcessor.html_table_to_table(p) for p in payloads]
+    stages = {}
+    logger = logging.getLogger("pitstop")
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        with StubServer(latency=latency, events=events, tables=tables) as server:
+
+            def new_fetcher():
+                return pitstop.F1DataFetcher(
+                    memo_cache=pitstop.MemoCache(max_entries=0)
+                )
+
+            events_url = f"{server.base_url}/events"
+            stages["events_list_fetch"] = _measure_stage(
+                range(10),
+                lambda fetcher, _: fetcher.fetch_events_data(events_url),
+                repeat,
+                new_fetcher,
+            )
+            event_url = f"{server.base_url}/event"
+            stages["event_fetch"] = _measure_stage(
+                events,
+                lambda fetcher, event: fetcher._fetch_single_event(
+                    event_url, event["id"], event["title"]
+                ),
+                repeat,
+                new_fetcher,
+            )
+        stages["html_parse"] = _measure_stage(
+            payloads,
+            lambda _, payload: pitstop.DataProcessor.html_table_to_table(payload),
+            repeat,
+        )
+        stages["name_resolution"] = _measure_stage(
+            events,
+            lambda _, event: pitstop.DataProcessor.resolve_race_name(
+                event["title"], int(event["title"].rsplit(" ", 1)[1])
+            ),
+            repeat,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            # A new directory per pass, so no write is skipped as unchanged
+            stages["json_write"] = _measure_stage(
+                list(enumerate(parsed)),
+                lambda out_dir, item: pitstop.DataProcessor._write_outputs(
+                    os.path.join(out_dir, f"{item[0]}.json"), item[1].to_json()
+                ),
+                repeat,
+                lambda: tempfile.mkdtemp(dir=tmp),
+            )
+    finally:
+        logger.setLevel(level)
+
+    return {
+        "meta": {
+            "events": num_events,
+            "latency": latency,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "stages": stages,
+    }
+
+
+def bench_suite(
+    num_events: int,
+    latency: float,
+    repeat: int,
+    output: str,
+    baseline_path: str,
+    tolerance: float,
+    update_baseline: bool,
+) -> bool:
+    """
+    Run the stage suite, save its results and compare them with a baseline.
+
+    Args:
+        num_events: Events in the synthetic season (24 to thousands)
+        latency: Seconds the stub server delays every response
+        repeat: Passes over the events per stage
+        output: JSON file the results are written to
+        baseline_path: Results to compare with; created from this run if missing
+        tolerance: Relative change tolerated before a metric is a regression
+        update_baseline: Replace the baseline with this run's results
+
+    Returns:
+        False if any metric regressed beyond the tolerance
+    """
+    results = run_suite(num_events, latency, repeat)
+    data = json.dumps(results, indent=2).encode("utf-8")
+    pitstop.write_file_atomic(output, data)
+
+    print(f"suite: {num_events} synthetic events, {repeat} passes per stage")
+    print(
+        f"{'stage':<18} {'calls':>6} {'per s':>9} {'p50 ms':>8} "
+        f"{'p90 ms':>8} {'p99 ms':>8} {'peak KiB':>9}"
+    )
+    for stage, result in results["stages"].items():
+        print(
+            f"{stage:<18} {result['calls']:>6} {result['throughput_per_s']:>9.0f} "
+            f"{result['p50_ms']:>8.3f} {result['p90_ms']:>8.3f} "
+            f"{result['p99_ms']:>8.3f} {result['peak_kib']:>9.0f}"
+        )
+    print(f"results written to {output}")
+
+    try:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        baseline = None
+    if baseline is None or update_baseline:
+        pitstop.write_file_atomic(baseline_path, data)
+        print(f"baseline saved to {baseline_path}")
+        return True
+    compared = ("events", "latency")
+    if any(baseline["meta"].get(key) != results["meta"][key] for key in compared):
+        parameters = ", ".join(f"{key}={baseline['meta'].get(key)}" for key in compared)
+        print(
+            f"baseline {baseline_path} was run with other parameters "
+            f"({parameters}); not compared"
+        )
+        return True
+
+    regressions = 0
+    print(f"vs baseline of {baseline['meta'].get('date')} (tolerance {tolerance:.0%}):")
+    for stage, metric, ratio, regressed in compare_results(
+        results, baseline, tolerance
+    ):
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {stage:<18} {metric:<17} x{ratio:.2f}{flag}")
+    print(f"{regressions} regressions" if regressions else "no regressions")
+    return not regressions
+
+
+# name -> (FaultProfile arguments, events per season served without results)
+FAULT_SCENARIOS = {
+    "clean": ({}, 0),
+    "latency": ({"latency": 0.02, "latency_sigma": 0.5}, 0),
+    "bursts": ({"error_rate": 0.1, "burst": 3, "retry_after": 0.05}, 0),
+    "drip": ({"drip_bytes": 512, "drip_delay": 0.002}, 0),
+    "unpublished": ({}, 2),
+}
+
+
+def bench_faults(years: List[int], seed: int) -> bool:
+    """
+    Fetch archived seasons from the fake DHL API under each fault scenario.
+
+    Every scenario must deliver every event: injected 429/5xx bursts are
+    retried, dripped bodies and slow responses only cost time, and events
+    served without results are reported as such.
+
+    Args:
+        years: Seasons to fetch
+        seed: Seed of the injected faults
+
+    Returns:
+        True if no event was lost in any scenario
+    """
+    import fake_api
+
+    logger = logging.getLogger("pitstop")
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    ok, expected_no_results = True, 0
+    print(f"faults: seasons {', '.join(map(str, years))}")
+    print(
+        f"{'scenario':<12} {'wall (s)':>9} {'events':>7} {'requests':>9} "
+        f"{'injected':>9} {'failed':>7} {'no results':>11}"
+    )
+    try:
+        for name, (kwargs, empty_events) in FAULT_SCENARIOS.items():
+            seasons = fake_api.load_seasons(years=years, empty_events=empty_events)
+            faults = fake_api.FaultProfile(seed=seed, **kwargs)
+            with fake_api.FakeDHLServer(seasons, faults) as server:
+                fetcher = pitstop.F1DataFetcher(
+                    retry_policy=pitstop.RetryPolicy(
+                        max_retries=5, backoff_factor=0.05
+                    ),
+                    memo_cache=pitstop.MemoCache(max_entries=0),
+                    base_url=server.base_url,
+                )
+                results = {}
+                start = time.perf_counter()
+                for year in years:
+                    fetcher.set_year(year)
+                    events = fetcher.fetch_events_data()
+                    results.update(fetcher.fetch_event_specific_data(events))
+                elapsed = time.perf_counter() - start
+                fetcher.close()
+            failed = sum(1 for data in results.values() if "error" in data)
+            failed += server.num_events - len(results)
+            no_results = sum(
+                1
+                for data in results.values()
+                if "error" not in data and not pitstop.has_table_rows(data)
+            )
+            if name == "clean":
+                expected_no_results = no_results
+            elif name == "unpublished":
+                # Archived races that are still empty don't count twice
+                ok &= no_results >= expected_no_results + len(years)
+            ok &= not failed
+            print(
+                f"{name:<12} {elapsed:>9.2f} {len(results):>7} {server.requests:>9} "
+                f"{server.errors:>9} {failed:>7} {no_results:>11}"
+            )
+    finally:
+        logger.setLevel(level)
+    print("all events delivered" if ok else "EVENTS LOST")
+    return ok
+
+
+def bench_logging(num_events: int, repeat: int) -> None:
+    """
+    Compare pipeline throughput with logging off, at each level and through a queue.
+
+    A stub season is recorded once and replayed for every configuration,
+    so the runs measure parsing, saving and logging without the network.
+    Log records go to a file, as in CI.
+
+    Args:
+        num_events: Number of events in the stub season (240 is about ten seasons)
+        repeat: Replayed runs per configuration
+    """
+    configs = [
+        ("quiet (WARNING)", logging.WARNING, False, False),
+        ("INFO", logging.INFO, False, False),
+        ("DEBUG", logging.DEBUG, False, False),
+        ("DEBUG, queue", logging.DEBUG, False, True),
+        ("DEBUG, JSON", logging.DEBUG, True, False),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "replay")
+        store = pitstop.ReplayStore("bench", mode="record", root=root)
+        with StubServer(num_events=num_events) as server:
+            base_url = server.base_url
+            run_recorded_pipeline(
+                pitstop.F1DataFetcher(replay_store=store),
+                base_url,
+                os.path.join(tmp, "out"),
+            )
+        store.save()
+
+        print(f"logging: {num_events} replayed events, median of {repeat} runs")
+        print(f"{'configuration':<17} {'events/s':>9} {'lines/run':>10} {'KiB/run':>8}")
+        log_path = os.path.join(tmp, "run.log")
+        try:
+            for label, level, json_lines, use_queue in configs:
+                times = []
+                with open(log_path, "w", encoding="utf-8") as stream:
+                    listener = pitstop.configure_logging(
+                        level, json_lines, use_queue, stream=stream
+                    )
+                    for _ in range(repeat):
+                        result = run_recorded_pipeline(
+                            pitstop.F1DataFetcher(
+                                replay_store=pitstop.ReplayStore("bench", root=root)
+                            ),
+                            base_url,
+                            os.path.join(tmp, "out"),
+                        )
+                        times.append(result["fetch"] + result["process"])
+                    if listener is not None:
+                        listener.stop()
+                with open(log_path, encoding="utf-8") as f:
+                    lines = sum(1 for _ in f)
+                print(
+                    f"{label:<17} {num_events / statistics.median(times):>9.0f} "
+                    f"{lines / repeat:>10.0f} "
+                    f"{os.path.getsize(log_path) / 1024 / repeat:>8.1f}"
+                )
+        finally:
+            logging.getLogger().handlers.clear()
+            logging.getLogger().setLevel(logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="concurrent event fetching")
+    fetch_parser.add_argument("--events", type=int, default=24)
+    fetch_parser.add_argument("--latency", type=float, default=0.1)
+    fetch_parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+
+    parse_parser = subparsers.add_parser("parse", help="HTML table parsing")
+    parse_parser.add_argument("--repeat", type=int, default=5)
+
+    records_parser = subparsers.add_parser(
+        "records", help="per-event table representations"
+    )
+    records_parser.add_argument("--repeat", type=int, default=5)
+
+    names_parser = subparsers.add_parser("names", help="race name resolution")
+    names_parser.add_argument("--repeat", type=int, default=1000)
+
+    dataset_parser = subparsers.add_parser(
+        "dataset", help="columnar dataset vs per-race JSON loading"
+    )
+    dataset_parser.add_argument("--runs", type=int, default=5)
+
+    query_parser = subparsers.add_parser("query", help="cross-season query index")
+    query_parser.add_argument("--repeat", type=int, default=100)
+
+    standings_parser = subparsers.add_parser(
+        "standings", help="award standings, full vs incremental"
+    )
+    standings_parser.add_argument("--repeat", type=int, default=5)
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="record a stub season and re-run it offline"
+    )
+    replay_parser.add_argument("--events", type=int, default=24)
+    replay_parser.add_argument("--repeat", type=int, default=5)
+
+    logging_parser = subparsers.add_parser(
+        "logging", help="pipeline throughput with logging off and on"
+    )
+    logging_parser.add_argument("--events", type=int, default=240)
+    logging_parser.add_argument("--repeat", type=int, default=3)
+
+    memo_parser = subparsers.add_parser(
+        "memo", help="shared in-memory memo cache of decoded responses"
+    )
+    memo_parser.add_argument("--events", type=int, default=24)
+
+    transfer_parser = subparsers.add_parser(
+        "transfer", help="compressed transfer and table extraction"
+    )
+    transfer_parser.add_argument("--events", type=int, default=24)
+    transfer_parser.add_argument("--recording", default="")
+    transfer_parser.add_argument("--repeat", type=int, default=20)
+
+    subparsers.add_parser("changes", help="change log of revised races")
+
+    suite_parser = subparsers.add_parser(
+        "suite", help="per-stage timings on a synthetic season, vs a baseline"
+    )
+    suite_parser.add_argument("--events", type=int, default=240)
+    suite_parser.add_argument("--latency", type=float, default=0.0)
+    suite_parser.add_argument("--repeat", type=int, default=3)
+    suite_parser.add_argument("--output", default=SUITE_RESULTS)
+    suite_parser.add_argument("--baseline", default=SUITE_BASELINE)
+    suite_parser.add_argument("--tolerance", type=float, default=0.25)
+    suite_parser.add_argument("--update-baseline", action="store_true")
+
+    faults_parser = subparsers.add_parser(
+        "faults", help="fetching from the fake DHL API with injected faults"
+    )
+    faults_parser.add_argument("--years", type=int, nargs="+", default=[2024, 2025])
+    faults_parser.add_argument("--seed", type=int, default=0)
+
+    pipeline_parser = subparsers.add_parser(
+        "pipeline", help="multi-season backfill, bulk fetch vs streamed"
+    )
+    pipeline_parser.add_argument("--events-per-year", type=int, default=24)
+    pipeline_parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    pipeline_parser.add_argument("--latency", type=float, default=0.0)
+    pipeline_parser.add_argument("--runs", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.benchmark == "fetch":
+        bench_fetch(args.events, args.latency, args.levels)
+    elif args.benchmark == "parse":
+        bench_parse(args.repeat)
+    elif args.benchmark == "records":
+        bench_records(args.repeat)
+    elif args.benchmark == "names":
+        bench_names(args.repeat)
+    elif args.benchmark == "dataset":
+        bench_dataset(args.runs)
+    elif args.benchmark == "query":
+        bench_query(args.repeat)
+    elif args.benchmark == "standings":
+        if not bench_standings(args.repeat):
+            sys.exit(1)
+    elif args.benchmark == "replay":
+        if not bench_replay(args.events, args.repeat):
+            sys.exit(1)
+    elif args.benchmark == "logging":
+        bench_logging(args.events, args.repeat)
+    elif args.benchmark == "memo":
+        if not bench_memo(args.events):
+            sys.exit(1)
+    elif args.benchmark == "transfer":
+        bench_transfer(args.events, args.recording, args.repeat)
+    elif args.benchmark == "changes":
+        if not bench_changes():
+            sys.exit(1)
+    elif args.benchmark == "suite":
+        if not bench_suite(
+            args.events,
+            args.latency,
+            args.repeat,
+            args.output,
+            args.baseline,
+            args.tolerance,
+            args.update_baseline,
+        ):
+            sys.exit(1)
+    elif args.benchmark == "faults":
+        if not bench_faults(args.years, args.seed):
+            sys.exit(1)
+    elif args.benchmark == "pipeline":
+        if not bench_pipeline(
+            args.events_per_year, args.workers, args.latency, args.runs
+        ):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
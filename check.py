@@ -1,26 +1,56 @@
-import json
+import argparse
+import asyncio
 import logging
+import math
+import signal
+import sys
+import threading
 import time
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),  # Output to console
-        logging.FileHandler("monitor.log"),  # Output to file
-    ],
+from pitstop import (
+    CACHE_DIR,
+    EVENT_CHART_PATH,
+    EVENT_TABLE_PATH,
+    F1_URLS,
+    FINALIZED_AFTER_DAYS,
+    MAX_CONCURRENT_REQUESTS,
+    F1DataFetcher,
+    ResponseCache,
+    RetryPolicy,
+    SeasonManifest,
+    configure_logging,
+    extract_json,
+    has_table_rows,
+    hash_bytes,
+    parse_event_date,
+    process_event,
+    season_urls,
 )
+
 logger = logging.getLogger(__name__)
 
 # Configuration
-URL = "https://inmotion.dhl/api/f1-award-element-data/6365?event=1094"
-CHECK_INTERVAL_SECONDS = 60  # Check every 60 seconds
-MAX_RETRIES_ON_ERROR = 3  # Max retries if a network error occurs before waiting longer
-RETRY_DELAY_SECONDS = 10  # Delay between retries for transient errors
+LOG_FILE = "monitor.log"  # log records are also appended here
+HOT_INTERVAL_SECONDS = 60  # poll interval around the end of a race
+MAX_INTERVAL_SECONDS = 30 * 60  # poll interval ceiling when nothing changes
+EVENTS_REFRESH_SECONDS = 6 * 60 * 60  # how often the season's events list is re-read
+MAX_IDLE_SLEEP_SECONDS = 60 * 60  # longest sleep while no event is due
+# Event dates are the start of race day (UTC); results are expected after the race
+WATCH_FROM = timedelta(hours=12)  # start polling this long after the event date
+HOT_UNTIL = timedelta(hours=36)  # poll at HOT_INTERVAL_SECONDS until then
+LATENCY_SAMPLES = 10000  # most recent poll latencies kept for percentiles
+# Quick retries of a request that hit a network error. Error statuses are
+# not retried here (a Retry-After could hold a worker for minutes): the
+# watcher's error backoff spaces out failing polls instead.
+MAX_RETRIES_ON_ERROR = 2  # Max retries if a network error occurs before waiting longer
+RETRY_DELAY_SECONDS = 0.5  # Base backoff delay, doubled on each retry
+MAX_RETRY_DELAY_SECONDS = 2  # Longest wait between retries of one request
 
 # It's good practice to set a User-Agent
 HEADERS = {
@@ -28,111 +58,537 @@ HEADERS = {
 }
 
 
-def fetch_data(url, headers, timeout=10):
-    """Fetches data from the URL and returns the JSON response."""
-    response = requests.get(url, headers=headers, timeout=timeout)
-    response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
-    return response.json()
+def has_results(api_data: Any) -> bool:
+    """Return whether an event payload carries results ('data.chart' or a results table)."""
+    if not isinstance(api_data, dict):
+        return False
+    chart_data = (api_data.get("data") or {}).get("chart")
+    return (isinstance(chart_data, list) and len(chart_data) > 0) or has_table_rows(
+        api_data
+    )
 
 
-def main():
-    logger.info(f"Monitoring URL: {URL}")
-    logger.info(
-        f"Checking every {CHECK_INTERVAL_SECONDS} seconds for updates in 'data.chart'."
-    )
-    logger.info("-" * 30)
+class MonitorStats:
+    """Thread-safe counters of a monitor run."""
 
-    retries = 0
-    while True:
-        try:
-            logger.info("Checking for updates...")
-            api_data = fetch_data(URL, HEADERS)
-            retries = 0  # Reset retries on successful fetch
+    def __init__(self):
+        self.polls = 0
+        self.not_modified = 0
+        self.bytes = 0
+        self.errors = 0
+        self.detections = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
 
-            # The key distinguishing factor is the 'chart' list within 'data'
-            # Safely access nested keys
-            chart_data = api_data.get("data", {}).get("chart", None)
+    def record_poll(self, latency: float, num_bytes: int, not_modified: bool) -> None:
+        """Count a completed request with its latency in seconds and body size."""
+        with self._lock:
+            self.polls += 1
+            self.not_modified += not_modified
+            self.bytes += num_bytes
+            self.latencies.append(latency)
 
-            if chart_data is None:
-                logger.warning(
-                    "Response format unexpected: 'data' or 'chart' key missing."
-                )
-                logger.debug(f"Raw response snippet: {str(api_data)[:200]}")
-            elif isinstance(chart_data, list) and len(chart_data) > 0:
-                logger.info(">>> UPDATE DETECTED! <<<")
-                logger.info(f"Chart Data:\n{json.dumps(chart_data, indent=2)}")
-                logger.info("Script will now exit as data has been found.")
-                break  # Exit the loop once an update is found
-            else:
-                # chart_data is an empty list or not a list
-                logger.info(
-                    "No update yet. 'chart' data is empty or not in the expected populated format."
-                )
-                if isinstance(chart_data, list):
-                    logger.debug(f"Current 'chart' length: {len(chart_data)}")
-                else:
-                    logger.debug(
-                        f"Current 'chart' type: {type(chart_data)}, value: {str(chart_data)[:50]}"
-                    )
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
 
-        except requests.exceptions.HTTPError as http_err:
-            logger.error(
-                f"HTTP error occurred: {http_err} - Status Code: {http_err.response.status_code}"
-            )
-            if retries < MAX_RETRIES_ON_ERROR:
-                retries += 1
-                logger.info(
-                    f"Retrying in {RETRY_DELAY_SECONDS} seconds... (Attempt {retries}/{MAX_RETRIES_ON_ERROR})"
-                )
-                time.sleep(RETRY_DELAY_SECONDS)
+    def record_detection(self) -> None:
+        with self._lock:
+            self.detections += 1
+
+    def latency_percentile(self, percent: float) -> Optional[float]:
+        """
+        Return a poll latency percentile (nearest rank).
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds, or None before the first poll
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        rank = max(1, math.ceil(percent / 100 * len(latencies)))
+        return latencies[rank - 1]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return all counters, with p50/p90/p99 latencies in milliseconds."""
+        counters = {
+            "polls": self.polls,
+            "not_modified": self.not_modified,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "detections": self.detections,
+        }
+        for percent in (50, 90, 99):
+            latency = self.latency_percentile(percent)
+            counters[f"p{percent}_ms"] = None if latency is None else latency * 1000
+        return counters
+
+    def summary(self) -> str:
+        counters = self.as_dict()
+        latencies = " ".join(
+            f"p{percent}={counters[f'p{percent}_ms']:.1f}ms"
+            for percent in (50, 90, 99)
+            if counters[f"p{percent}_ms"] is not None
+        )
+        return (
+            f"Monitor stats: {counters['polls']} polls ({counters['not_modified']} not modified), "
+            f"{counters['bytes']} bytes, {counters['errors']} errors, "
+            f"{counters['detections']} detections {latencies}"
+        ).rstrip()
+
+
+class WatchedEvent:
+    """Polling state of a single event."""
+
+    def __init__(self, event: Dict, url: str):
+        """
+        Initialize the WatchedEvent.
+
+        Args:
+            event: Event dictionary from the events list
+            url: Event-specific data URL
+        """
+        self.event = event
+        self.url = url
+        self.event_date = parse_event_date(event)
+        self.interval = HOT_INTERVAL_SECONDS
+        self.next_check = 0.0
+        self.body_hash: Optional[str] = None
+        self.has_results = False
+        self.errors = 0  # consecutive failed polls
+
+    @property
+    def title(self) -> str:
+        return self.event.get("title", "Unknown Title")
+
+    def window(self) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Return the (start, end) of the period in which the event is polled."""
+        if self.event_date is None:
+            return None, None
+        return (
+            self.event_date + WATCH_FROM,
+            self.event_date + timedelta(days=FINALIZED_AFTER_DAYS),
+        )
+
+    def is_due(self, now: datetime) -> bool:
+        """Return whether the event should be polled at the given time."""
+        start, end = self.window()
+        if start is not None and not start <= now <= end:
+            return False
+        return self.next_check <= now.timestamp()
+
+    def schedule(
+        self,
+        changed: bool,
+        now: datetime,
+        hot_interval: float = HOT_INTERVAL_SECONDS,
+        max_interval: float = MAX_INTERVAL_SECONDS,
+    ) -> None:
+        """
+        Pick the next poll time.
+
+        Events are polled every hot_interval seconds until results appear
+        during the hours after the race. Otherwise the interval doubles with
+        every unchanged poll, up to max_interval, and drops back when the
+        payload changes.
+
+        Args:
+            changed: Whether the last poll returned a new payload
+            now: Time of the last poll
+            hot_interval: Shortest interval in seconds
+            max_interval: Longest interval in seconds
+        """
+        hot = (
+            self.event_date is not None
+            and now < self.event_date + HOT_UNTIL
+            and not self.has_results
+        )
+        if hot or changed:
+            self.interval = hot_interval
+        else:
+            self.interval = min(self.interval * 2, max_interval)
+        self.next_check = now.timestamp() + self.interval
+
+
+class EventWatcher:
+    """Watch a season's events and process each one as soon as its results appear."""
+
+    def __init__(
+        self,
+        year: int,
+        output_dir: str = None,
+        max_workers: int = MAX_CONCURRENT_REQUESTS,
+        events_url: str = None,
+        event_url: str = None,
+        hot_interval: float = HOT_INTERVAL_SECONDS,
+        max_interval: float = MAX_INTERVAL_SECONDS,
+        cache_dir: str = CACHE_DIR,
+        base_url: str = None,
+    ):
+        """
+        Initialize the EventWatcher.
+
+        Args:
+            year: Season to watch
+            output_dir: Directory for the JSON files (defaults to the year)
+            max_workers: Maximum number of requests in flight at once
+            events_url: Events list URL (defaults to the season's URL)
+            event_url: Event-specific data URL (defaults to the season's URL)
+            hot_interval: Shortest poll interval in seconds
+            max_interval: Longest poll interval in seconds
+            cache_dir: Directory of the response cache used for conditional requests
+            base_url: Server the default URLs point to instead of the DHL API
+        """
+        self.year = year
+        self.output_dir = output_dir or str(year)
+        self.max_workers = max(1, max_workers)
+        urls = season_urls(year, base_url)
+        self.events_url = events_url or urls["EVENT_DATA_URL"]
+        self.event_url = event_url or urls["EVENT_SPECIFIC_URL"]
+        # A zero TTL makes every poll a conditional request
+        self.response_cache = ResponseCache(cache_dir, ttl=0)
+        self.fetcher = F1DataFetcher(
+            year=year,
+            headers=HEADERS,
+            max_workers=max_workers,
+            retry_policy=RetryPolicy(
+                max_retries=MAX_RETRIES_ON_ERROR,
+                backoff_factor=RETRY_DELAY_SECONDS,
+                max_backoff=MAX_RETRY_DELAY_SECONDS,
+                retry_statuses=(),
+            ),
+            response_cache=self.response_cache,
+            base_url=base_url,
+        )
+        self.hot_interval = hot_interval
+        self.max_interval = max_interval
+        # Failing events are retried after jittered, exponentially growing delays
+        self.error_backoff = RetryPolicy(
+            backoff_factor=hot_interval, max_backoff=max_interval
+        )
+        self.manifest = SeasonManifest(self.output_dir)
+        self.stats = MonitorStats()
+        self.watched: Dict[Any, WatchedEvent] = {}
+        self._events_refreshed_at = 0.0
+        self._stop: Optional[asyncio.Event] = None
+
+    def refresh_events(self) -> None:
+        """Re-read the season's events list, keeping the state of known events."""
+        events = self.fetcher.fetch_events_data(self.events_url)
+        if not events:
+            logger.warning("Could not read the events list; keeping the previous one.")
+            return
+        for event in events:
+            event_id = event.get("id")
+            if not event_id:
                 continue
+            if event_id in self.watched:
+                self.watched[event_id].event = event
+                self.watched[event_id].event_date = parse_event_date(event)
             else:
-                logger.warning("Max retries reached. Will wait for the full interval.")
-
-        except requests.exceptions.ConnectionError as conn_err:
-            logger.error(f"Connection error occurred: {conn_err}")
-            if retries < MAX_RETRIES_ON_ERROR:
-                retries += 1
-                logger.info(
-                    f"Retrying in {RETRY_DELAY_SECONDS} seconds... (Attempt {retries}/{MAX_RETRIES_ON_ERROR})"
+                self.watched[event_id] = WatchedEvent(
+                    event, f"{self.event_url}?event={event_id}"
                 )
-                time.sleep(RETRY_DELAY_SECONDS)
-                continue
-            else:
-                logger.warning("Max retries reached. Will wait for the full interval.")
-
-        except requests.exceptions.Timeout as timeout_err:
-            logger.error(f"Timeout error occurred: {timeout_err}")
-            if retries < MAX_RETRIES_ON_ERROR:
-                retries += 1
-                logger.info(
-                    f"Retrying in {RETRY_DELAY_SECONDS} seconds... (Attempt {retries}/{MAX_RETRIES_ON_ERROR})"
+        self._events_refreshed_at = time.time()
+        logger.info("Watching %d events of %s.", len(self.watched), self.year)
+
+    def poll(self, watched: WatchedEvent) -> Tuple[bool, Any]:
+        """
+        Poll one event, decoding its payload only if it changed.
+
+        Args:
+            watched: Event to poll
+
+        Returns:
+            Tuple of (whether the payload changed, decoded payload or None)
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+            json.JSONDecodeError: If a changed payload is not valid JSON
+        """
+        entry = self.response_cache.get(watched.url)
+        start = time.perf_counter()
+        response = self.fetcher.fetch(
+            watched.url, headers=ResponseCache.conditional_headers(entry)
+        )
+        self.stats.record_poll(
+            time.perf_counter() - start,
+            len(response.content),
+            response.status_code == 304,
+        )
+        if response.status_code == 304 and entry is not None:
+            self.response_cache.refresh(watched.url, entry)
+            if watched.body_hash is not None:
+                return False, None
+            # First poll since start-up: the cached body may not be processed yet
+            body = entry["body"]
+        else:
+            body = response.content
+
+        # Servers without validators still answer 200; compare the bodies
+        body_hash = hash_bytes(body)
+        if body_hash == watched.body_hash:
+            return False, None
+        watched.body_hash = body_hash
+        if response.status_code != 304:
+            self.response_cache.put(watched.url, response)
+        return True, extract_json(body, EVENT_TABLE_PATH, EVENT_CHART_PATH)
+
+    async def run(self, once: bool = False) -> MonitorStats:
+        """
+        Watch every event of the season on one event loop until all are finalized.
+
+        Each event gets its own task and schedule. Blocking work (requests on
+        the shared, pooled session and writing race files) runs on a thread
+        pool of max_workers threads. SIGINT and SIGTERM stop all tasks
+        between polls.
+
+        Args:
+            once: Poll the due events a single time and return
+
+        Returns:
+            Counters of the run
+        """
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._process_lock = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        handled_signals = []
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+                handled_signals.append(sig)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Not supported on Windows or outside the main thread
+                pass
+
+        stop_waiter = asyncio.ensure_future(self._stop.wait())
+        tasks: Dict[Any, asyncio.Task] = {}
+        try:
+            await loop.run_in_executor(self._executor, self.refresh_events)
+            if once:
+                now = datetime.now(timezone.utc)
+                due = [w for w in self.watched.values() if w.is_due(now)]
+                await asyncio.gather(*(self._poll_target(w) for w in due))
+                return self.stats
+
+            while not self._stop.is_set():
+                for event_id, watched in self.watched.items():
+                    if event_id not in tasks:
+                        tasks[event_id] = asyncio.ensure_future(self._watch(watched))
+                pending = [task for task in tasks.values() if not task.done()]
+                if not pending:
+                    logger.info("All events of the season are finalized. Stopping.")
+                    break
+                refresh_in = self._events_refreshed_at + EVENTS_REFRESH_SECONDS
+                await asyncio.wait(
+                    pending + [stop_waiter],
+                    timeout=max(0.0, refresh_in - time.time()),
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
-                time.sleep(RETRY_DELAY_SECONDS)
+                if time.time() >= refresh_in and not self._stop.is_set():
+                    await loop.run_in_executor(self._executor, self.refresh_events)
+            return self.stats
+        finally:
+            self._stop.set()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            stop_waiter.cancel()
+            for sig in handled_signals:
+                loop.remove_signal_handler(sig)
+            # Polls not started yet are dropped so a signal stops the run promptly
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self.fetcher.close()
+            logger.info("%s", self.stats.summary())
+
+    def stop(self) -> None:
+        """Ask a running monitor to shut down after the polls in flight."""
+        if self._stop is not None and not self._stop.is_set():
+            logger.info("Stopping monitor...")
+            self._stop.set()
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep unless the monitor is stopped first; return whether it was stopped."""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _watch(self, watched: WatchedEvent) -> None:
+        """Poll one event on its own schedule until it is finalized or the monitor stops."""
+        while not self._stop.is_set():
+            now = datetime.now(timezone.utc)
+            start, end = watched.window()
+            if end is not None and now > end:
+                return
+            next_time = watched.next_check
+            if start is not None:
+                next_time = max(next_time, start.timestamp())
+            wait = next_time - now.timestamp()
+            if wait > 0:
+                if await self._sleep(min(wait, MAX_IDLE_SLEEP_SECONDS)):
+                    return
                 continue
-            else:
-                logger.warning("Max retries reached. Will wait for the full interval.")
+            await self._poll_target(watched)
 
+    async def _poll_target(self, watched: WatchedEvent) -> None:
+        """Poll an event once, process new results and schedule its next poll."""
+        loop = asyncio.get_running_loop()
+        now = datetime.now(timezone.utc)
+        try:
+            changed, api_data = await loop.run_in_executor(
+                self._executor, self.poll, watched
+            )
+        except requests.exceptions.HTTPError as http_err:
+            logger.error(
+                "HTTP error for %s: %s - Status Code: %s",
+                watched.title,
+                http_err,
+                http_err.response.status_code,
+            )
+            self._schedule_after_error(watched, now)
+            return
         except requests.exceptions.RequestException as req_err:
-            logger.error(f"An error occurred during the request: {req_err}")
-            # For generic request exceptions, you might not want to retry as aggressively
+            logger.error("Request for %s failed: %s", watched.title, req_err)
+            self._schedule_after_error(watched, now)
+            return
+        except ValueError as json_err:
+            logger.error("Failed to decode JSON for %s: %s", watched.title, json_err)
+            self._schedule_after_error(watched, now)
+            return
 
-        except json.JSONDecodeError as json_err:
-            logger.error(f"Failed to decode JSON response: {json_err}")
-            # It's unlikely retrying immediately will help if the server sends malformed JSON
+        watched.errors = 0
+        if changed and has_results(api_data):
+            # Race files and the manifest are written one event at a time
+            async with self._process_lock:
+                await loop.run_in_executor(
+                    self._executor, self.process, watched, api_data
+                )
+        elif changed:
+            logger.info("No results yet for %s.", watched.title)
+        watched.schedule(changed, now, self.hot_interval, self.max_interval)
 
-        except Exception as e:
-            logger.error(f"An unexpected error occurred: {e}", exc_info=True)
+    def _schedule_after_error(self, watched: WatchedEvent, now: datetime) -> None:
+        """Back off from a failing event with jittered exponential delays."""
+        self.stats.record_error()
+        delay = self.error_backoff.get_delay(watched.errors)
+        watched.errors += 1
+        watched.next_check = now.timestamp() + delay
+        logger.warning("Retrying %s in %.0f seconds.", watched.title, delay)
 
+    def process(self, watched: WatchedEvent, api_data: Dict) -> None:
+        """Run the pitstop.py processing for a single event with new results."""
+        if not watched.has_results:
+            logger.info(">>> UPDATE DETECTED! %s <<<", watched.title)
+            self.stats.record_detection()
+        watched.has_results = True
+        status, file_path = process_event(
+            watched.event, api_data, self.year, self.output_dir, self.manifest
+        )
+        self.manifest.save()
         logger.info(
-            f"Waiting for {CHECK_INTERVAL_SECONDS} seconds before next check..."
+            "%s: %s%s", watched.title, status, f" ({file_path})" if file_path else ""
         )
-        logger.info("-" * 30)
-        time.sleep(CHECK_INTERVAL_SECONDS)
 
 
-if __name__ == "__main__":
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Watch a season's events and process each race as soon as DHL publishes its pit stops."
+    )
+    parser.add_argument(
+        "year",
+        type=int,
+        nargs="?",
+        default=max(F1_URLS),
+        choices=sorted(F1_URLS),
+        help=f"season to watch (default: {max(F1_URLS)})",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="directory for the race files (default: the year)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help=f"requests in flight at once (default: {MAX_CONCURRENT_REQUESTS})",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="poll the due events once and exit",
+    )
+    parser.add_argument(
+        "--base-url",
+        metavar="URL",
+        help="poll URL instead of the DHL API, e.g. a local fake_api.py server",
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="also log every request and every event processed",
+    )
+    verbosity.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="only log warnings and errors",
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="log one JSON object per line instead of text",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    # Records are written from a background thread, off the event loop
+    log_listener = configure_logging(
+        (
+            logging.DEBUG
+            if args.verbose
+            else logging.WARNING if args.quiet else logging.INFO
+        ),
+        json_lines=args.log_json,
+        use_queue=True,
+        log_file=LOG_FILE,
+        stream=sys.stderr,
+    )
     try:
-        main()
+        logger.info("Monitoring the %s season.", args.year)
+        logger.info(
+            "Polling due events every %s to %s seconds.",
+            HOT_INTERVAL_SECONDS,
+            MAX_INTERVAL_SECONDS,
+        )
+        logger.info("-" * 30)
+        watcher = EventWatcher(
+            args.year, args.output_dir, args.workers, base_url=args.base_url
+        )
+        asyncio.run(watcher.run(once=args.once))
     except KeyboardInterrupt:
         logger.info("Monitoring stopped by user.")
+    finally:
+        log_listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+"""
+Local stand-in for the DHL inmotion element-data API, seeded from the archive.
+
+Every season of F1_URLS is served under its element IDs, so pointing
+pitstop.py or check.py at the server with ``--base-url`` exercises the
+same code paths as the real API:
+
+* ``/<events list ID>`` returns ``data.chart.events`` (ID, title and date
+  of every race found in ``<year>/``)
+* ``/<event data ID>?event=<ID>`` returns the race's stops as
+  ``data.chart`` and as the ``htmlList.table`` HTML, with ETags and gzip
+
+Faults can be injected to measure retries and timeouts offline: latency
+drawn from a log-normal distribution, bursts of 429/5xx responses, bodies
+dripped out in small chunks, and events whose results are not published
+yet (empty chart and table).
+
+Usage:
+    python fake_api.py --port 8080
+    python fake_api.py --latency 0.08 --latency-sigma 0.5 --error-rate 0.05 --burst 3
+    python pitstop.py 2025 --base-url http://127.0.0.1:8080
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from archive import iter_race_files, list_year_dirs
+from pitstop import F1_RACES, F1_URLS
+
+CONTENT_BYTES = 4096  # article HTML per event payload, roughly the real API's
+ERROR_STATUSES = (429, 500, 502, 503)  # statuses of injected errors
+FIRST_EVENT_ID = 1000  # ID of a season's first event, offset by 100 per season
+SEASON_START = (3, 1)  # (month, day) of a season's first race
+DAYS_BETWEEN_RACES = 14
+
+
+def records_to_html_table(records: List[Dict]) -> str:
+    """
+    Render archived race records in the DHL ``htmlList.table`` layout.
+
+    Args:
+        records: Rows as stored in a ``<year>/<Race>.json`` file
+
+    Returns:
+        HTML table string
+    """
+    rows = [
+        '\n<table class="f1-award-table">\n  <tr>\n'
+        '    <th class="align-center">Pos.</th>\n    <th>Team</th>\n'
+        "    <th>Driver</th>\n    <th>Time (sec)</th>\n    <th>Lap</th>\n"
+        "    <th>Points</th>\n  </tr>\n"
+    ]
+
+    def cell(value):
+        return "" if value is None else value
+
+    for record in records:
+        rows.append(
+            "      <tr>\n"
+            f'      <td class="align-center"><strong>{cell(record["Pos."])}</strong></td>\n'
+            f'      <td>{cell(record["Team"])}</td>\n'
+            f'      <td>{cell(record["Driver"])}</td>\n'
+            f'      <td>{cell(record["Time (sec)"])}</td>\n'
+            f'      <td>{cell(record["Lap"])}</td>\n'
+            f'      <td><strong>{cell(record["Points"])}</strong></td>\n'
+            "    </tr>\n"
+        )
+    rows.append("</table>\n")
+    return "".join(rows)
+
+
+def records_to_chart(records: List[Dict], event_date: datetime) -> List[Dict]:
+    """
+    Render archived race records as the stops of ``data.chart``.
+
+    The archive only keeps the driver's surname, so the first name, car
+    number and stop times are placeholders.
+
+    Args:
+        records: Rows as stored in a ``<year>/<Race>.json`` file
+        event_date: Date of the race
+
+    Returns:
+        One chart entry per stop
+    """
+    start = event_date.strftime("%Y-%m-%d %H:%M:%S.000000")
+    return [
+        {
+            "id": position,
+            "driverNr": None,
+            "tla": str(record["Driver"] or "")[:3].upper(),
+            "firstName": "",
+            "lastName": record["Driver"],
+            "team": record["Team"],
+            "duration": record["Time (sec)"],
+            "startTime": {"date": start, "timezone_type": 3, "timezone": "UTC"},
+            "lap": record["Lap"],
+            "points": record["Points"],
+            "irregular": False,
+            "notes": "",
+        }
+        for position, record in enumerate(records, 1)
+    ]
+
+
+def event_title(race: str, year: int) -> str:
+    """
+    Build an API-style event title that resolves back to the race name.
+
+    Args:
+        race: Race name such as "Monaco Grand Prix"
+        year: Season
+
+    Returns:
+        Title such as "FORMULA 1 MONACO GRAND PRIX 2025"
+    """
+    for key, name in F1_RACES.get(year, {}).items():
+        if name == race:
+            return f"FORMULA 1 {key} GRAND PRIX {year}"
+    return f"FORMULA 1 {race.upper()} {year}"
+
+
+def load_seasons(
+    root: str = ".",
+    years: Optional[Sequence[int]] = None,
+    empty_events: int = 0,
+    content_bytes: int = CONTENT_BYTES,
+) -> Dict[int, Tuple[List[Dict], Dict[str, Dict]]]:
+    """
+    Build the events list and event payloads of every archived season.
+
+    Races are ordered by the season's F1_RACES calendar and dated two weeks
+    apart from March 1st.
+
+    Args:
+        root: Directory containing the ``<year>/`` race folders
+        years: Seasons to load (defaults to those both archived and in F1_URLS)
+        empty_events: Serve the last N events of each season without results
+        content_bytes: Size of the article HTML padding each event payload
+
+    Returns:
+        Mapping of year to (events list, payload per event ID as a string)
+    """
+    seasons = {}
+    for year, year_dir in list_year_dirs(root).items():
+        if year not in F1_URLS or (years is not None and year not in years):
+            continue
+        calendar = {
+            race: i
+            for i, race in enumerate(dict.fromkeys(F1_RACES.get(year, {}).values()))
+        }
+        races = sorted(
+            iter_race_files(year_dir),
+            key=lambda item: (calendar.get(item[0], len(calendar)), item[0]),
+        )
+        first_id = FIRST_EVENT_ID + 100 * (year - min(F1_URLS))
+        first_date = datetime(year, *SEASON_START, 14)
+        events, payloads = [], {}
+        for i, (race, file_path) in enumerate(races):
+            with open(file_path, encoding="utf-8") as f:
+                records = json.load(f)
+            if i >= len(races) - empty_events:
+                records = []
+            event_id = first_id + i
+            event_date = first_date + timedelta(days=DAYS_BETWEEN_RACES * i)
+            title = event_title(race, year)
+            events.append(
+                {
+                    "id": event_id,
+                    "title": title,
+                    "short_title": race,
+                    "abbr": race[:3].upper(),
+                    "date": {
+                        "date": event_date.strftime("%Y-%m-%d %H:%M:%S.000000"),
+                        "timezone_type": 3,
+                        "timezone": "UTC",
+                    },
+                }
+            )
+            payloads[str(event_id)] = {
+                "data": {
+                    "chart": records_to_chart(records, event_date),
+                    "sort": "1",
+                    "event_id": event_id,
+                    "list_item_title": race,
+                },
+                "htmlList": {
+                    "table": records_to_html_table(records),
+                    "content": f'<div class="f1-award-content">{"x" * content_bytes}</div>',
+                    "video": "",
+                    "header": f'<div class="f1-award-header"><h1>{title}</h1></div>',
+                },
+            }
+        seasons[year] = (events, payloads)
+    return seasons
+
+
+class FaultProfile:
+    """Faults injected into the responses of a FakeDHLServer."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_sigma: float = 0.0,
+        error_rate: float = 0.0,
+        burst: int = 1,
+        error_statuses: Sequence[int] = ERROR_STATUSES,
+        retry_after: Optional[float] = 1.0,
+        drip_bytes: int = 0,
+        drip_delay: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the FaultProfile.
+
+        Args:
+            latency: Median delay of a response in seconds
+            latency_sigma: Sigma of the log-normal delay distribution
+                (0 delays every response by exactly ``latency``)
+            error_rate: Probability that a request starts an error burst
+            burst: Consecutive requests answered with an error per burst
+            error_statuses: Statuses drawn from for each error
+            retry_after: Retry-After seconds sent with 429 responses (None to omit)
+            drip_bytes: Send bodies in chunks of this many bytes (0 sends at once)
+            drip_delay: Seconds to wait before each chunk
+            seed: Seed of the random generator, for repeatable runs
+        """
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.burst = max(1, burst)
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.drip_bytes = drip_bytes
+        self.drip_delay = drip_delay
+        self._random = random.Random(seed)
+        self._burst_left = 0
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Draw the delay of the next response in seconds."""
+        if not self.latency or not self.latency_sigma:
+            return self.latency
+        with self._lock:
+            return self.latency * math.exp(
+                self.latency_sigma * self._random.gauss(0, 1)
+            )
+
+    def error_status(self) -> Optional[int]:
+        """Return the error status to answer the next request with, or None."""
+        with self._lock:
+            if not self._burst_left and self._random.random() < self.error_rate:
+                self._burst_left = self.burst
+            if not self._burst_left:
+                return None
+            self._burst_left -= 1
+            return self._random.choice(self.error_statuses)
+
+
+class FakeDHLServer:
+    """Threaded local HTTP server serving the archive as the element-data API."""
+
+    def __init__(
+        self,
+        seasons: Optional[Dict[int, Tuple[List[Dict], Dict[str, Dict]]]] = None,
+        faults: Optional[FaultProfile] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Initialize the FakeDHLServer.
+
+        Args:
+            seasons: Output of load_seasons() (defaults to the archive in the
+                current directory)
+            faults: Faults to inject (none by default)
+            host: Address to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        if seasons is None:
+            seasons = load_seasons()
+        self.faults = faults or FaultProfile()
+        self.num_events = sum(len(events) for events, _ in seasons.values())
+        # Encoded bodies by (element ID, event ID or None)
+        self.bodies: Dict[Tuple[str, Optional[str]], bytes] = {}
+        for year, (events, payloads) in seasons.items():
+            urls = F1_URLS[year]
+            events_id = urls["EVENT_DATA_URL"].rsplit("/", 1)[1]
+            event_data_id = urls["EVENT_SPECIFIC_URL"].rsplit("/", 1)[1]
+            self.bodies[events_id, None] = json.dumps(
+                {"data": {"chart": {"events": events}}}
+            ).encode("utf-8")
+            for event_id, payload in payloads.items():
+                self.bodies[event_data_id, event_id] = json.dumps(payload).encode(
+                    "utf-8"
+                )
+        self.requests = 0
+        self.errors = 0
+        self._counter_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _lookup(self, path: str) -> Optional[bytes]:
+        """Return the body served for a request path, or None if unknown."""
+        parsed = urlparse(path)
+        element_id = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+        event_id = parse_qs(parsed.query).get("event", [None])[0]
+        return self.bodies.get((element_id, event_id))
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Buffer headers and body into one write to avoid Nagle stalls
+            wbufsize = -1
+
+            def send_empty(self, status: int, headers: Dict[str, str] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                faults = server.faults
+                delay = faults.delay()
+                if delay:
+                    time.sleep(delay)
+                status = faults.error_status()
+                with server._counter_lock:
+                    server.requests += 1
+                    server.errors += status is not None
+                if status is not None:
+                    headers = {}
+                    if status == 429 and faults.retry_after is not None:
+                        headers["Retry-After"] = f"{faults.retry_after:g}"
+                    self.send_empty(status, headers)
+                    return
+                body = server._lookup(self.path)
+                if body is None:
+                    self.send_empty(404)
+                    return
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_empty(304, {"ETag": etag})
+                    return
+                gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+                if gzipped:
+                    body = gzip.compress(body, compresslevel=6, mtime=0)
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not faults.drip_bytes:
+                    self.wfile.write(body)
+                    return
+                for start in range(0, len(body), faults.drip_bytes):
+                    self.wfile.flush()
+                    time.sleep(faults.drip_delay)
+                    self.wfile.write(body[start : start + faults.drip_bytes])
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def __enter__(self) -> "FakeDHLServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve the archived seasons as a local DHL element-data API."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument(
+        "--root", default=".", help="directory with the <year>/ folders"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="median response delay in seconds"
+    )
+    parser.add_argument(
+        "--latency-sigma",
+        type=float,
+        default=0.0,
+        help="sigma of the log-normal delay distribution (0 for a fixed delay)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="probability that a request starts a burst of errors",
+    )
+    parser.add_argument(
+        "--burst", type=int, default=1, help="requests failed per error burst"
+    )
+    parser.add_argument(
+        "--statuses",
+        type=lambda value: [int(status) for status in value.split(",")],
+        default=list(ERROR_STATUSES),
+        help="comma-separated statuses of injected errors (default: 429,500,502,503)",
+    )
+    parser.add_argument(
+        "--drip-bytes",
+        type=int,
+        default=0,
+        help="send bodies in chunks of this many bytes",
+    )
+    parser.add_argument(
+        "--drip-delay",
+        type=float,
+        default=0.0,
+        help="seconds to wait before each dripped chunk",
+    )
+    parser.add_argument(
+        "--empty-events",
+        type=int,
+        default=0,
+        help="serve the last N events of each season without results",
+    )
+    parser.add_argument(
+        "--content-bytes",
+        type=int,
+        default=CONTENT_BYTES,
+        help=f"article HTML per event payload (default: {CONTENT_BYTES})",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the injected faults")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    faults = FaultProfile(
+        latency=args.latency,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        burst=args.burst,
+        error_statuses=args.statuses,
+        drip_bytes=args.drip_bytes,
+        drip_delay=args.drip_delay,
+        seed=args.seed,
+    )
+    seasons = load_seasons(
+        args.root, empty_events=args.empty_events, content_bytes=args.content_bytes
+    )
+    server = FakeDHLServer(seasons, faults, args.host, args.port)
+    print(
+        f"Serving {len(seasons)} seasons ({server.num_events} events) "
+        f"at {server.base_url}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stopped after {server.requests} requests ({server.errors} errors)")
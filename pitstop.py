@@ -1,16 +1,54 @@
+import argparse
+import contextlib
+import gzip
+import hashlib
+import html
 import io
 import json
+import logging
+import math
 import os
+import random
 import re
+import sys
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlparse
 
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+if TYPE_CHECKING:
+    # pandas and numpy are imported lazily, only on paths that use them
+    import numpy as np
+    import pandas as pd
+
+# Named explicitly so records look the same when run as a script
+logger = logging.getLogger("pitstop")
 
 # Configuration constants
 #  https://aistudio.google.com/prompts/1p-i2TSn-3uPdbqqMzZ9sFfZfih_iUw4e - for F!_RACES conversion
 DEFAULT_TIMEOUT = 10
+API_BASE_URL = "https://inmotion.dhl/api/f1-award-element-data"  # prefix of F1_URLS
 # URLs by year
 F1_URLS = {
     2018: {
@@ -50,10 +88,121 @@ F1_URLS = {
         "EVENT_SPECIFIC_URL": "https://inmotion.dhl/api/f1-award-element-data/7373",
     },
 }
+# Season of every element ID (the last part of each URL) in F1_URLS
+_ENDPOINT_YEARS = {
+    url.rsplit("/", 1)[1]: year
+    for year, urls in F1_URLS.items()
+    for url in urls.values()
+}
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
 }
-DELAY_BETWEEN_REQUESTS = 0  # seconds
+DELAY_BETWEEN_REQUESTS = 0  # seconds, enforced as a global token-bucket rate
+MAX_CONCURRENT_REQUESTS = 4  # worker threads used for event-specific fetches
+PER_HOST_RATE_LIMIT = (
+    None  # max requests per second to a single host (None = unlimited)
+)
+POOL_SIZE = 10  # keep-alive connections kept open per host
+MAX_RETRIES = 3  # retries for connection errors, timeouts and retryable statuses
+BACKOFF_FACTOR = 0.5  # seconds; delay before retry n is BACKOFF_FACTOR * 2**n
+MAX_BACKOFF = 30  # seconds
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CACHE_DIR = os.path.join(".cache", "http")  # persistent HTTP response cache
+CACHE_TTL = 15 * 60  # seconds before a cached response is revalidated
+CACHE_MAX_BYTES = (
+    64 * 1024 * 1024
+)  # least recently used entries are evicted beyond this
+EVENT_TABLE_PATH = ("htmlList", "table")  # the only part of an event payload used
+EVENT_CHART_PATH = ("data", "chart")  # stops of an event payload, watched by check.py
+EVENTS_LIST_PATH = ("data", "chart", "events")  # the only part of an events list used
+STREAM_DECODE_MIN_BYTES = 64 * 1024  # larger bodies are stream-decoded with ijson
+MEMO_MAX_ENTRIES = 128  # decoded responses kept in memory per MemoCache
+MEMO_TTL = 5 * 60  # seconds a memoized response is served without a fetch
+FINALIZED_AFTER_DAYS = 7  # results of events older than this are never refetched
+MANIFEST_FILENAME = ".manifest.json"  # per-year record of processed events
+CHANGES_FILENAME = ".changes.ndjson"  # per-year row changes of the current run
+ROW_KEY_COLUMNS = ("Driver", "Lap")  # identify a stop across revisions of a table
+BACKFILL_STATE_PATH = os.path.join(".cache", "backfill.json")  # resume point
+COMPACT_SUFFIX = ".min.json"  # suffix of the optional compact copy of a race file
+# Processes parsing tables in a run (--parse-workers). 0 parses on the main
+# thread: a standard table parses in about 0.6 ms, so workers can save little
+# and each costs about 40 MiB plus pickling the payload and the result
+PARSE_WORKERS = 0
+PIPELINE_MAX_PENDING = 32  # most events between fetch and write at once
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"  # text log line layout
+REPLAY_DIR = os.path.join(".cache", "replay")  # recorded raw API responses
+# Header row of the DHL results table, in order
+DHL_TABLE_COLUMNS = ["Pos.", "Team", "Driver", "Time (sec)", "Lap", "Points"]
+MIN_STOP_TIME = 1.5  # seconds; no stationary time below this has been recorded
+MAX_STOP_TIME = 120.0  # seconds; longer stops are repairs, not pit stops
+MAX_RACE_LAPS = 90  # longest race distance on the calendar, with margin
+AWARD_POINTS = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1, 0)  # valid Points values
+
+# Declared schema of a race table: column -> (kind, nullable, minimum, maximum)
+TABLE_SCHEMA = {
+    "Pos.": ("int", False, 1, None),
+    "Team": ("str", False, None, None),
+    "Driver": ("str", False, None, None),
+    "Time (sec)": ("float", False, MIN_STOP_TIME, MAX_STOP_TIME),
+    "Lap": ("int", True, 0, MAX_RACE_LAPS),  # lap 0: stops before the first lap ends
+    "Points": ("float", True, 0, 25),
+}
+
+# Header spellings seen on other layouts, mapped to the DHL_TABLE_COLUMNS name
+COLUMN_ALIASES = {
+    "Pos": "Pos.",
+    "Position": "Pos.",
+    "Time": "Time (sec)",
+    "Time (s)": "Time (sec)",
+    "Pts": "Points",
+    "Pts.": "Points",
+}
+
+# Misspelt driver names -> canonical spelling. Only exact misspellings seen in
+# DHL tables belong here, never abbreviations that could name another driver.
+# Accented spellings such as "Hülkenberg" are canonical; unaccented ones are
+# left as they are.
+DRIVER_ALIASES = {
+    "Lerclerc": "Leclerc",
+    "Manussen": "Magnussen",
+    "Peréz": "Pérez",
+    "Räikkonen": "Räikkönen",
+}
+
+# Long or sponsor forms of team names -> name used in the race files
+TEAM_ALIASES = {
+    "Alfa Romeo Racing": "Alfa Romeo",
+    "Alpha Tauri": "AlphaTauri",
+    "Haas F1 Team": "Haas",
+    "Kick Sauber": "Sauber",
+    "Red Bull Racing": "Red Bull",
+    "Scuderia Toro Rosso": "Toro Rosso",
+    "Visa Cash App RB": "RB",
+}
+
+# Team name of a season -> current constructor. Season names are kept in the
+# race files; this only tells which names are known and how they relate.
+TEAM_LINEAGE = {
+    "Alfa Romeo": "Audi",
+    "AlphaTauri": "Racing Bulls",
+    "Alpine": "Alpine",
+    "Aston Martin": "Aston Martin",
+    "Audi": "Audi",
+    "Cadillac": "Cadillac",
+    "Ferrari": "Ferrari",
+    "Force India": "Aston Martin",
+    "Haas": "Haas",
+    "McLaren": "McLaren",
+    "Mercedes": "Mercedes",
+    "RB": "Racing Bulls",
+    "Racing Bulls": "Racing Bulls",
+    "Racing Point": "Aston Martin",
+    "Red Bull": "Red Bull",
+    "Renault": "Alpine",
+    "Sauber": "Audi",
+    "Toro Rosso": "Racing Bulls",
+    "Williams": "Williams",
+}
 
 # F1 race names by year
 F1_RACES = {
@@ -275,404 +424,3814 @@ F1_RACES = {
 }
 
 
-class F1DataFetcher:
-    """Class for fetching and processing Formula 1 data."""
+class JsonLogFormatter(logging.Formatter):
+    """Format log records as one JSON object per line, including ``extra`` fields."""
 
-    def __init__(
-        self, year: int = 2025, timeout: int = DEFAULT_TIMEOUT, headers: Dict = None
-    ):
+    # Attributes every LogRecord has; anything else was passed through ``extra``
+    _STANDARD = frozenset(
+        vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+        | {"message", "asctime"}
+    )
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self._STANDARD:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    json_lines: bool = False,
+    use_queue: bool = False,
+    log_file: Optional[str] = None,
+    stream: Any = None,
+) -> Optional["logging.handlers.QueueListener"]:
+    """
+    Send log records to the console (and optionally a file), replacing any handlers.
+
+    Messages are formatted lazily, so records below ``level`` cost a level
+    check and nothing else. With use_queue, worker threads only put records
+    on a queue and a listener thread does the formatting and writing.
+
+    Args:
+        level: Lowest level shown (logging.WARNING for quiet runs)
+        json_lines: Write JSON objects (see JsonLogFormatter) instead of text
+        use_queue: Hand records to a background thread instead of writing inline
+        log_file: Also append the records to this file
+        stream: Console stream (defaults to sys.stdout)
+
+    Returns:
+        The started QueueListener when use_queue is set (stop() it to flush),
+        otherwise None
+    """
+    formatter = JsonLogFormatter() if json_lines else logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler(stream or sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+    if not use_queue:
+        for handler in handlers:
+            root.addHandler(handler)
+        return None
+
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    return listener
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how often requests may start."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
         """
-        Initialize the F1DataFetcher.
+        Initialize the RateLimiter.
 
         Args:
-            year: Year for which to fetch F1 data
-            timeout: Request timeout in seconds
-            headers: HTTP headers for requests
+            rate: Tokens added per second
+            capacity: Maximum number of tokens that can accumulate (burst size)
         """
-        self.year = year
-        self.timeout = timeout
-        self.headers = headers or DEFAULT_HEADERS
-        self.event_data_cache = {}
-        self.event_specific_data_cache = {}
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
 
-        # Set URLs based on year
-        self.set_year(year)
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last_refill) * self.rate
+                )
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
 
-    def set_year(self, year: int) -> None:
+
+_global_rate_limiter: Optional[RateLimiter] = None
+_global_rate_limiter_lock = threading.Lock()
+
+
+def get_global_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Return the process-wide limiter derived from DELAY_BETWEEN_REQUESTS.
+
+    Returns:
+        Shared RateLimiter, or None if no delay is configured
+    """
+    global _global_rate_limiter
+    if DELAY_BETWEEN_REQUESTS <= 0:
+        return None
+    with _global_rate_limiter_lock:
+        rate = 1.0 / DELAY_BETWEEN_REQUESTS
+        if _global_rate_limiter is None or _global_rate_limiter.rate != rate:
+            _global_rate_limiter = RateLimiter(rate)
+        return _global_rate_limiter
+
+
+class StageProfiler:
+    """
+    Wall time, CPU time and bytes per pipeline stage and event.
+
+    Stages are attributed to the event that the current thread entered with
+    event(). When the profiler is disabled, event() and stage() return a
+    shared no-op context manager, so instrumented code costs one method call.
+    """
+
+    # Report order of the stages, from the network to the race file
+    STAGES = (
+        "connect",
+        "wait",
+        "transfer",
+        "decode",
+        "parse",
+        "validate",
+        "resolve",
+        "serialise",
+        "write",
+    )
+
+    def __init__(self, enabled: bool = True, trace_path: Optional[str] = None):
         """
-        Set the year and update URLs accordingly.
+        Initialize the StageProfiler.
 
         Args:
-            year: Year for which to fetch F1 data
+            enabled: Collect timings (a disabled profiler records nothing)
+            trace_path: Also append one JSON line per recorded stage to this file
         """
-        self.year = year
-        if year in F1_URLS:
-            self.event_data_url = F1_URLS[year]["EVENT_DATA_URL"]
-            self.event_specific_url = F1_URLS[year]["EVENT_SPECIFIC_URL"]
-        else:
-            # Default to latest year if requested year is not available
-            latest_year = max(F1_URLS.keys())
-            print(
-                f"Warning: Data for year {year} not available. Using {latest_year} instead."
-            )
-            self.year = latest_year
-            self.event_data_url = F1_URLS[latest_year]["EVENT_DATA_URL"]
-            self.event_specific_url = F1_URLS[latest_year]["EVENT_SPECIFIC_URL"]
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self._trace = open(trace_path, "a", encoding="utf-8") if trace_path else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # event key -> stage -> [wall seconds, CPU seconds, bytes, calls]
+        self.totals: Dict[Any, Dict[str, List[float]]] = {}
+        self.titles: Dict[Any, str] = {}
 
-    def fetch_events_data(self, url: str = None) -> Dict:
+    def event(self, key: Any, title: Optional[str] = None):
         """
-        Fetch events data from the specified URL.
+        Attribute the stages timed on this thread to an event until the block exits.
 
         Args:
-            url: URL to fetch data from (defaults to year-specific URL)
+            key: Event ID (or another label, such as "events list")
+            title: Event title shown in the report
+        """
+        if not self.enabled:
+            return _NO_OP
+        return self._event(key, title)
 
-        Returns:
-            Dictionary containing events data
+    @contextlib.contextmanager
+    def _event(self, key: Any, title: Optional[str]):
+        previous = getattr(self._local, "event", None)
+        self._local.event = key
+        if title:
+            self.titles[key] = title
+        try:
+            yield
+        finally:
+            self._local.event = previous
 
-        Raises:
-            requests.exceptions.RequestException: If request fails
-            json.JSONDecodeError: If response is not valid JSON
+    def stage(self, name: str, nbytes: int = 0):
         """
-        if url is None:
-            url = self.event_data_url
+        Time a block as one run of a stage.
 
-        print(f"Attempting to fetch data from: {url}")
+        Args:
+            name: Stage name, normally one of STAGES
+            nbytes: Bytes handled by the block
+        """
+        if not self.enabled:
+            return _NO_OP
+        return self._stage(name, nbytes)
 
+    @contextlib.contextmanager
+    def _stage(self, name: str, nbytes: int):
+        wall, cpu = time.perf_counter(), time.thread_time()
         try:
-            response = self._make_request(url)
-            parsed_data = response.json()
+            yield
+        finally:
+            self.record(
+                name, time.perf_counter() - wall, time.thread_time() - cpu, nbytes
+            )
 
-            # Extract events list from the nested structure
-            data_section = parsed_data.get("data", {})
-            chart_section = data_section.get("chart", {})
-            events_data = chart_section.get("events", [])
+    def record(self, name: str, wall: float, cpu: float = 0.0, nbytes: int = 0) -> None:
+        """
+        Add a measurement taken elsewhere (such as request timings) to a stage.
 
-            if events_data:
-                print("\nSuccessfully extracted events data")
-                return events_data
-            else:
-                print("\nError: Could not find the 'events' data at the expected path")
-                return []
+        Args:
+            name: Stage name
+            wall: Wall-clock seconds
+            cpu: CPU seconds of the current thread
+            nbytes: Bytes handled
+        """
+        if not self.enabled:
+            return
+        key = getattr(self._local, "event", None)
+        with self._lock:
+            totals = self.totals.setdefault(key, {}).setdefault(name, [0.0, 0.0, 0, 0])
+            totals[0] += wall
+            totals[1] += cpu
+            totals[2] += nbytes
+            totals[3] += 1
+            if self._trace is not None:
+                self._trace.write(
+                    json.dumps(
+                        {
+                            "time": time.time(),
+                            "event": key,
+                            "stage": name,
+                            "wall": round(wall, 6),
+                            "cpu": round(cpu, 6),
+                            "bytes": nbytes,
+                            "thread": threading.current_thread().name,
+                        }
+                    )
+                    + "\n"
+                )
 
-        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-            print(f"\nError fetching events data: {e}")
-            return []
+    def stage_totals(self) -> Dict[str, List[float]]:
+        """Return [wall, CPU, bytes, calls] per stage summed over all events, in STAGES order."""
+        combined: Dict[str, List[float]] = {}
+        with self._lock:
+            for stages in self.totals.values():
+                for name, values in stages.items():
+                    totals = combined.setdefault(name, [0.0, 0.0, 0, 0])
+                    for i, value in enumerate(values):
+                        totals[i] += value
+        order = {name: i for i, name in enumerate(self.STAGES)}
+        return dict(
+            sorted(combined.items(), key=lambda item: order.get(item[0], len(order)))
+        )
 
-    def fetch_event_specific_data(
-        self, events_data: List[Dict], base_url: str = None
-    ) -> Dict[str, Any]:
+    def report(self, slowest: int = 5) -> str:
         """
-        Fetch specific data for each event.
+        Format the stage breakdown and the slowest events.
 
         Args:
-            events_data: List of event dictionaries
-            base_url: Base URL for event-specific data (defaults to year-specific URL)
+            slowest: Number of events to list
 
         Returns:
-            Dictionary mapping event IDs to their specific data
+            Report text
         """
-        if base_url is None:
-            base_url = self.event_specific_url
+        stages = self.stage_totals()
+        total_wall = sum(values[0] for values in stages.values()) or 1.0
+        lines = [
+            "--- Stage Timings ---",
+            f"{'stage':<10} {'wall (s)':>9} {'cpu (s)':>8} {'share':>6} {'calls':>6} {'KiB':>8}",
+        ]
+        for name, (wall, cpu, nbytes, calls) in stages.items():
+            lines.append(
+                f"{name:<10} {wall:>9.3f} {cpu:>8.3f} {wall / total_wall:>6.1%} "
+                f"{calls:>6} {nbytes / 1024:>8.1f}"
+            )
 
-        all_event_specific_data = {}
+        with self._lock:
+            events = [
+                (sum(values[0] for values in stages.values()), key, dict(stages))
+                for key, stages in self.totals.items()
+                if key is not None
+            ]
+        events.sort(key=lambda event: event[0], reverse=True)
+        if events:
+            lines.append(f"Slowest {min(slowest, len(events))} events:")
+        for wall, key, stages in events[:slowest]:
+            top = sorted(stages.items(), key=lambda item: item[1][0], reverse=True)[:3]
+            breakdown = ", ".join(f"{name} {values[0]:.3f}s" for name, values in top)
+            lines.append(f"  {wall:.3f}s  {self.titles.get(key, key)} ({breakdown})")
+        return "\n".join(lines)
 
-        print(f"Found {len(events_data)} events to process.")
+    def close(self) -> None:
+        """Close the trace file, if any."""
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
 
-        for event in events_data:
-            event_id = event.get("id")
-            event_title = event.get("title", "Unknown Title")
 
-            if not event_id:
-                print(f"Warning: Skipping event with missing ID: {event_title}")
-                continue
+_NO_OP = contextlib.nullcontext()
+_profiler = StageProfiler(enabled=False)
 
-            # Check cache first
-            if event_id in self.event_specific_data_cache:
-                all_event_specific_data[event_id] = self.event_specific_data_cache[
-                    event_id
-                ]
-                print(f"Using cached data for Event ID: {event_id} ({event_title})")
-                continue
 
-            specific_url = f"{base_url}?event={event_id}"
-            print(
-                f"\nAttempting to fetch data for Event ID: {event_id} ({event_title})"
-            )
-            print(f"URL: {specific_url}")
+def get_profiler() -> StageProfiler:
+    """Return the process-wide StageProfiler (disabled unless set_profiler() was called)."""
+    return _profiler
 
-            try:
-                response = self._make_request(specific_url)
-                event_specific_data = response.json()
-
-                # Cache the result
-                self.event_specific_data_cache[event_id] = event_specific_data
-                all_event_specific_data[event_id] = event_specific_data
-
-                print(f"Successfully fetched and parsed data for Event ID: {event_id}")
-
-            except requests.exceptions.RequestException as e:
-                error_info = {"error": str(e)}
-                all_event_specific_data[event_id] = error_info
-                print(f"Error during request for Event ID: {event_id}: {e}")
-
-            except json.JSONDecodeError:
-                error_info = {
-                    "error": "JSONDecodeError",
-                    "response_text": (
-                        response.text[:500]
-                        if hasattr(response, "text")
-                        else "No response text"
-                    ),
-                }
-                all_event_specific_data[event_id] = error_info
-                print(f"Error: Failed to decode JSON for Event ID: {event_id}")
 
-            # Add delay between requests
-            if DELAY_BETWEEN_REQUESTS > 0:
-                time.sleep(DELAY_BETWEEN_REQUESTS)
+def set_profiler(profiler: Optional[StageProfiler]) -> None:
+    """
+    Replace the process-wide StageProfiler.
 
-        # Print summary
-        self._print_fetch_summary(events_data, all_event_specific_data)
-        return all_event_specific_data
+    Args:
+        profiler: New profiler, or None to disable profiling
+    """
+    global _profiler
+    _profiler = profiler or StageProfiler(enabled=False)
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for transient HTTP failures."""
 
-    def _make_request(self, url: str) -> requests.Response:
+    def __init__(
+        self,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        max_backoff: float = MAX_BACKOFF,
+        jitter: bool = True,
+        retry_statuses: Tuple[int, ...] = RETRY_STATUSES,
+    ):
         """
-        Make an HTTP request with error handling.
+        Initialize the RetryPolicy.
 
         Args:
-            url: URL to request
-
-        Returns:
-            Response object
+            max_retries: Number of retries after the first attempt
+            backoff_factor: Base delay in seconds, doubled on every retry
+            max_backoff: Upper bound for the computed backoff delay
+            jitter: Randomise each delay between half and the full backoff
+            retry_statuses: HTTP status codes that are worth retrying
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
 
-        Raises:
-            requests.exceptions.RequestException: If request fails
+    def get_delay(
+        self, attempt: int, response: Optional[requests.Response] = None
+    ) -> float:
         """
-        try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.Timeout:
-            print(f"Error: The request to {url} timed out.")
-            raise
-        except requests.exceptions.RequestException:
-            print(f"Error during request to {url}")
-            raise
+        Compute how long to wait before the given retry.
 
-    def _print_fetch_summary(
-        self, events_data: List[Dict], all_event_specific_data: Dict[str, Any]
-    ) -> None:
-        """Print a summary of the fetch operation."""
-        print("\n--- Processing Complete ---")
-        successful_fetches = sum(
-            1
-            for data in all_event_specific_data.values()
-            if isinstance(data, dict) and "error" not in data
-        )
-        failed_fetches = len(events_data) - successful_fetches
-        print(f"Successfully fetched data for {successful_fetches} events.")
-        print(f"Failed to fetch data for {failed_fetches} events.")
+        A ``Retry-After`` header on the response (in seconds or as an HTTP
+        date) takes precedence over the computed backoff.
 
+        Args:
+            attempt: Zero-based index of the retry about to be made
+            response: Response that triggered the retry, if any
 
-class DataProcessor:
-    """Class for processing F1 data."""
+        Returns:
+            Delay in seconds
+        """
+        if response is not None:
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after
+
+        delay = min(self.max_backoff, self.backoff_factor * (2**attempt))
+        if self.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        return delay
 
     @staticmethod
-    def html_table_to_dataframe(event_json_data: Dict) -> Optional[pd.DataFrame]:
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Convert a Retry-After header value to seconds, if it is valid."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def call(
+        self,
+        send: Callable[[], requests.Response],
+        on_retry: Optional[Callable[[int, float, Any], None]] = None,
+    ) -> requests.Response:
         """
-        Extract HTML table from event JSON data and convert to DataFrame.
+        Call ``send`` until it succeeds, is not retryable or retries run out.
+
+        Connection errors and timeouts are retried and re-raised once retries
+        are exhausted. Responses with a retryable status are retried and the
+        last one is returned, so the caller decides how to handle it.
 
         Args:
-            event_json_data: JSON data dictionary for a specific event
+            send: Function performing a single request attempt
+            on_retry: Called as ``on_retry(retry_number, delay, cause)`` before sleeping
 
         Returns:
-            DataFrame created from HTML table, or None if extraction fails
+            Response of the final attempt
         """
-        if not isinstance(event_json_data, dict):
-            print("Error: Input must be a dictionary.")
-            return None
+        attempt = 0
+        while True:
+            try:
+                response = send()
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                if attempt >= self.max_retries:
+                    raise
+                cause = e
+                delay = self.get_delay(attempt)
+            else:
+                if (
+                    response.status_code not in self.retry_statuses
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                cause = response
+                delay = self.get_delay(attempt, response)
+                # Drain the body so the connection goes back to the pool
+                response.content
 
-        # Extract HTML table string
-        html_table_str = event_json_data.get("htmlList", {}).get("table")
+            attempt += 1
+            if on_retry is not None:
+                on_retry(attempt, delay, cause)
+            time.sleep(delay)
 
-        if not html_table_str:
-            print(
-                "Error: Could not find 'htmlList' -> 'table' in the provided JSON data or it's empty."
-            )
-            return None
 
-        if not isinstance(html_table_str, str):
-            print("Error: The value at ['htmlList']['table'] is not a string.")
-            return None
+# Connection setup time of the request currently running on each thread
+_connect_timer = threading.local()
 
-        print("Found HTML table string. Attempting to parse...")
-        try:
-            # Parse HTML table into DataFrame
-            list_of_dfs = pd.read_html(io.StringIO(html_table_str))
 
-            if list_of_dfs:
-                print("Successfully parsed HTML table into DataFrame.")
-                return list_of_dfs[0]
-            else:
-                print(
-                    "Warning: No tables found by pd.read_html, although HTML string was present."
-                )
-                return None
+def _timed_connect(connect: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    try:
+        connect()
+    finally:
+        _connect_timer.seconds = getattr(_connect_timer, "seconds", 0.0) + (
+            time.perf_counter() - start
+        )
+        _connect_timer.count = getattr(_connect_timer, "count", 0) + 1
 
-        except ValueError as ve:
-            print(f"Error parsing HTML with pandas (ValueError): {ve}")
-            print("Check if the HTML string actually contains a <table> tag.")
-            return None
-        except ImportError:
-            print(
-                "Error: The 'lxml' library might be required by pd.read_html. Please install it (`pip install lxml`)."
-            )
-            return None
-        except Exception as e:
-            print(f"An unexpected error occurred during HTML parsing: {e}")
-            return None
 
-    @staticmethod
-    def save_dataframe_to_json(
-        df: pd.DataFrame, event_title: str, year: int, output_dir: str = None
-    ) -> str:
-        """
-        Save DataFrame to a JSON file with a standardized filename.
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        _timed_connect(super().connect)
 
-        Args:
-            df: DataFrame to save
-            event_title: Title of the event (e.g., "FORMULA 1 LOUIS VUITTON AUSTRALIAN GRAND PRIX 2025")
-            year: Year of the event
-            output_dir: Directory to save the JSON file (defaults to year folder)
 
-        Returns:
-            Path to the saved JSON file
-        """
-        if df is None:
-            print(f"Error: Cannot save None DataFrame for {event_title}")
-            return ""
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _timed_connect(super().connect)
 
-        # If no output directory is specified, use the year as the directory name
-        if output_dir is None:
-            output_dir = str(year)
 
-        # Find the proper race name from the event title
-        race_name = None
-
-        # First, try to match with our predefined race names for the specific year
-        if year in F1_RACES:
-            year_races = F1_RACES[year]
-            for key, proper_name in year_races.items():
-                if key in event_title.upper():
-                    race_name = proper_name
-                    break
-        else:
-            # If year not in F1_RACES, use the latest year's race names
-            latest_year = max(F1_RACES.keys())
-            year_races = F1_RACES[latest_year]
-            for key, proper_name in year_races.items():
-                if key in event_title.upper():
-                    race_name = proper_name
-                    break
-
-        # If no match found, try to extract from the title
-        if race_name is None:
-            # Try to extract Grand Prix name using regex
-            match = re.search(
-                r"([A-Z]+(?:\s+[A-Z]+)*)\s+GRAND\s+PRIX", event_title, re.IGNORECASE
-            )
-            if match:
-                location = match.group(1).strip()
-                race_name = f"{location} Grand Prix"
-            else:
-                # Fallback to a generic name with the event ID
-                race_name = "Unknown Grand Prix"
-                print(f"Warning: Could not determine race name for: {event_title}")
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
 
-        # Clean up the filename
-        filename = race_name
 
-        # Create the output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
 
-        # Save the DataFrame to a JSON file
-        file_path = os.path.join(output_dir, f"{filename}.json")
-        df.to_json(file_path, orient="records", indent=4)
 
-        print(f"Saved data to {file_path}")
-        return file_path
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections record how long TCP/TLS setup takes."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
 
 
-def main(year: int = 2025):
+def create_session(
+    pool_size: int = POOL_SIZE, keep_alive: bool = True, headers: Dict = None
+) -> requests.Session:
     """
-    Main function to fetch and process F1 data for a specific year.
+    Create a pooled requests session for the DHL API.
 
     Args:
-        year: Year to fetch data for (default: 2025)
+        pool_size: Maximum number of connections kept per host
+        keep_alive: Reuse connections between requests
+        headers: Default headers sent with every request
+
+    Returns:
+        Configured session
     """
-    print(f"Fetching F1 data for year: {year}")
+    session = requests.Session()
+    # Retries are handled by RetryPolicy so that they can honour Retry-After
+    adapter = TimedHTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # gzip and deflate always; br and zstd when urllib3 can decode them
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    if headers:
+        session.headers.update(headers)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
 
-    # Initialize the data fetcher with the specified year
-    fetcher = F1DataFetcher(year=year)
 
-    # Fetch events data
-    events_data = fetcher.fetch_events_data()
-    if not events_data:
-        print("No events data found. Exiting.")
-        return
+class ResponseCache:
+    """
+    Persistent on-disk cache of HTTP response bodies and their validators.
 
-    # Fetch specific data for each event
-    all_event_specific_data = fetcher.fetch_event_specific_data(events_data)
+    Each URL has one file: a JSON header line (URL, validators, content
+    type, fetch time) followed by the body bytes exactly as received after
+    content decoding, so nothing is re-encoded or guessed on the way back.
+    """
 
-    # Create a DataProcessor instance
-    processor = DataProcessor()
+    def __init__(
+        self,
+        cache_dir: str = CACHE_DIR,
+        ttl: float = CACHE_TTL,
+        max_bytes: int = CACHE_MAX_BYTES,
+    ):
+        """
+        Initialize the ResponseCache.
 
-    # Process each event and save to JSON
-    saved_files = []
-    output_dir = str(year)  # Use year as directory name
+        Args:
+            cache_dir: Directory holding one file per cached URL
+            ttl: Seconds a stored response is used without revalidation
+            max_bytes: Total size above which least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file()
+        )
 
-    for event in events_data:
-        event_id = event.get("id")
-        event_title = event.get("title", "Unknown Title")
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.resp")
 
-        if not event_id or event_id not in all_event_specific_data:
-            print(f"Skipping event {event_title}: No data available")
-            continue
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the stored response for a URL and mark it as recently used.
 
-        event_data = all_event_specific_data[event_id]
+        Args:
+            url: Request URL
 
-        # Check if there was an error fetching this event's data
-        if isinstance(event_data, dict) and "error" in event_data:
-            print(
-                f"Skipping event {event_title}: Error in data - {event_data.get('error')}"
-            )
-            continue
+        Returns:
+            Entry with ``body`` (bytes), ``content_type``, ``etag``,
+            ``last_modified`` and ``fetched_at``, or None if the URL is not cached
+        """
+        path = self._path(url)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(f.readline())
+                entry["body"] = f.read()
+            # The file's mtime records last use for LRU eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
 
-        # Convert HTML table to DataFrame
-        print(f"\nProcessing event: {event_title}")
-        event_dataframe = processor.html_table_to_dataframe(event_data)
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Return whether an entry is young enough to skip revalidation."""
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
 
-        if event_dataframe is not None:
-            # Save DataFrame to JSON
-            file_path = processor.save_dataframe_to_json(
-                event_dataframe, event_title, year, output_dir
-            )
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Build revalidation headers for a cached entry.
 
-            if file_path:
-                saved_files.append(file_path)
-        else:
-            print(f"Failed to create DataFrame for {event_title}")
+        Args:
+            entry: Cached entry, or None
 
-    # Print summary
-    print(f"\n--- JSON Export Complete ---")
-    print(
-        f"Successfully saved {len(saved_files)} event data files to the '{output_dir}' directory."
-    )
-    if saved_files:
-        print("Files saved:")
-        for file_path in saved_files:
-            print(f"  - {file_path}")
+        Returns:
+            ``If-None-Match``/``If-Modified-Since`` headers for the entry's validators
+        """
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
 
+    def put(self, url: str, response: requests.Response) -> None:
+        """
+        Store a response's body bytes together with its validators.
 
-if __name__ == "__main__":
-    main(2026)
+        Args:
+            url: Request URL
+            response: Successful response to store
+        """
+        self._write(
+            url,
+            {
+                "url": url,
+                "body": response.content,
+                "content_type": response.headers.get("Content-Type"),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            },
+        )
+
+    def refresh(self, url: str, entry: Dict[str, Any]) -> None:
+        """
+        Restart the TTL of an entry that the server confirmed unchanged (304).
+
+        Args:
+            url: Request URL
+            entry: Entry previously returned by get()
+        """
+        self._write(url, dict(entry, fetched_at=time.time()))
+
+    def _write(self, url: str, entry: Dict[str, Any]) -> None:
+        path = self._path(url)
+        header = {key: value for key, value in entry.items() if key != "body"}
+        data = json.dumps(header).encode("utf-8") + b"\n" + entry["body"]
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+
+    def _evict(self, keep: str) -> None:
+        """Delete least recently used entries until the cache fits max_bytes."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            if entry.path == keep:
+                continue
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._total_bytes -= size
+
+
+class MemoCache:
+    """
+    Thread-safe in-memory LRU of decoded responses, bounded by size and age.
+
+    Entries are keyed by (endpoint, year, event ID), the event ID being
+    None for an events list. One MemoCache can be shared by several
+    F1DataFetcher instances; values are shared too and must be treated as
+    read-only.
+    """
+
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES, ttl: float = MEMO_TTL):
+        """
+        Initialize the MemoCache.
+
+        Args:
+            max_entries: Number of entries above which the least recently
+                used one is evicted (0 disables memoization)
+            ttl: Seconds after which an entry expires
+        """
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key: (endpoint, year, event ID)
+
+        Returns:
+            The memoized value, or None if absent or expired
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[1] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Tuple, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries beyond max_entries.
+
+        Args:
+            key: (endpoint, year, event ID)
+            value: Decoded response
+            ttl: Seconds until the entry expires (defaults to the cache's
+                ttl; math.inf never expires)
+        """
+        if not self.max_entries:
+            return
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry; the statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the entry count and the hit, miss, eviction and expiration counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class ReplayMissError(requests.exceptions.RequestException):
+    """Raised when a replayed run requests a URL that was not recorded."""
+
+
+class ReplayStore:
+    """
+    Content-addressed store of raw API responses, for runs without network.
+
+    Response bodies are kept gzip-compressed as ``objects/<sha256>.gz`` and
+    shared by all recordings; a recording (``<name>.json``) maps every URL
+    requested during a run to the digest of the body received. In "record"
+    mode F1DataFetcher stores each body it decodes, in "replay" mode it
+    serves them from here instead of the network or the ResponseCache.
+    """
+
+    def __init__(self, name: str, mode: str = "replay", root: str = REPLAY_DIR):
+        """
+        Initialize the ReplayStore. Recording into an existing name extends it.
+
+        Args:
+            name: Name of the recording
+            mode: "record" or "replay"
+            root: Directory holding the recordings and the objects
+
+        Raises:
+            ValueError: If the mode is unknown, or the recording to replay
+                does not exist
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown replay store mode: {mode!r}")
+        self.name = name
+        self.mode = mode
+        self.path = os.path.join(root, f"{name}.json")
+        self.objects_dir = os.path.join(root, "objects")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.responses: Dict[str, str] = json.load(f)["responses"]
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            if mode == "replay":
+                raise ValueError(f"No recording named {name!r} in {root}")
+            self.responses = {}
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, f"{digest}.gz")
+
+    def record(self, url: str, body: bytes) -> str:
+        """
+        Store a response body, once per distinct content.
+
+        Args:
+            url: Request URL
+            body: Raw response body
+
+        Returns:
+            Digest of the body
+        """
+        digest = hash_bytes(body)
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(self.objects_dir, exist_ok=True)
+            # mtime=0 keeps the compressed bytes a function of the body alone
+            write_file_atomic(object_path, gzip.compress(body, mtime=0))
+        with self._lock:
+            self.responses[url] = digest
+        return digest
+
+    def load(self, url: str) -> bytes:
+        """
+        Return the recorded body for a URL.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            Raw response body
+
+        Raises:
+            ReplayMissError: If the URL is not part of the recording
+        """
+        digest = self.responses.get(url)
+        if digest is None:
+            raise ReplayMissError(f"No recorded response for {url}")
+        try:
+            with gzip.open(self._object_path(digest), "rb") as f:
+                return f.read()
+        except OSError as e:
+            raise ReplayMissError(f"Recorded response for {url} is unreadable: {e}")
+
+    def save(self) -> None:
+        """Write the recording's URL index (objects are written as they arrive)."""
+        with self._lock:
+            data = json.dumps(
+                {"responses": dict(sorted(self.responses.items()))}, indent=2
+            )
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        write_file_atomic(self.path, data.encode("utf-8"))
+
+
+def parse_event_date(event: Dict) -> Optional[datetime]:
+    """
+    Read the date of an event from the events list.
+
+    Args:
+        event: Event dictionary from the events list (with ``date.date`` in UTC)
+
+    Returns:
+        Timezone-aware UTC datetime, or None if missing or malformed
+    """
+    date_str = (event.get("date") or {}).get("date")
+    if not date_str:
+        return None
+    try:
+        event_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S.%f")
+    except ValueError:
+        return None
+    return event_date.replace(tzinfo=timezone.utc)
+
+
+def is_event_finalized(event: Dict, now: Optional[datetime] = None) -> bool:
+    """
+    Check whether an event is old enough for its results to be final.
+
+    Args:
+        event: Event dictionary from the events list (with ``date.date`` in UTC)
+        now: Reference time (defaults to the current UTC time)
+
+    Returns:
+        True if the event took place more than FINALIZED_AFTER_DAYS ago
+    """
+    event_date = parse_event_date(event)
+    if event_date is None:
+        return False
+    now = now or datetime.now(timezone.utc)
+    return now - event_date > timedelta(days=FINALIZED_AFTER_DAYS)
+
+
+_ijson = None  # ijson with its C backend, False if that is not installed
+
+
+def _import_ijson():
+    """Return the ijson module if its C backend is installed, else None."""
+    global _ijson
+    if _ijson is None:
+        try:
+            import ijson
+
+            # The pure-Python backends are slower than json.loads
+            _ijson = ijson.get_backend("yajl2_c")
+        except ImportError:
+            _ijson = False
+    return _ijson or None
+
+
+def extract_json(body: bytes, *paths: Tuple[str, ...]) -> Dict:
+    """
+    Decode only the values at some key paths of a JSON document.
+
+    Bodies of STREAM_DECODE_MIN_BYTES or more are parsed as a stream with
+    ijson's C backend (see requirements.txt): only the value at each path
+    is built and parsing of a path stops once it is found, so a 2 MiB body
+    peaks at about 70 KiB instead of 14 MiB. Smaller bodies, and all bodies
+    where the C backend is unavailable, are decoded faster by json, and
+    everything outside the paths is dropped at once. The result keeps the nesting of
+    the paths, so callers read it like the full document.
+
+    Args:
+        body: JSON document
+        paths: Keys leading to each value, such as EVENT_TABLE_PATH
+
+    Returns:
+        ``{path[0]: {path[1]: ... value}}`` for every path with a value
+        ({} if none has one)
+
+    Raises:
+        json.JSONDecodeError: If body is not valid JSON
+    """
+    ijson = _import_ijson() if len(body) >= STREAM_DECODE_MIN_BYTES else None
+    document = None
+    if ijson is None:
+        document = json.loads(body)
+    result: Dict = {}
+    for path in paths:
+        if ijson is not None:
+            from ijson.common import JSONError
+
+            try:
+                items = ijson.items(io.BytesIO(body), ".".join(path), use_float=True)
+                value = next(items, None)
+            except JSONError as e:
+                text = body.decode("utf-8", errors="replace")
+                raise json.JSONDecodeError(str(e), text, 0) from e
+        else:
+            value = document
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+        if value is None:
+            continue
+        parent = result
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[path[-1]] = value
+    return result
+
+
+def _decode_json(body: bytes, path: Optional[Tuple[str, ...]] = None) -> Any:
+    """Decode a whole JSON body, or only the value at path (see extract_json())."""
+    return json.loads(body) if path is None else extract_json(body, path)
+
+
+def has_table_rows(event_json_data: Any) -> bool:
+    """Return whether an event payload carries a results table with data rows."""
+    if not isinstance(event_json_data, dict):
+        return False
+    table = (event_json_data.get("htmlList") or {}).get("table")
+    return isinstance(table, str) and "<td" in table
+
+
+def season_urls(year: int, base_url: Optional[str] = None) -> Dict[str, str]:
+    """
+    Return a season's endpoint URLs, optionally on another server.
+
+    Args:
+        year: Season (a key of F1_URLS)
+        base_url: Replaces API_BASE_URL in the URLs, e.g. the address of a
+            local fake_api.py server; the element IDs are kept
+
+    Returns:
+        Dict with EVENT_DATA_URL and EVENT_SPECIFIC_URL, like F1_URLS[year]
+    """
+    urls = F1_URLS[year]
+    if not base_url:
+        return dict(urls)
+    return {
+        name: base_url.rstrip("/") + url[len(API_BASE_URL) :]
+        for name, url in urls.items()
+    }
+
+
+class F1DataFetcher:
+    """Class for fetching and processing Formula 1 data."""
+
+    def __init__(
+        self,
+        year: int = 2025,
+        timeout: int = DEFAULT_TIMEOUT,
+        headers: Dict = None,
+        max_workers: int = MAX_CONCURRENT_REQUESTS,
+        per_host_rate: Optional[float] = PER_HOST_RATE_LIMIT,
+        pool_size: int = POOL_SIZE,
+        keep_alive: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        response_cache: Optional[ResponseCache] = None,
+        replay_store: Optional[ReplayStore] = None,
+        memo_cache: Optional[MemoCache] = None,
+        base_url: Optional[str] = None,
+    ):
+        """
+        Initialize the F1DataFetcher.
+
+        Args:
+            year: Year for which to fetch F1 data
+            timeout: Request timeout in seconds
+            headers: HTTP headers for requests
+            max_workers: Maximum number of concurrent event-specific requests
+            per_host_rate: Maximum requests per second to any single host
+            pool_size: Maximum number of pooled connections per host
+            keep_alive: Reuse connections between requests
+            retry_policy: Retry policy for transient failures (defaults to RetryPolicy())
+            response_cache: Persistent cache used for conditional requests (disabled if None)
+            replay_store: Store that every decoded response is recorded to, or
+                that responses are served from when it is replaying
+            memo_cache: In-memory cache of decoded responses, possibly shared
+                with other fetchers (defaults to a new MemoCache())
+            base_url: Server the season URLs point to instead of API_BASE_URL
+                (see season_urls())
+        """
+        self.year = year
+        self.base_url = base_url
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self.max_workers = max(1, max_workers)
+        self.per_host_rate = per_host_rate
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.session = create_session(pool_size, keep_alive, self.headers)
+        self.response_cache = response_cache
+        self.replay_store = replay_store
+        self.memo_cache = memo_cache if memo_cache is not None else MemoCache()
+        self.request_timings: List[Dict[str, Any]] = []
+        self._host_rate_limiters: Dict[str, RateLimiter] = {}
+        self._host_rate_limiters_lock = threading.Lock()
+
+        # Set URLs based on year
+        self.set_year(year)
+
+    def set_year(self, year: int) -> None:
+        """
+        Set the year and update URLs accordingly.
+
+        Args:
+            year: Year for which to fetch F1 data
+        """
+        self.year = year
+        if year in F1_URLS:
+            urls = season_urls(year, self.base_url)
+            self.event_data_url = urls["EVENT_DATA_URL"]
+            self.event_specific_url = urls["EVENT_SPECIFIC_URL"]
+        else:
+            # Default to latest year if requested year is not available
+            latest_year = max(F1_URLS.keys())
+            logger.warning(
+                "Data for year %s not available. Using %s instead.", year, latest_year
+            )
+            self.year = latest_year
+            urls = season_urls(latest_year, self.base_url)
+            self.event_data_url = urls["EVENT_DATA_URL"]
+            self.event_specific_url = urls["EVENT_SPECIFIC_URL"]
+
+    def fetch_events_data(self, url: str = None) -> Dict:
+        """
+        Fetch events data from the specified URL.
+
+        Args:
+            url: URL to fetch data from (defaults to year-specific URL)
+
+        Returns:
+            Dictionary containing events data
+
+        Raises:
+            requests.exceptions.RequestException: If request fails
+            json.JSONDecodeError: If response is not valid JSON
+        """
+        if url is None:
+            url = self.event_data_url
+
+        logger.debug("Fetching events list from %s", url)
+
+        try:
+            with get_profiler().event("events", "events list"):
+                parsed_data, _ = self._get_json(
+                    url, memo_key=self.memo_key(url), path=EVENTS_LIST_PATH
+                )
+
+            # Extract events list from the nested structure
+            data_section = parsed_data.get("data", {})
+            chart_section = data_section.get("chart", {})
+            events_data = chart_section.get("events", [])
+
+            if events_data:
+                logger.debug("Extracted %d events", len(events_data))
+                return events_data
+            else:
+                logger.error(
+                    "Could not find the 'events' data at the expected path in %s", url
+                )
+                return []
+
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            logger.error("Could not fetch the events list from %s: %s", url, e)
+            return []
+
+    def fetch_event_specific_data(
+        self,
+        events_data: List[Dict],
+        base_url: str = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fetch specific data for each event.
+
+        Requests are issued concurrently from a bounded thread pool. The
+        returned mapping keeps the order of ``events_data`` regardless of the
+        order in which responses arrive.
+
+        Args:
+            events_data: List of event dictionaries
+            base_url: Base URL for event-specific data (defaults to year-specific URL)
+            max_workers: Concurrency limit (defaults to the fetcher's max_workers)
+
+        Returns:
+            Dictionary mapping event IDs to their specific data
+        """
+        if base_url is None:
+            base_url = self.event_specific_url
+        if max_workers is None:
+            max_workers = self.max_workers
+
+        all_event_specific_data = {}
+        pending = []
+
+        logger.info("Found %d events to process.", len(events_data))
+
+        for event in events_data:
+            event_id = event.get("id")
+            event_title = event.get("title", "Unknown Title")
+
+            if not event_id:
+                logger.warning("Skipping event with missing ID: %s", event_title)
+                continue
+
+            # Reserve the slot so results stay in events order
+            all_event_specific_data[event_id] = None
+            pending.append((event_id, event_title, is_event_finalized(event)))
+
+        if pending:
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(max_workers, len(pending)))
+            ) as executor:
+                futures = {
+                    event_id: executor.submit(
+                        self._fetch_single_event,
+                        base_url,
+                        event_id,
+                        event_title,
+                        finalized,
+                    )
+                    for event_id, event_title, finalized in pending
+                }
+                for event_id, future in futures.items():
+                    all_event_specific_data[event_id], _ = future.result()
+
+        # Print summary
+        self._log_fetch_summary(events_data, all_event_specific_data)
+        return all_event_specific_data
+
+    def _fetch_single_event(
+        self, base_url: str, event_id: Any, event_title: str, finalized: bool = False
+    ) -> Tuple[Dict, bool]:
+        """
+        Fetch and decode the payload for a single event.
+
+        Args:
+            base_url: Base URL for event-specific data
+            event_id: ID of the event to fetch
+            event_title: Title of the event (for logging)
+            finalized: Whether the event's results can no longer change
+
+        Returns:
+            Tuple of (event data or error entry, whether the fetch succeeded)
+        """
+        specific_url = f"{base_url}?event={event_id}"
+        log_extra = {"event_id": event_id, "url": specific_url}
+        logger.debug(
+            "Fetching event %s (%s) from %s",
+            event_id,
+            event_title,
+            specific_url,
+            extra=log_extra,
+        )
+
+        try:
+            with get_profiler().event(event_id, event_title):
+                event_specific_data, unchanged = self._get_json(
+                    specific_url,
+                    finalized,
+                    self.memo_key(base_url, event_id),
+                    EVENT_TABLE_PATH,
+                )
+            if unchanged:
+                logger.debug(
+                    "Event %s is unchanged since the last fetch",
+                    event_id,
+                    extra=log_extra,
+                )
+            else:
+                logger.debug("Fetched event %s", event_id, extra=log_extra)
+            return event_specific_data, True
+
+        except requests.exceptions.RequestException as e:
+            logger.error(
+                "Request for event %s failed: %s", event_id, e, extra=log_extra
+            )
+            return {"error": str(e)}, False
+
+        except json.JSONDecodeError as e:
+            logger.error(
+                "Failed to decode JSON for event %s", event_id, extra=log_extra
+            )
+            return {
+                "error": "JSONDecodeError",
+                "response_text": e.doc[:500] if e.doc else "No response text",
+            }, False
+
+    def memo_key(self, endpoint: str, event_id: Any = None) -> Tuple:
+        """
+        Build the memo cache key of a response.
+
+        Args:
+            endpoint: Events list URL, or base URL of the event-specific data
+            event_id: Event ID (None for an events list)
+
+        Returns:
+            (endpoint, year, event ID); the year is that of the season the
+            endpoint belongs to, or the fetcher's year for other URLs
+        """
+        element_id = endpoint.rstrip("/").rsplit("/", 1)[-1]
+        return endpoint, _ENDPOINT_YEARS.get(element_id, self.year), event_id
+
+    def _get_json(
+        self,
+        url: str,
+        finalized: bool = False,
+        memo_key: Optional[Tuple] = None,
+        path: Optional[Tuple[str, ...]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Fetch and decode a JSON document, going through the memo cache.
+
+        A memoized response is returned without any I/O and reported as
+        unchanged. Otherwise see _load_json(); the result is memoized,
+        without expiry for finalized events that already hold results.
+
+        Args:
+            url: URL to request
+            finalized: Whether the resource can no longer change
+            memo_key: Key of the response in the memo cache (not memoized if None)
+            path: Decode only the value at this key path (see extract_json())
+
+        Returns:
+            Tuple of (decoded JSON, whether it came unchanged from a cache)
+
+        Raises:
+            requests.exceptions.RequestException: If request fails
+            json.JSONDecodeError: If response is not valid JSON
+        """
+        if memo_key is not None:
+            data = self.memo_cache.get(memo_key)
+            if data is not None:
+                return data, True
+        data, unchanged = self._load_json(url, finalized, path)
+        if memo_key is not None:
+            final = finalized and has_table_rows(data)
+            self.memo_cache.put(memo_key, data, math.inf if final else None)
+        return data, unchanged
+
+    def _load_json(
+        self,
+        url: str,
+        finalized: bool = False,
+        path: Optional[Tuple[str, ...]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Fetch and decode a JSON document, going through the response cache.
+
+        Fresh cache entries, and entries for finalized events that already
+        hold results, are served without touching the network. Stale entries
+        are revalidated with a conditional request. A replaying store
+        replaces all of this; a recording one keeps every body decoded.
+
+        Args:
+            url: URL to request
+            finalized: Whether the resource can no longer change
+            path: Decode only the value at this key path (see extract_json())
+
+        Returns:
+            Tuple of (decoded JSON, whether it came unchanged from the cache)
+
+        Raises:
+            requests.exceptions.RequestException: If request fails
+            json.JSONDecodeError: If response is not valid JSON
+        """
+        if self.replay_store is not None and self.replay_store.replaying:
+            body = self.replay_store.load(url)
+            with get_profiler().stage("decode", len(body)):
+                return _decode_json(body, path), False
+
+        entry = self.response_cache.get(url) if self.response_cache else None
+        if entry is not None:
+            if self.response_cache.is_fresh(entry):
+                return self._decode(url, entry["body"], path), True
+            if finalized:
+                data = self._decode(url, entry["body"], path)
+                if has_table_rows(data):
+                    return data, True
+
+        response = self.fetch(url, headers=ResponseCache.conditional_headers(entry))
+        if response.status_code == 304 and entry is not None:
+            self.response_cache.refresh(url, entry)
+            return self._decode(url, entry["body"], path), True
+
+        data = self._decode(url, response.content, path)
+        if self.response_cache:
+            self.response_cache.put(url, response)
+        return data, False
+
+    def _decode(
+        self, url: str, body: bytes, path: Optional[Tuple[str, ...]] = None
+    ) -> Any:
+        """Decode a JSON body, recording it first if a recording store is set."""
+        if self.replay_store is not None:
+            self.replay_store.record(url, body)
+        with get_profiler().stage("decode", len(body)):
+            return _decode_json(body, path)
+
+    def _wait_for_rate_limit(self, url: str) -> None:
+        """
+        Block until both the global and the per-host rate limits allow a request.
+
+        Args:
+            url: URL about to be requested
+        """
+        global_limiter = get_global_rate_limiter()
+        if global_limiter is not None:
+            global_limiter.acquire()
+
+        if not self.per_host_rate:
+            return
+        host = urlparse(url).netloc
+        with self._host_rate_limiters_lock:
+            limiter = self._host_rate_limiters.get(host)
+            if limiter is None:
+                limiter = RateLimiter(self.per_host_rate)
+                self._host_rate_limiters[host] = limiter
+        limiter.acquire()
+
+    def fetch(self, url: str, headers: Dict = None) -> requests.Response:
+        """
+        GET a URL on the pooled session, with rate limits, retries and timings.
+
+        Any status of 400 or more raises, so a returned response is either
+        successful or a 304 to a conditional request.
+
+        The body is read eagerly so that the time spent receiving it can be
+        recorded separately from connection setup and server wait time.
+
+        Args:
+            url: URL to request
+            headers: Extra headers for this request only
+
+        Returns:
+            Response object
+
+        Raises:
+            requests.exceptions.RequestException: If request fails
+        """
+        timing = {"url": url, "attempts": 0, "connections": 0, "connect": 0.0}
+
+        def send() -> requests.Response:
+            self._wait_for_rate_limit(url)
+            _connect_timer.seconds = 0.0
+            _connect_timer.count = 0
+            timing["attempts"] += 1
+            start = time.perf_counter()
+            try:
+                return self.session.get(
+                    url, headers=headers, timeout=self.timeout, stream=True
+                )
+            finally:
+                timing["connect"] += _connect_timer.seconds
+                timing["connections"] += _connect_timer.count
+                timing["wait"] = max(
+                    0.0, time.perf_counter() - start - _connect_timer.seconds
+                )
+
+        def on_retry(retry: int, delay: float, cause: Any) -> None:
+            reason = (
+                f"HTTP {cause.status_code}"
+                if isinstance(cause, requests.Response)
+                else type(cause).__name__
+            )
+            logger.warning(
+                "Retrying %s in %.1fs (%s, retry %d/%d)",
+                url,
+                delay,
+                reason,
+                retry,
+                self.retry_policy.max_retries,
+            )
+
+        try:
+            response = self.retry_policy.call(send, on_retry)
+            response.raise_for_status()
+            start = time.perf_counter()
+            content = response.content
+            timing["transfer"] = time.perf_counter() - start
+            timing["bytes"] = len(content)
+            # Bytes read from the socket, before any Content-Encoding is undone
+            timing["wire_bytes"] = response.raw.tell() or len(content)
+            timing["status"] = response.status_code
+            self.request_timings.append(timing)
+            profiler = get_profiler()
+            profiler.record("connect", timing["connect"])
+            profiler.record("wait", timing["wait"])
+            profiler.record("transfer", timing["transfer"], nbytes=timing["wire_bytes"])
+            return response
+        except requests.exceptions.Timeout:
+            logger.error("The request to %s timed out.", url)
+            raise
+        except requests.exceptions.RequestException:
+            logger.error("Request to %s failed", url)
+            raise
+
+    def get_timing_summary(self) -> Dict[str, float]:
+        """
+        Summarise the timing counters of all successful requests so far.
+
+        Returns:
+            Totals for requests, retries, new connections, bytes (decoded
+            and as received) and the seconds spent connecting, waiting for
+            headers and transferring
+        """
+        timings = list(self.request_timings)
+        return {
+            "requests": len(timings),
+            "retries": sum(t["attempts"] - 1 for t in timings),
+            "connections": sum(t["connections"] for t in timings),
+            "bytes": sum(t["bytes"] for t in timings),
+            "wire_bytes": sum(t["wire_bytes"] for t in timings),
+            "connect": sum(t["connect"] for t in timings),
+            "wait": sum(t["wait"] for t in timings),
+            "transfer": sum(t["transfer"] for t in timings),
+        }
+
+    def close(self) -> None:
+        """Close the pooled session and its keep-alive connections."""
+        self.session.close()
+
+    def _log_fetch_summary(
+        self, events_data: List[Dict], all_event_specific_data: Dict[str, Any]
+    ) -> None:
+        """Log a summary of the fetch operation."""
+        successful_fetches = sum(
+            1
+            for data in all_event_specific_data.values()
+            if isinstance(data, dict) and "error" not in data
+        )
+        logger.info(
+            "Fetched data for %d events, %d failed.",
+            successful_fetches,
+            len(events_data) - successful_fetches,
+        )
+        self.log_http_summary()
+
+    def log_http_summary(self) -> None:
+        """Log the timing counters of get_timing_summary() and the memo statistics."""
+        summary = self.get_timing_summary()
+        logger.info(
+            "HTTP: %d requests, %d retries, %d new connections, "
+            "%d bytes (%d on the wire); connect %.3fs, wait %.3fs, transfer %.3fs",
+            summary["requests"],
+            summary["retries"],
+            summary["connections"],
+            summary["bytes"],
+            summary["wire_bytes"],
+            summary["connect"],
+            summary["wait"],
+            summary["transfer"],
+        )
+        memo = self.memo_cache.stats()
+        logger.debug(
+            "Memo: %d entries, %d hits, %d misses, %d evictions, %d expirations",
+            memo["entries"],
+            memo["hits"],
+            memo["misses"],
+            memo["evictions"],
+            memo["expirations"],
+        )
+
+
+_TABLE_RE = re.compile(r"<table\b", re.IGNORECASE)
+_ROW_RE = re.compile(r"<tr\b[^>]*>(.*?)</tr>", re.IGNORECASE | re.DOTALL)
+_CELL_RE = re.compile(r"<t([hd])\b([^>]*)>(.*?)</t[hd]>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]*>")
+_INT_RE = re.compile(r"[-+]?\d+")
+_FLOAT_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _cell_text(cell_html: str) -> str:
+    """Strip tags, entities and surrounding whitespace from a cell's contents."""
+    if "<" in cell_html:
+        cell_html = _TAG_RE.sub("", cell_html)
+    if "&" in cell_html:
+        cell_html = html.unescape(cell_html)
+    return " ".join(cell_html.split())
+
+
+def _convert_column(values: List[str]) -> Tuple[List[Any], str]:
+    """
+    Convert a column of cell strings the way pd.read_html would type it.
+
+    Empty cells become None. A column of integers stays integral only if no
+    cell is empty; otherwise its numbers become floats.
+
+    Args:
+        values: Cell text for every row
+
+    Returns:
+        Tuple of (converted values, dtype name: "int64", "float64" or "object")
+    """
+    present = [value for value in values if value]
+    if all(_INT_RE.fullmatch(value) for value in present):
+        if present and len(present) == len(values):
+            return [int(value) for value in values], "int64"
+        return [float(value) if value else None for value in values], "float64"
+    if all(_FLOAT_RE.fullmatch(value) for value in present):
+        return [float(value) if value else None for value in values], "float64"
+    return [value if value else None for value in values], "object"
+
+
+def parse_dhl_table(html_table_str: str) -> Optional[Dict[str, Tuple[List[Any], str]]]:
+    """
+    Parse the DHL results table without going through pd.read_html.
+
+    Only the exact layout served by the API is accepted: a single table
+    whose first row holds the DHL_TABLE_COLUMNS headers, followed by rows of
+    plain cells. Anything else returns None so the caller can fall back to a
+    general-purpose parser.
+
+    Args:
+        html_table_str: HTML of the ``htmlList.table`` field
+
+    Returns:
+        Mapping of column name to (typed values, dtype name), or None if the
+        layout is not recognised
+    """
+    if len(_TABLE_RE.findall(html_table_str)) != 1:
+        return None
+
+    rows = _ROW_RE.findall(html_table_str)
+    if not rows:
+        return None
+
+    header = _CELL_RE.findall(rows[0])
+    if [tag.lower() for tag, _, _ in header] != ["h"] * len(DHL_TABLE_COLUMNS):
+        return None
+    if [_cell_text(text) for _, _, text in header] != DHL_TABLE_COLUMNS:
+        return None
+
+    columns: List[List[str]] = [[] for _ in DHL_TABLE_COLUMNS]
+    for row in rows[1:]:
+        cells = _CELL_RE.findall(row)
+        if len(cells) != len(DHL_TABLE_COLUMNS):
+            return None
+        for column, (tag, attrs, text) in zip(columns, cells):
+            if tag.lower() != "d" or "span" in attrs.lower():
+                return None
+            column.append(_cell_text(text))
+
+    return {
+        name: _convert_column(values)
+        for name, values in zip(DHL_TABLE_COLUMNS, columns)
+    }
+
+
+def _json_scalar(value: Any) -> str:
+    """Serialise a scalar the way DataFrame.to_json does."""
+    if value is None or (isinstance(value, float) and value != value):
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return json.dumps(str(value)).replace("/", "\\/")
+
+
+def format_records_json(records: List[Dict[str, Any]], indent: int = 4) -> str:
+    """
+    Serialise records byte-for-byte like ``df.to_json(orient="records", indent=indent)``.
+
+    Args:
+        records: Rows as dictionaries of scalars
+        indent: Spaces per nesting level (0 for compact output)
+
+    Returns:
+        JSON text
+    """
+    if not records:
+        return "[\n\n]" if indent else "[]"
+    if not indent:
+        return (
+            "["
+            + ",".join(
+                "{"
+                + ",".join(
+                    f"{_json_scalar(key)}:{_json_scalar(value)}"
+                    for key, value in record.items()
+                )
+                + "}"
+                for record in records
+            )
+            + "]"
+        )
+    outer = " " * indent
+    inner = " " * (indent * 2)
+    rows = [
+        f"{outer}{{\n"
+        + ",\n".join(
+            f"{inner}{_json_scalar(key)}:{_json_scalar(value)}"
+            for key, value in record.items()
+        )
+        + f"\n{outer}}}"
+        for record in records
+    ]
+    return "[\n" + ",\n".join(rows) + "\n]"
+
+
+class PitStopTable:
+    """
+    Column-oriented results table of one event.
+
+    int64 columns are held in ``array("q")``, float64 columns in
+    ``array("d")`` with NaN for empty cells, and text columns in lists of
+    interned strings, instead of a dictionary per row. A DataFrame is only
+    built when to_dataframe() is called.
+    """
+
+    __slots__ = ("names", "dtypes", "columns")
+
+    def __init__(self, names: List[str], dtypes: List[str], columns: List[Any]):
+        """
+        Initialize the PitStopTable.
+
+        Args:
+            names: Column names
+            dtypes: dtype name of every column ("int64", "float64" or "object")
+            columns: Column values, as described in the class docstring
+        """
+        self.names = names
+        self.dtypes = dtypes
+        self.columns = columns
+
+    @classmethod
+    def from_parsed(cls, parsed: Dict[str, Tuple[List[Any], str]]) -> "PitStopTable":
+        """
+        Build a table from the output of parse_dhl_table().
+
+        Args:
+            parsed: Mapping of column name to (typed values, dtype name)
+
+        Returns:
+            PitStopTable
+        """
+        names, dtypes, columns = [], [], []
+        for name, (values, dtype) in parsed.items():
+            if dtype == "int64":
+                column = array("q", values)
+            elif dtype == "float64":
+                column = array(
+                    "d", [math.nan if value is None else value for value in values]
+                )
+            else:
+                # Team and driver names repeat across events; share one copy
+                column = [
+                    None if value is None else sys.intern(value) for value in values
+                ]
+            names.append(name)
+            dtypes.append(dtype)
+            columns.append(column)
+        return cls(names, dtypes, columns)
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Return the rows as dictionaries, with None for empty cells."""
+        return [
+            {
+                name: None if value != value else value
+                for name, value in zip(self.names, row)
+            }
+            for row in zip(*self.columns)
+        ]
+
+    def to_json(self, indent: int = 4) -> str:
+        """
+        Serialise the table byte-for-byte like ``df.to_json(orient="records", indent=indent)``.
+
+        Args:
+            indent: Spaces per nesting level (0 for compact output)
+
+        Returns:
+            JSON text
+        """
+        if not len(self):
+            return "[\n\n]" if indent else "[]"
+        # Keys and separators are formatted once per column, not once per cell
+        if indent:
+            outer = " " * indent
+            inner = " " * (indent * 2)
+            keys = [f"{inner}{_json_scalar(name)}:" for name in self.names]
+            row_start, separator, row_end = f"{outer}{{\n", ",\n", f"\n{outer}}}"
+            rows_start, rows_separator, rows_end = "[\n", ",\n", "\n]"
+        else:
+            keys = [f"{_json_scalar(name)}:" for name in self.names]
+            row_start, separator, row_end = "{", ",", "}"
+            rows_start, rows_separator, rows_end = "[", ",", "]"
+        rows = [
+            row_start
+            + separator.join(key + _json_scalar(value) for key, value in zip(keys, row))
+            + row_end
+            for row in zip(*self.columns)
+        ]
+        return rows_start + rows_separator.join(rows) + rows_end
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """Build a DataFrame with the dtypes pd.read_html would have given."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                name: pd.Series(column, dtype=dtype)
+                for name, dtype, column in zip(self.names, self.dtypes, self.columns)
+            }
+        )
+
+
+class SchemaIssue:
+    """One way a race table departs from TABLE_SCHEMA."""
+
+    __slots__ = ("severity", "column", "row", "message")
+
+    def __init__(self, severity: str, column: str, row: Optional[int], message: str):
+        """
+        Initialize the SchemaIssue.
+
+        Args:
+            severity: "error" (the table must not be saved) or "warning"
+            column: Column the issue was found in
+            row: 0-based row of the offending cell, or None for the whole column
+            message: Description of the issue
+        """
+        self.severity = severity
+        self.column = column
+        self.row = row
+        self.message = message
+
+    def __str__(self) -> str:
+        where = self.column if self.row is None else f"{self.column} row {self.row + 1}"
+        return f"{self.severity}: {where}: {self.message}"
+
+
+def _canonical_names(column: List[Any], aliases: Dict[str, str]) -> List[Any]:
+    """Return the column with aliased names replaced (the same list if none are)."""
+    if not any(value in aliases for value in column):
+        return column
+    return [
+        sys.intern(aliases[value]) if value in aliases else value for value in column
+    ]
+
+
+def normalize_table(table: PitStopTable) -> PitStopTable:
+    """
+    Rename aliased columns and canonicalise team and driver names, in place.
+
+    Args:
+        table: Parsed race table
+
+    Returns:
+        The same table
+    """
+    table.names = [COLUMN_ALIASES.get(name, name) for name in table.names]
+    for name, aliases in (("Team", TEAM_ALIASES), ("Driver", DRIVER_ALIASES)):
+        if name in table.names:
+            i = table.names.index(name)
+            table.columns[i] = _canonical_names(table.columns[i], aliases)
+    return table
+
+
+def normalize_dataframe(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Rename aliased columns and canonicalise team and driver names.
+
+    Args:
+        df: Race table from html_table_to_dataframe()
+
+    Returns:
+        Normalised copy of the DataFrame
+    """
+    df = df.rename(columns=COLUMN_ALIASES)
+    for name, aliases in (("Team", TEAM_ALIASES), ("Driver", DRIVER_ALIASES)):
+        if name in df.columns:
+            df[name] = df[name].replace(aliases)
+    return df
+
+
+def normalize_records(records: List[Dict[str, Any]]) -> int:
+    """
+    Canonicalise the team and driver names of saved records, in place.
+
+    Args:
+        records: Rows of a race file
+
+    Returns:
+        Number of names changed
+    """
+    changed = 0
+    for record in records:
+        for name, aliases in (("Team", TEAM_ALIASES), ("Driver", DRIVER_ALIASES)):
+            value = record.get(name)
+            if value in aliases:
+                record[name] = aliases[value]
+                changed += 1
+    return changed
+
+
+def _types_mask(cells: "np.ndarray", kinds: Tuple[type, ...]) -> "np.ndarray":
+    """Return which cells have a type in kinds (bool never counts as a number)."""
+    import numpy as np
+
+    types = np.frompyfunc(type, 1, 1)(cells)
+    mask = np.zeros(len(cells), dtype=bool)
+    for kind in set(types.tolist()):
+        if issubclass(kind, kinds) and not issubclass(kind, bool):
+            mask |= types == kind
+    return mask
+
+
+def _check_values(
+    name: str, column: List[Any], issues: List[SchemaIssue]
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Check the cells of one column against its TABLE_SCHEMA entry.
+
+    Returns:
+        Rows and values of the non-empty cells that passed the checks
+    """
+    import numpy as np
+
+    kind, nullable, low, high = TABLE_SCHEMA[name]
+    cells = np.empty(len(column), dtype=object)
+    cells[:] = column
+    empty = (cells == None) | (cells != cells)  # noqa: E711 (NaN != NaN)
+    found = [] if nullable else [(row, "empty cell") for row in np.flatnonzero(empty)]
+    if kind == "str":
+        wrong = ~empty & ~_types_mask(cells, (str,))
+        found += [(row, f"not text: {column[row]!r}") for row in np.flatnonzero(wrong)]
+        passed = ~empty & ~wrong
+    else:
+        wrong = ~empty & ~_types_mask(cells, (int, float))
+        found += [
+            (row, f"not a number: {column[row]!r}") for row in np.flatnonzero(wrong)
+        ]
+        numbers = np.full(len(cells), np.nan)
+        numbers[~empty & ~wrong] = cells[~empty & ~wrong].astype(float)
+        fraction = np.zeros(len(cells), dtype=bool)
+        outside = np.zeros(len(cells), dtype=bool)
+        with np.errstate(invalid="ignore"):  # NaN marks the cells already reported
+            if kind == "int":
+                fraction = ~empty & ~wrong & (numbers % 1 != 0)
+            if low is not None:
+                outside |= numbers < low
+            if high is not None:
+                outside |= numbers > high
+        outside &= ~fraction
+        found += [
+            (row, f"not whole: {column[row]!r}") for row in np.flatnonzero(fraction)
+        ]
+        found += [
+            (row, f"{column[row]:g} outside [{low}, {high or '...'}]")
+            for row in np.flatnonzero(outside)
+        ]
+        passed = ~empty & ~wrong & ~fraction & ~outside
+    issues.extend(
+        SchemaIssue("error", name, int(row), message) for row, message in sorted(found)
+    )
+    return np.flatnonzero(passed), cells[passed]
+
+
+def validate_columns(names: List[str], columns: List[List[Any]]) -> List[SchemaIssue]:
+    """
+    Check a race table against TABLE_SCHEMA and flag anomalies.
+
+    Errors are cells of the wrong type, empty required cells, values outside
+    their declared range (such as impossible stop times) and missing columns.
+    Warnings are unexpected columns, duplicate or missing positions, positions
+    out of time order, unknown teams and names that have a canonical spelling.
+    Each check runs on a whole column at once with numpy.
+
+    Args:
+        names: Column names
+        columns: Column values; None or NaN marks an empty cell
+
+    Returns:
+        Issues found, errors and warnings mixed, in column order
+    """
+    import numpy as np
+
+    issues = []
+    for name in TABLE_SCHEMA:
+        if name not in names:
+            issues.append(SchemaIssue("error", name, None, "missing column"))
+    values = {}
+    for name, column in zip(names, columns):
+        if name in TABLE_SCHEMA:
+            values[name] = _check_values(name, column, issues)
+        else:
+            issues.append(SchemaIssue("warning", name, None, "unexpected column"))
+    none = (np.empty(0, dtype=int), np.empty(0, dtype=object))
+
+    rows, cells = values.get("Points", none)
+    for i in np.flatnonzero(~np.isin(cells.astype(float), AWARD_POINTS)):
+        issues.append(
+            SchemaIssue(
+                "error", "Points", int(rows[i]), f"{cells[i]:g} is not an award value"
+            )
+        )
+
+    rows, cells = values.get("Pos.", none)
+    if len(rows):
+        numbers = cells.astype(float)
+        order = np.argsort(numbers, kind="stable")
+        ordered = numbers[order]
+        repeated = ordered[1:] == ordered[:-1]
+        duplicates = sorted(set(cells[order][:-1][repeated].tolist()))
+        if duplicates:
+            issues.append(
+                SchemaIssue(
+                    "warning", "Pos.", None, f"duplicate positions {duplicates}"
+                )
+            )
+        elif not np.array_equal(ordered, np.arange(1, len(ordered) + 1)):
+            issues.append(
+                SchemaIssue("warning", "Pos.", None, "positions are not 1 to N")
+            )
+        time_rows, times = values.get("Time (sec)", none)
+        timed = np.isin(rows, time_rows)
+        ranked = np.lexsort((rows[timed], numbers[timed]))
+        ranked_rows = rows[timed][ranked]
+        ranked_cells = cells[timed][ranked]
+        ranked_times = times[np.searchsorted(time_rows, ranked_rows)]
+        seconds = ranked_times.astype(float)
+        for i in np.flatnonzero(seconds[1:] < seconds[:-1]) + 1:
+            issues.append(
+                SchemaIssue(
+                    "warning",
+                    "Time (sec)",
+                    int(ranked_rows[i]),
+                    f"P{ranked_cells[i]:g} stop ({ranked_times[i]:g}s) faster than"
+                    f" the one ranked ahead ({ranked_times[i - 1]:g}s)",
+                )
+            )
+
+    for name, aliases in (("Team", TEAM_ALIASES), ("Driver", DRIVER_ALIASES)):
+        rows, cells = values.get(name, none)
+        flagged = aliased = np.isin(cells, list(aliases))
+        if name == "Team":
+            flagged = aliased | ~np.isin(cells, list(TEAM_LINEAGE))
+        for i in np.flatnonzero(flagged):
+            value = cells[i]
+            if aliased[i]:
+                message = f"{value!r} should be {aliases[value]!r}"
+            else:
+                message = f"unknown team {value!r}"
+            issues.append(SchemaIssue("warning", name, int(rows[i]), message))
+    return issues
+
+
+def validate_table(table: PitStopTable) -> List[SchemaIssue]:
+    """Validate a PitStopTable (see validate_columns())."""
+    return validate_columns(table.names, table.columns)
+
+
+def validate_dataframe(df: "pd.DataFrame") -> List[SchemaIssue]:
+    """Validate a DataFrame (see validate_columns())."""
+    return validate_columns(
+        [str(name) for name in df.columns], [df[name].tolist() for name in df.columns]
+    )
+
+
+def validate_records(records: List[Dict[str, Any]]) -> List[SchemaIssue]:
+    """Validate the rows of a saved race file (see validate_columns())."""
+    if not records:
+        return []
+    names = list(records[0])
+    return validate_columns(
+        names, [[record.get(name) for record in records] for name in names]
+    )
+
+
+_GRAND_PRIX_RE = re.compile(r"([A-Z]+(?:\s+[A-Z]+)*)\s+GRAND\s+PRIX", re.IGNORECASE)
+
+
+class RaceNameResolver:
+    """
+    Multi-pattern matcher from event titles to race names for one season.
+
+    All keys of a season's race table are compiled into an Aho-Corasick
+    automaton, so a title is scanned once regardless of the number of keys.
+    When several keys occur in a title the longest one wins (so a sponsor
+    such as "QATAR AIRWAYS" cannot shadow "BRITISH"); equally long matches
+    naming different races are reported as ambiguous and resolved in table
+    order.
+
+    Resolved names are cached per event, which is where repeated lookups
+    save time: on titles as short as the DHL ones an uncached scan of the
+    automaton is no faster than trying each key in turn.
+    """
+
+    def __init__(self, races: Dict[str, str]):
+        """
+        Initialize the RaceNameResolver.
+
+        Args:
+            races: Mapping of upper-case title keys to proper race names
+        """
+        self.races = races
+        self._order = {key: index for index, key in enumerate(races)}
+        # Trie transitions, failure links and the keys ending at each node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        self._cache: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self.ambiguous: Dict[str, List[str]] = {}
+        self.unmatched: List[str] = []
+        self._build()
+
+    def _build(self) -> None:
+        for key in self.races:
+            node = 0
+            for char in key.upper():
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = next_node
+                node = next_node
+            self._output[node].append(key)
+
+        # Breadth-first pass to set failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = (
+                    self._output[child] + self._output[self._fail[child]]
+                )
+
+    def find_keys(self, text: str) -> List[str]:
+        """
+        Find every race key occurring in a text.
+
+        Args:
+            text: Text to scan (matched case-insensitively)
+
+        Returns:
+            Matching keys in order of their end position
+        """
+        matches = []
+        node = 0
+        for char in text.upper():
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._output[node]:
+                matches.extend(self._output[node])
+        return matches
+
+    def resolve(self, event_title: str, event_id: Any = None) -> str:
+        """
+        Resolve an event title to its race name.
+
+        Titles matching no key fall back to the "<LOCATION> GRAND PRIX" part
+        of the title, then to "Unknown Grand Prix"; both are recorded in
+        ``unmatched``.
+
+        Args:
+            event_title: Title of the event
+            event_id: ID of the event, used as cache key (defaults to the title)
+
+        Returns:
+            Race name such as "Australian Grand Prix"
+        """
+        cache_key = event_title if event_id is None else event_id
+        # Held across the lookup so concurrent fetches of one event resolve,
+        # warn and record it in ambiguous/unmatched only once
+        with self._lock:
+            race_name = self._cache.get(cache_key)
+            if race_name is None:
+                race_name = self._cache[cache_key] = self._resolve(event_title)
+        return race_name
+
+    def _resolve(self, event_title: str) -> str:
+        """Resolve a title without the cache; called with the lock held."""
+        keys = self.find_keys(event_title)
+        if keys:
+            longest = max(len(key) for key in keys)
+            best = sorted(
+                {key for key in keys if len(key) == longest}, key=self._order.get
+            )
+            race_name = self.races[best[0]]
+            candidates = sorted({self.races[key] for key in best})
+            if len(candidates) > 1:
+                self.ambiguous[event_title] = candidates
+                logger.warning(
+                    "Ambiguous race name for: %s (%s); using %s",
+                    event_title,
+                    ", ".join(candidates),
+                    race_name,
+                )
+            return race_name
+
+        self.unmatched.append(event_title)
+        # Try to extract Grand Prix name using regex
+        match = _GRAND_PRIX_RE.search(event_title)
+        if match:
+            location = match.group(1).strip()
+            return f"{location} Grand Prix"
+        # Fallback to a generic name
+        logger.warning("Could not determine race name for: %s", event_title)
+        return "Unknown Grand Prix"
+
+
+_race_resolvers: Dict[int, RaceNameResolver] = {}
+_race_resolvers_lock = threading.Lock()
+
+
+def get_race_resolver(year: int) -> RaceNameResolver:
+    """
+    Return the shared race name resolver for a season, building it on first use.
+
+    Args:
+        year: Season (years without a race table use the latest season's)
+
+    Returns:
+        RaceNameResolver for the season
+    """
+    if year not in F1_RACES:
+        year = max(F1_RACES.keys())
+    with _race_resolvers_lock:
+        resolver = _race_resolvers.get(year)
+        if resolver is None:
+            resolver = _race_resolvers[year] = RaceNameResolver(F1_RACES[year])
+        return resolver
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of some bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path: str) -> Optional[str]:
+    """
+    Hash a file's contents.
+
+    Args:
+        file_path: Path of the file
+
+    Returns:
+        Hex SHA-256 digest, or None if the file cannot be read
+    """
+    try:
+        with open(file_path, "rb") as f:
+            return hash_bytes(f.read())
+    except OSError:
+        return None
+
+
+def write_file_atomic(file_path: str, data: bytes) -> Tuple[bool, str]:
+    """
+    Replace a file with new contents, unless it already holds exactly those bytes.
+
+    The data goes to a temporary file in the same directory, which is
+    fsynced and renamed over the target, so readers and later commits
+    only ever see the old or the new file, never a truncated one.
+
+    Args:
+        file_path: Path of the file to write
+        data: Complete new contents
+
+    Returns:
+        Tuple of (whether the file was written, hex SHA-256 digest of data)
+    """
+    digest = hash_bytes(data)
+    if hash_file(file_path) == digest:
+        return False, digest
+
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Persist the rename itself; directories can't be opened on Windows
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return True, digest
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+    return True, digest
+
+
+def compact_path(file_path: str) -> str:
+    """Return the path of the compact copy of a race JSON file."""
+    return os.path.splitext(file_path)[0] + COMPACT_SUFFIX
+
+
+def _keyed_rows(records: List[Dict[str, Any]]) -> Dict[Tuple, Dict[str, Any]]:
+    """Index rows by their ROW_KEY_COLUMNS values and occurrence of those values."""
+    keyed, seen = {}, {}
+    for row in records:
+        values = tuple(row.get(column) for column in ROW_KEY_COLUMNS)
+        occurrence = seen.get(values, 0)
+        seen[values] = occurrence + 1
+        keyed[values + (occurrence,)] = row
+    return keyed
+
+
+def _key_dict(key: Tuple) -> Dict[str, Any]:
+    """Turn an index key of _keyed_rows() back into a {column: value} key."""
+    key_dict = dict(zip(ROW_KEY_COLUMNS, key))
+    if key[-1]:
+        key_dict["Occurrence"] = key[-1]
+    return key_dict
+
+
+def diff_records(
+    old: List[Dict[str, Any]], new: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Compute the row-level changes that turn one revision of a race table into another.
+
+    Rows are matched on ROW_KEY_COLUMNS (a driver stops at most once a
+    lap), so corrected times and reordered positions are updates rather
+    than a delete and an insert. Rows sharing a key are matched in order
+    and told apart by an ``Occurrence`` number in the key.
+
+    Args:
+        old: Rows of the previous race file (empty for a new race)
+        new: Rows of the new race file
+
+    Returns:
+        Changes in new-row order, then deletes in old-row order. Each has
+        ``op`` ("insert", "update" or "delete"), ``key`` and ``row`` (the
+        new row, or the deleted one); updates also carry ``old``, the
+        previous values of the columns that changed.
+    """
+    old_rows, new_rows = _keyed_rows(old), _keyed_rows(new)
+    changes = []
+    for key, row in new_rows.items():
+        previous = old_rows.get(key)
+        if previous is None:
+            changes.append({"op": "insert", "key": _key_dict(key), "row": row})
+        elif previous != row:
+            changed = {
+                column: previous.get(column)
+                for column in {**previous, **row}
+                if previous.get(column) != row.get(column)
+            }
+            changes.append(
+                {"op": "update", "key": _key_dict(key), "row": row, "old": changed}
+            )
+    for key, row in old_rows.items():
+        if key not in new_rows:
+            changes.append({"op": "delete", "key": _key_dict(key), "row": row})
+    return changes
+
+
+def apply_changes(
+    records: List[Dict[str, Any]], changes: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Apply diff_records() changes to the previous rows of a race table.
+
+    Args:
+        records: Rows the changes were computed against
+        changes: Output of diff_records(), or the change log lines of one race file
+
+    Returns:
+        The new rows, ordered by position as in the race file
+    """
+    rows = _keyed_rows(records)
+    for change in changes:
+        key_dict = change["key"]
+        key = tuple(key_dict.get(column) for column in ROW_KEY_COLUMNS)
+        key += (key_dict.get("Occurrence", 0),)
+        if change["op"] == "delete":
+            rows.pop(key, None)
+        else:
+            rows[key] = change["row"]
+    return sorted(rows.values(), key=lambda row: row.get("Pos.") or 0)
+
+
+def hash_event_source(event_json_data: Dict) -> str:
+    """
+    Hash the ``htmlList.table`` source of an event payload.
+
+    Args:
+        event_json_data: JSON data dictionary for a specific event
+
+    Returns:
+        Hex SHA-256 digest of the table HTML (of an empty string if missing)
+    """
+    table = (event_json_data.get("htmlList") or {}).get("table") or ""
+    return hash_bytes(str(table).encode("utf-8"))
+
+
+class SeasonManifest:
+    """
+    Record of the source and output hashes of every event in a year directory.
+
+    Row changes of the race files rewritten during a run are collected too,
+    and saved with the manifest as the directory's CHANGES_FILENAME: one
+    JSON object per line, holding the changes of this run only. The file is
+    removed by a run that changes no rows, and it is git-ignored.
+    """
+
+    def __init__(self, output_dir: str):
+        """
+        Initialize the SeasonManifest, loading any manifest already on disk.
+
+        Args:
+            output_dir: Year directory holding the race files and the manifest
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.changes_path = os.path.join(output_dir, CHANGES_FILENAME)
+        self.events: Dict[str, Dict[str, str]] = {}
+        self.changes: List[Dict[str, Any]] = []
+        self._dirty = False
+        # Change log lines saved so far by this run, rewritten on every save
+        self._change_log: List[str] = []
+        self._change_log_saved = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.events = json.load(f).get("events", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            self.events = {}
+
+    def is_up_to_date(self, event_id: Any, source_hash: str) -> bool:
+        """
+        Check whether an event's output already reflects the given source.
+
+        The output file must still exist with the hash recorded when it was
+        written, so truncated or hand-edited files are regenerated.
+
+        Args:
+            event_id: ID of the event
+            source_hash: Hash of the event's current ``htmlList.table``
+
+        Returns:
+            True if the event can be skipped
+        """
+        entry = self.events.get(str(event_id))
+        if not entry or entry.get("source_hash") != source_hash:
+            return False
+        output_path = os.path.join(self.output_dir, entry.get("output_file", ""))
+        return hash_file(output_path) == entry.get("output_hash")
+
+    def record(
+        self,
+        event_id: Any,
+        event_title: str,
+        source_hash: str,
+        file_path: str,
+        changes: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Record the source and output of a freshly written event file.
+
+        Args:
+            event_id: ID of the event
+            event_title: Title of the event
+            source_hash: Hash of the event's ``htmlList.table``
+            file_path: Path of the written JSON file
+            changes: Row changes of the file (see diff_records())
+        """
+        output_file = os.path.basename(file_path)
+        self.events[str(event_id)] = {
+            "title": event_title,
+            "source_hash": source_hash,
+            "output_file": output_file,
+            "output_hash": hash_file(file_path),
+        }
+        for change in changes or ():
+            self.changes.append({"event_id": event_id, "file": output_file, **change})
+        self._dirty = True
+
+    def save(self) -> None:
+        """
+        Write the manifest if anything was recorded, and the run's change log.
+
+        The change log left by an earlier run is replaced on the first save,
+        or removed if this run has changed no rows.
+        """
+        if self._dirty:
+            data = json.dumps({"events": self.events}, indent=4, sort_keys=True)
+            write_file_atomic(self.path, data.encode("utf-8"))
+            self._dirty = False
+        if self.changes:
+            run = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            self._change_log.extend(
+                json.dumps({"run": run, **change}, ensure_ascii=False) + "\n"
+                for change in self.changes
+            )
+            self.changes = []
+        elif self._change_log_saved:
+            return
+        if self._change_log:
+            data = "".join(self._change_log)
+            write_file_atomic(self.changes_path, data.encode("utf-8"))
+        else:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.changes_path)
+        self._change_log_saved = True
+
+
+class DataProcessor:
+    """Class for processing F1 data."""
+
+    @staticmethod
+    def html_table_to_table(event_json_data: Dict) -> Optional[PitStopTable]:
+        """
+        Convert the event's HTML table to a PitStopTable without importing pandas.
+
+        This is the fast path for the standard DHL layout. It returns None
+        without reporting anything when the table is missing or its layout is
+        not recognised, so callers can fall back to html_table_to_dataframe,
+        which reports the details.
+
+        Args:
+            event_json_data: JSON data dictionary for a specific event
+
+        Returns:
+            PitStopTable, or None
+        """
+        if not isinstance(event_json_data, dict):
+            return None
+        html_table_str = (event_json_data.get("htmlList") or {}).get("table")
+        if not html_table_str or not isinstance(html_table_str, str):
+            return None
+
+        columns = parse_dhl_table(html_table_str)
+        if columns is None:
+            return None
+        return PitStopTable.from_parsed(columns)
+
+    @staticmethod
+    def html_table_to_records(event_json_data: Dict) -> Optional[List[Dict[str, Any]]]:
+        """
+        Convert the event's HTML table to records without importing pandas.
+
+        Args:
+            event_json_data: JSON data dictionary for a specific event
+
+        Returns:
+            List of row dictionaries keyed by column name, or None if the
+            table is missing or not in the standard layout
+        """
+        table = DataProcessor.html_table_to_table(event_json_data)
+        return None if table is None else table.to_records()
+
+    @staticmethod
+    def html_table_to_dataframe(event_json_data: Dict) -> Optional["pd.DataFrame"]:
+        """
+        Extract HTML table from event JSON data and convert to DataFrame.
+
+        Args:
+            event_json_data: JSON data dictionary for a specific event
+
+        Returns:
+            DataFrame created from HTML table, or None if extraction fails
+        """
+        if not isinstance(event_json_data, dict):
+            logger.error("Event data must be a dictionary.")
+            return None
+
+        # Extract HTML table string
+        html_table_str = event_json_data.get("htmlList", {}).get("table")
+
+        if not html_table_str:
+            logger.error(
+                "Could not find 'htmlList' -> 'table' in the event data, or it's empty."
+            )
+            return None
+
+        if not isinstance(html_table_str, str):
+            logger.error("The value at ['htmlList']['table'] is not a string.")
+            return None
+
+        import pandas as pd
+
+        logger.debug("Found HTML table string. Attempting to parse...")
+        columns = parse_dhl_table(html_table_str)
+        if columns is not None:
+            logger.debug("Parsed HTML table into DataFrame.")
+            return PitStopTable.from_parsed(columns).to_dataframe()
+
+        logger.info("Unrecognised table layout, falling back to pd.read_html...")
+        try:
+            # Parse HTML table into DataFrame
+            list_of_dfs = pd.read_html(io.StringIO(html_table_str))
+
+            if list_of_dfs:
+                logger.debug("Parsed HTML table into DataFrame with pd.read_html.")
+                return list_of_dfs[0]
+            else:
+                logger.warning(
+                    "No tables found by pd.read_html, although HTML string was present."
+                )
+                return None
+
+        except ValueError as ve:
+            logger.error(
+                "Error parsing HTML with pandas (ValueError): %s. "
+                "Check if the HTML string actually contains a <table> tag.",
+                ve,
+            )
+            return None
+        except ImportError:
+            logger.error(
+                "The 'lxml' library might be required by pd.read_html. Please install it (`pip install lxml`)."
+            )
+            return None
+        except Exception as e:
+            logger.exception("An unexpected error occurred during HTML parsing: %s", e)
+            return None
+
+    @staticmethod
+    def resolve_race_name(event_title: str, year: int, event_id: Any = None) -> str:
+        """
+        Map an event title to the proper race name used for file names.
+
+        Args:
+            event_title: Title of the event (e.g., "FORMULA 1 LOUIS VUITTON AUSTRALIAN GRAND PRIX 2025")
+            year: Year of the event
+            event_id: ID of the event, used to cache the result
+
+        Returns:
+            Race name such as "Australian Grand Prix"
+        """
+        return get_race_resolver(year).resolve(event_title, event_id)
+
+    @staticmethod
+    def save_dataframe_to_json(
+        df: "pd.DataFrame",
+        event_title: str,
+        year: int,
+        output_dir: str = None,
+        event_id: Any = None,
+        compact: bool = False,
+    ) -> str:
+        """
+        Save DataFrame to a JSON file with a standardized filename.
+
+        Args:
+            df: DataFrame to save
+            event_title: Title of the event (e.g., "FORMULA 1 LOUIS VUITTON AUSTRALIAN GRAND PRIX 2025")
+            year: Year of the event
+            output_dir: Directory to save the JSON file (defaults to year folder)
+            event_id: ID of the event, used to cache the race name lookup
+            compact: Also write an unindented copy next to the file
+
+        Returns:
+            Path to the saved JSON file
+        """
+        if df is None:
+            logger.error("Cannot save None DataFrame for %s", event_title)
+            return ""
+
+        file_path = DataProcessor.get_output_path(
+            event_title, year, output_dir, event_id=event_id
+        )
+        with get_profiler().stage("serialise"):
+            indented = df.to_json(orient="records", indent=4)
+            compact_json = df.to_json(orient="records") if compact else None
+        DataProcessor._write_outputs(file_path, indented, compact_json)
+        return file_path
+
+    @staticmethod
+    def save_records_to_json(
+        records: List[Dict[str, Any]],
+        event_title: str,
+        year: int,
+        output_dir: str = None,
+        event_id: Any = None,
+        compact: bool = False,
+    ) -> str:
+        """
+        Save records to a JSON file, formatted exactly like save_dataframe_to_json.
+
+        Args:
+            records: Rows to save
+            event_title: Title of the event (e.g., "FORMULA 1 LOUIS VUITTON AUSTRALIAN GRAND PRIX 2025")
+            year: Year of the event
+            output_dir: Directory to save the JSON file (defaults to year folder)
+            event_id: ID of the event, used to cache the race name lookup
+            compact: Also write an unindented copy next to the file
+
+        Returns:
+            Path to the saved JSON file
+        """
+        if records is None:
+            logger.error("Cannot save None records for %s", event_title)
+            return ""
+
+        file_path = DataProcessor.get_output_path(
+            event_title, year, output_dir, event_id=event_id
+        )
+        with get_profiler().stage("serialise"):
+            indented = format_records_json(records)
+            compact_json = format_records_json(records, indent=0) if compact else None
+        DataProcessor._write_outputs(file_path, indented, compact_json)
+        return file_path
+
+    @staticmethod
+    def save_table_to_json(
+        table: PitStopTable,
+        event_title: str,
+        year: int,
+        output_dir: str = None,
+        event_id: Any = None,
+        compact: bool = False,
+    ) -> str:
+        """
+        Save a PitStopTable to a JSON file, formatted exactly like save_dataframe_to_json.
+
+        Args:
+            table: Results table to save
+            event_title: Title of the event (e.g., "FORMULA 1 LOUIS VUITTON AUSTRALIAN GRAND PRIX 2025")
+            year: Year of the event
+            output_dir: Directory to save the JSON file (defaults to year folder)
+            event_id: ID of the event, used to cache the race name lookup
+            compact: Also write an unindented copy next to the file
+
+        Returns:
+            Path to the saved JSON file
+        """
+        if table is None:
+            logger.error("Cannot save None table for %s", event_title)
+            return ""
+
+        file_path = DataProcessor.get_output_path(
+            event_title, year, output_dir, event_id=event_id
+        )
+        with get_profiler().stage("serialise"):
+            indented = table.to_json()
+            compact_json = table.to_json(indent=0) if compact else None
+        DataProcessor._write_outputs(file_path, indented, compact_json)
+        return file_path
+
+    @staticmethod
+    def _write_outputs(
+        file_path: str, indented: str, compact: Optional[str] = None
+    ) -> None:
+        """Atomically write a race file (and its compact copy), skipping identical content."""
+        data = indented.encode("utf-8")
+        compact_data = None if compact is None else compact.encode("utf-8")
+        with get_profiler().stage("write", len(data) + len(compact_data or b"")):
+            written, _ = write_file_atomic(file_path, data)
+            if compact_data is not None:
+                write_file_atomic(compact_path(file_path), compact_data)
+        if written:
+            logger.info("Saved data to %s", file_path)
+        else:
+            logger.info("Unchanged output, not rewritten: %s", file_path)
+
+    @staticmethod
+    def get_output_path(
+        event_title: str,
+        year: int,
+        output_dir: str = None,
+        create: bool = True,
+        event_id: Any = None,
+    ) -> str:
+        """
+        Build the standardized JSON file path for an event.
+
+        Args:
+            event_title: Title of the event
+            year: Year of the event
+            output_dir: Directory of the JSON file (defaults to year folder)
+            create: Create the output directory if it doesn't exist
+            event_id: ID of the event, used to cache the race name lookup
+
+        Returns:
+            Path of the event's JSON file
+        """
+        # If no output directory is specified, use the year as the directory name
+        if output_dir is None:
+            output_dir = str(year)
+
+        # Find the proper race name from the event title
+        with get_profiler().stage("resolve"):
+            race_name = DataProcessor.resolve_race_name(event_title, year, event_id)
+
+        # Clean up the filename
+        filename = race_name
+
+        # Create the output directory if it doesn't exist
+        if create:
+            os.makedirs(output_dir, exist_ok=True)
+
+        return os.path.join(output_dir, f"{filename}.json")
+
+
+def check_event(
+    event: Dict,
+    event_data: Any,
+    output_dir: str,
+    manifest: SeasonManifest,
+    incremental: bool = True,
+    compact: bool = False,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Decide whether an event's payload has to be parsed.
+
+    Args:
+        event: Event dictionary from the events list
+        event_data: Fetched event-specific data (or an error entry)
+        output_dir: Directory of the race file
+        manifest: Manifest of the year directory
+        incremental: Skip events whose source table is unchanged
+        compact: An unindented copy of the race file is also wanted
+
+    Returns:
+        Tuple of (status, source hash). Status is "failed" or "unchanged"
+        when there is nothing to parse, None when the payload must be parsed.
+    """
+    event_id = event.get("id")
+    event_title = event.get("title", "Unknown Title")
+
+    if not event_id or event_data is None:
+        logger.warning("Skipping event %s: No data available", event_title)
+        return "failed", None
+
+    # Check if there was an error fetching this event's data
+    if isinstance(event_data, dict) and "error" in event_data:
+        logger.warning(
+            "Skipping event %s: Error in data - %s",
+            event_title,
+            event_data.get("error"),
+            extra={"event_id": event_id},
+        )
+        return "failed", None
+
+    # Events whose source table is unchanged need no re-parse
+    source_hash = hash_event_source(event_data)
+    if incremental and manifest.is_up_to_date(event_id, source_hash):
+        entry = manifest.events[str(event_id)]
+        output_path = os.path.join(output_dir, entry["output_file"])
+        if not compact or os.path.exists(compact_path(output_path)):
+            return "unchanged", source_hash
+    return None, source_hash
+
+
+def render_event(
+    event_data: Dict, serialise: bool = True, compact: bool = False
+) -> Tuple[Optional[Tuple[str, Optional[str]]], List[SchemaIssue], bool]:
+    """
+    Parse, normalise, validate and serialise an event's table.
+
+    This is the CPU-bound part of processing an event. It touches no files,
+    so it can run in a worker process. Tables the fast path cannot parse
+    are reported by html_table_to_dataframe() through the logger; in a
+    worker those records are handed back to the parent with the result.
+
+    Args:
+        event_data: Event-specific data with an ``htmlList.table``
+        serialise: Build the JSON text (not needed for a dry run)
+        compact: Also build the unindented JSON text
+
+    Returns:
+        Tuple of (outputs, schema issues, whether the table was parsed).
+        outputs is (indented JSON, compact JSON or None), or None if the
+        table could not be parsed, has schema errors or serialise is False.
+    """
+    profiler = get_profiler()
+
+    # Standard DHL tables are converted without pandas; anything else
+    # goes through the DataFrame path and its pd.read_html fallback
+    with profiler.stage("parse"):
+        event_table = DataProcessor.html_table_to_table(event_data)
+        event_dataframe = None
+        if event_table is None:
+            event_dataframe = DataProcessor.html_table_to_dataframe(event_data)
+    if event_table is None and event_dataframe is None:
+        return None, [], False
+
+    # Enforce the declared schema before anything is written
+    with profiler.stage("validate"):
+        if event_table is not None:
+            issues = validate_table(normalize_table(event_table))
+        else:
+            event_dataframe = normalize_dataframe(event_dataframe)
+            issues = validate_dataframe(event_dataframe)
+    if not serialise or any(issue.severity == "error" for issue in issues):
+        return None, issues, True
+
+    with profiler.stage("serialise"):
+        if event_table is not None:
+            outputs = (
+                event_table.to_json(),
+                event_table.to_json(indent=0) if compact else None,
+            )
+        else:
+            outputs = (
+                event_dataframe.to_json(orient="records", indent=4),
+                event_dataframe.to_json(orient="records") if compact else None,
+            )
+    return outputs, issues, True
+
+
+def finish_event(
+    event: Dict,
+    rendered: Tuple[Optional[Tuple[str, Optional[str]]], List[SchemaIssue], bool],
+    source_hash: str,
+    year: int,
+    output_dir: str,
+    manifest: SeasonManifest,
+    dry_run: bool = False,
+) -> Tuple[str, Optional[str]]:
+    """
+    Report the outcome of render_event() and write the race file.
+
+    Args:
+        event: Event dictionary from the events list
+        rendered: Return value of render_event()
+        source_hash: Hash of the event's ``htmlList.table``
+        year: Year of the event
+        output_dir: Directory for the JSON file
+        manifest: Manifest of the year directory, updated when a file is written
+        dry_run: Only report which file would be written
+
+    Returns:
+        Tuple of (status, file path), as for process_event()
+    """
+    event_id = event.get("id")
+    event_title = event.get("title", "Unknown Title")
+    outputs, issues, parsed = rendered
+    if not parsed:
+        logger.error(
+            "Failed to create DataFrame for %s",
+            event_title,
+            extra={"event_id": event_id},
+        )
+        return "failed", None
+
+    for issue in issues:
+        logger.log(
+            logging.ERROR if issue.severity == "error" else logging.WARNING,
+            "%s: schema %s",
+            event_title,
+            issue,
+            extra={"event_id": event_id},
+        )
+    if any(issue.severity == "error" for issue in issues):
+        logger.error(
+            "Table of %s does not match the schema, not saved",
+            event_title,
+            extra={"event_id": event_id},
+        )
+        return "failed", None
+
+    if dry_run:
+        file_path = DataProcessor.get_output_path(
+            event_title, year, output_dir, create=False, event_id=event_id
+        )
+        logger.info("Dry run: would save data to %s", file_path)
+        return "dry_run", file_path
+
+    # Save to JSON, keeping the row changes for the run's change log
+    file_path = DataProcessor.get_output_path(
+        event_title, year, output_dir, event_id=event_id
+    )
+    changes = race_file_changes(file_path, outputs[0])
+    DataProcessor._write_outputs(file_path, *outputs)
+    manifest.record(event_id, event_title, source_hash, file_path, changes)
+    if changes:
+        ops = [change["op"] for change in changes]
+        logger.info(
+            "%s: %d rows inserted, %d updated, %d deleted",
+            os.path.basename(file_path),
+            ops.count("insert"),
+            ops.count("update"),
+            ops.count("delete"),
+            extra={"event_id": event_id},
+        )
+    return "saved", file_path
+
+
+def race_file_changes(file_path: str, new_json: str) -> List[Dict[str, Any]]:
+    """
+    Compute the row changes of a race file about to be rewritten.
+
+    Args:
+        file_path: Path of the race file (it may not exist yet)
+        new_json: Its new contents
+
+    Returns:
+        diff_records() of the current and new rows; empty if the contents
+        are unchanged
+    """
+    try:
+        with open(file_path, "rb") as f:
+            current = f.read()
+    except OSError:
+        current = b"[]"
+    if current == new_json.encode("utf-8"):
+        return []
+    try:
+        old = json.loads(current)
+    except json.JSONDecodeError:
+        old = []
+    return diff_records(old if isinstance(old, list) else [], json.loads(new_json))
+
+
+def process_event(
+    event: Dict,
+    event_data: Any,
+    year: int,
+    output_dir: str,
+    manifest: SeasonManifest,
+    incremental: bool = True,
+    dry_run: bool = False,
+    compact: bool = False,
+) -> Tuple[str, Optional[str]]:
+    """
+    Parse one event's payload and save it to its JSON file.
+
+    Args:
+        event: Event dictionary from the events list
+        event_data: Fetched event-specific data (or an error entry)
+        year: Year of the event
+        output_dir: Directory for the JSON file
+        manifest: Manifest of the year directory, updated when a file is written
+        incremental: Skip events whose source table is unchanged
+        dry_run: Only report which file would be written
+        compact: Also write an unindented copy of the race file
+
+    Returns:
+        Tuple of (status, file path). Status is one of "saved", "unchanged",
+        "dry_run" or "failed".
+    """
+    status, source_hash = check_event(
+        event, event_data, output_dir, manifest, incremental, compact
+    )
+    if status is not None:
+        return status, None
+
+    event_id = event.get("id")
+    event_title = event.get("title", "Unknown Title")
+    with get_profiler().event(event_id, event_title):
+        logger.debug("Processing event: %s", event_title, extra={"event_id": event_id})
+        rendered = render_event(event_data, serialise=not dry_run, compact=compact)
+        return finish_event(
+            event, rendered, source_hash, year, output_dir, manifest, dry_run
+        )
+
+
+def _table_payload(event_data: Any) -> Any:
+    """Strip an event's payload down to the part render_event() reads."""
+    if not isinstance(event_data, dict) or not isinstance(
+        event_data.get("htmlList"), dict
+    ):
+        return event_data
+    return {"htmlList": {"table": event_data["htmlList"].get("table")}}
+
+
+class _RecordBuffer(list):
+    """Queue stand-in that keeps a parse worker's log records for the parent."""
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        self.append(record)
+
+
+_worker_log_records = _RecordBuffer()
+
+
+def _init_parse_worker(level: int) -> None:
+    """
+    Buffer a parse worker's log records instead of using inherited handlers.
+
+    A forked worker inherits copies of the parent's handlers; a queue
+    handler's copy writes to a queue that no listener reads, so records
+    are kept and returned with each result instead.
+
+    Args:
+        level: Effective level of the parent's pitstop logger
+    """
+    from logging.handlers import QueueHandler
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(_worker_log_records))
+    logger.setLevel(level)
+
+
+def _render_in_worker(
+    event_data: Dict, serialise: bool, compact: bool, timed: bool
+) -> Tuple[Any, Dict[str, List[float]], List[logging.LogRecord]]:
+    """
+    Run render_event() in a parse worker process.
+
+    Returns:
+        Tuple of (render_event() result, stage totals measured in the worker,
+        log records emitted meanwhile, already formatted)
+    """
+    set_profiler(StageProfiler() if timed else None)
+    try:
+        rendered = render_event(event_data, serialise, compact)
+        return rendered, get_profiler().totals.get(None, {}), list(_worker_log_records)
+    finally:
+        set_profiler(None)
+        _worker_log_records.clear()
+
+
+class EventPipeline:
+    """
+    Streaming fetch, parse and write stages over a bounded window of events.
+
+    Payloads are fetched on a thread pool, parsed and serialised as they
+    arrive (on a process pool if ``parse_workers`` is set), and written by
+    the calling thread, which also owns the manifests. At most ``max_pending`` events are anywhere
+    between fetch and write: an event is pending from the submission of its
+    fetch until it is finished, and a new fetch starts only when a pending
+    event finishes, so memory stays flat however many events are processed.
+    ``peak_pending`` holds the most events pending at once during the last run.
+    """
+
+    def __init__(
+        self,
+        fetcher: "F1DataFetcher",
+        parse_workers: int = PARSE_WORKERS,
+        max_pending: int = PIPELINE_MAX_PENDING,
+        incremental: bool = True,
+        dry_run: bool = False,
+        compact: bool = False,
+    ):
+        """
+        Initialize the EventPipeline.
+
+        Args:
+            fetcher: Fetcher whose session, caches and retry policy are used;
+                its max_workers sets the number of concurrent fetches
+            parse_workers: Parse processes (0 parses on the calling thread)
+            max_pending: Most events between fetch and write at any time
+            incremental: Skip events whose source table is unchanged
+            dry_run: Fetch and parse, but don't write any files
+            compact: Also write an unindented copy of every race file
+        """
+        self.fetcher = fetcher
+        self.parse_workers = max(0, parse_workers)
+        self.max_pending = max(1, max_pending)
+        self.incremental = incremental
+        self.dry_run = dry_run
+        self.compact = compact
+        self.peak_pending = 0
+
+    def run(
+        self,
+        jobs: Iterable[Tuple[int, Dict, str, SeasonManifest]],
+        on_done: Optional[Callable[[int, Dict, str, Optional[str]], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Process events as they are fetched.
+
+        Args:
+            jobs: (year, event, event-specific base URL, manifest of the
+                year directory) per event; consumed lazily
+            on_done: Called on the calling thread with (year, event, status,
+                file path) as each event finishes
+
+        Returns:
+            Number of events per status
+        """
+        counts = {"saved": 0, "unchanged": 0, "dry_run": 0, "failed": 0}
+        profiler = get_profiler()
+        jobs = iter(jobs)
+        running: Dict[Future, Tuple[str, Tuple, Optional[str]]] = {}
+        pending = 0
+        self.peak_pending = 0
+
+        def finish(job: Tuple, status: str, file_path: Optional[str]) -> None:
+            nonlocal pending
+            pending -= 1
+            counts[status] += 1
+            if on_done is not None:
+                on_done(job[0], job[1], status, file_path)
+
+        def fill() -> None:
+            nonlocal pending
+            while pending < self.max_pending:
+                job = next(jobs, None)
+                if job is None:
+                    return
+                pending += 1
+                self.peak_pending = max(self.peak_pending, pending)
+                event = job[1]
+                event_id = event.get("id")
+                if not event_id:
+                    logger.warning(
+                        "Skipping event with missing ID: %s",
+                        event.get("title", "Unknown Title"),
+                    )
+                    finish(job, "failed", None)
+                    continue
+                future = fetch_pool.submit(
+                    self.fetcher._fetch_single_event,
+                    job[2],
+                    event_id,
+                    event.get("title", "Unknown Title"),
+                    is_event_finalized(event),
+                )
+                running[future] = ("fetch", job, None)
+
+        def fetched(job: Tuple, event_data: Any) -> None:
+            _, event, _, manifest = job
+            status, source_hash = check_event(
+                event,
+                event_data,
+                manifest.output_dir,
+                manifest,
+                self.incremental,
+                self.compact,
+            )
+            if status is not None:
+                finish(job, status, None)
+            elif parse_pool is not None:
+                # Only the table crosses the process boundary
+                future = parse_pool.submit(
+                    _render_in_worker,
+                    _table_payload(event_data),
+                    not self.dry_run,
+                    self.compact,
+                    profiler.enabled,
+                )
+                running[future] = ("parse", job, source_hash)
+            else:
+                with profiler.event(event.get("id"), event.get("title")):
+                    write(
+                        job,
+                        source_hash,
+                        render_event(event_data, not self.dry_run, self.compact),
+                    )
+
+        def parsed(job: Tuple, source_hash: str, result: Tuple) -> None:
+            event = job[1]
+            rendered, stage_totals, records = result
+            for record in records:
+                logging.getLogger(record.name).handle(record)
+            with profiler.event(event.get("id"), event.get("title")):
+                for name, (wall, cpu, nbytes, _) in stage_totals.items():
+                    profiler.record(name, wall, cpu, nbytes)
+                write(job, source_hash, rendered)
+
+        def write(job: Tuple, source_hash: str, rendered: Tuple) -> None:
+            year, event, _, manifest = job
+            status, file_path = finish_event(
+                event,
+                rendered,
+                source_hash,
+                year,
+                manifest.output_dir,
+                manifest,
+                self.dry_run,
+            )
+            finish(job, status, file_path)
+
+        parse_pool = None
+        if self.parse_workers:
+            from concurrent.futures import ProcessPoolExecutor
+
+            parse_pool = ProcessPoolExecutor(
+                self.parse_workers,
+                initializer=_init_parse_worker,
+                initargs=(logger.getEffectiveLevel(),),
+            )
+        fetch_pool = ThreadPoolExecutor(max_workers=self.fetcher.max_workers)
+        try:
+            fill()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, job, source_hash = running.pop(future)
+                    try:
+                        if stage == "fetch":
+                            event_data, _ = future.result()
+                            fetched(job, event_data)
+                        else:
+                            parsed(job, source_hash, future.result())
+                    except Exception:
+                        logger.exception(
+                            "Error processing %s", job[1].get("title", "Unknown Title")
+                        )
+                        finish(job, "failed", None)
+                # Slots are only freed by finished events
+                fill()
+        finally:
+            fetch_pool.shutdown(wait=True, cancel_futures=True)
+            if parse_pool is not None:
+                parse_pool.shutdown(wait=True, cancel_futures=True)
+        return counts
+
+
+def main(
+    year: int = 2025,
+    incremental: bool = True,
+    output_dir: str = None,
+    dry_run: bool = False,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+    compact: bool = False,
+    replay_store: Optional[ReplayStore] = None,
+    parse_workers: int = PARSE_WORKERS,
+    base_url: Optional[str] = None,
+):
+    """
+    Main function to fetch and process F1 data for a specific year.
+
+    Events are fetched, parsed and saved as a stream (see EventPipeline),
+    so parsing overlaps with network waits.
+
+    Args:
+        year: Year to fetch data for (default: 2025)
+        incremental: Only re-parse and rewrite events whose source table
+            changed since the last run, according to the year's manifest
+        output_dir: Directory for the JSON files (defaults to the year)
+        dry_run: Fetch and parse, but only report which files would be written
+        max_workers: Maximum number of concurrent event-specific requests
+        compact: Also write an unindented ``<Race>.min.json`` next to every race file
+        replay_store: Record the raw responses to this store, or serve them
+            from it without network if it is replaying (the caller saves a
+            recording)
+        parse_workers: Processes parsing tables (0 parses on the main thread)
+        base_url: Server to fetch from instead of API_BASE_URL
+    """
+    logger.info("Fetching F1 data for year: %s", year)
+
+    # Initialize the data fetcher with the specified year
+    replaying = replay_store is not None and replay_store.replaying
+    fetcher = F1DataFetcher(
+        year=year,
+        max_workers=max_workers,
+        response_cache=None if replaying else ResponseCache(),
+        replay_store=replay_store,
+        base_url=base_url,
+    )
+
+    # Fetch events data
+    events_data = fetcher.fetch_events_data()
+    if not events_data:
+        logger.warning("No events data found. Exiting.")
+        return
+
+    # Fetch, parse and save each event as a stream
+    saved_files = []
+    skipped_events = []
+    if output_dir is None:
+        output_dir = str(year)  # Use year as directory name
+    manifest = SeasonManifest(output_dir)
+
+    def on_done(year: int, event: Dict, status: str, file_path: Optional[str]):
+        if status == "saved":
+            saved_files.append(file_path)
+        elif status == "unchanged":
+            skipped_events.append(event.get("title", "Unknown Title"))
+
+    logger.info("Found %d events to process.", len(events_data))
+    pipeline = EventPipeline(
+        fetcher,
+        parse_workers=parse_workers,
+        incremental=incremental,
+        dry_run=dry_run,
+        compact=compact,
+    )
+    counts = pipeline.run(
+        ((year, event, fetcher.event_specific_url, manifest) for event in events_data),
+        on_done,
+    )
+    fetcher.log_http_summary()
+    fetcher.close()
+
+    if not dry_run:
+        manifest.save()
+
+    # Log summary
+    logger.info(
+        "Saved %d event data files to the '%s' directory (%d failed).",
+        len(saved_files),
+        output_dir,
+        counts["failed"],
+    )
+    if skipped_events:
+        logger.info(
+            "Skipped %d events with unchanged source data.", len(skipped_events)
+        )
+        for event_title in skipped_events:
+            logger.debug("  - %s", event_title)
+
+
+class BackfillState:
+    """Persistent record of (year, event) pairs finished by a backfill run."""
+
+    def __init__(self, path: str = BACKFILL_STATE_PATH):
+        """
+        Initialize the BackfillState, loading progress saved by an earlier run.
+
+        Args:
+            path: JSON file holding completed event IDs per year
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                completed = json.load(f).get("completed", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            completed = {}
+        self.completed = {
+            str(year): set(event_ids) for year, event_ids in completed.items()
+        }
+
+    def is_done(self, year: int, event_id: Any) -> bool:
+        """Return whether the event was finished by a previous run."""
+        return event_id in self.completed.get(str(year), ())
+
+    def mark_done(self, year: int, event_id: Any) -> None:
+        """Record a finished event and persist the progress immediately."""
+        with self._lock:
+            self.completed.setdefault(str(year), set()).add(event_id)
+            data = json.dumps(
+                {
+                    "completed": {
+                        year: sorted(event_ids)
+                        for year, event_ids in self.completed.items()
+                    }
+                }
+            )
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """Forget all progress."""
+        with self._lock:
+            self.completed = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def backfill(
+    years: List[int],
+    output_root: str = ".",
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+    incremental: bool = True,
+    dry_run: bool = False,
+    resume: bool = True,
+    state_path: str = BACKFILL_STATE_PATH,
+    compact: bool = False,
+    replay_store: Optional[ReplayStore] = None,
+    parse_workers: int = PARSE_WORKERS,
+    base_url: Optional[str] = None,
+) -> Dict[int, Dict[str, int]]:
+    """
+    Fetch and process several seasons at once over a shared worker pool.
+
+    Every (year, event) pair goes through one EventPipeline: fetched on one
+    thread pool, behind one global rate limit and one pooled session, and
+    parsed on one process pool as payloads arrive. A year whose events list
+    cannot be fetched is reported as failed without affecting the others.
+    Finished events are recorded so an interrupted run can be resumed.
+
+    Args:
+        years: Seasons to process
+        output_root: Directory under which ``<year>/`` folders are written
+        max_workers: Number of concurrent event requests
+        incremental: Skip events whose source table is unchanged
+        dry_run: Fetch and parse, but don't write any files
+        resume: Skip events finished by a previous, interrupted run
+        state_path: File in which backfill progress is kept
+        compact: Also write an unindented copy of every race file
+        replay_store: Record the raw responses to this store, or serve them
+            from it without network if it is replaying (the caller saves a
+            recording)
+        parse_workers: Processes parsing tables (0 parses on the main thread)
+        base_url: Server to fetch from instead of API_BASE_URL
+
+    Returns:
+        Per-year counts of events by status, plus "failed_year" (1 if the
+        events list could not be fetched)
+    """
+    state = BackfillState(state_path)
+    if not resume:
+        state.clear()
+
+    replaying = replay_store is not None and replay_store.replaying
+    fetcher = F1DataFetcher(
+        max_workers=max_workers,
+        response_cache=None if replaying else ResponseCache(),
+        replay_store=replay_store,
+        base_url=base_url,
+    )
+    summary: Dict[int, Dict[str, int]] = {
+        year: {
+            "saved": 0,
+            "unchanged": 0,
+            "dry_run": 0,
+            "failed": 0,
+            "resumed": 0,
+            "failed_year": 0,
+        }
+        for year in years
+    }
+    manifests: Dict[int, SeasonManifest] = {}
+    progress = {"done": 0, "total": 0}
+
+    def fetch_year_events(year: int) -> List[Dict]:
+        if year not in F1_URLS:
+            raise ValueError(f"Data for year {year} not available")
+        url = season_urls(year, fetcher.base_url)["EVENT_DATA_URL"]
+        with get_profiler().event(f"events {year}", f"{year} events list"):
+            parsed_data, _ = fetcher._get_json(
+                url, memo_key=fetcher.memo_key(url), path=EVENTS_LIST_PATH
+            )
+        return parsed_data.get("data", {}).get("chart", {}).get("events", [])
+
+    # Events lists for all seasons are fetched concurrently first
+    jobs = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        year_futures = {
+            year: executor.submit(fetch_year_events, year) for year in years
+        }
+        for year, future in year_futures.items():
+            try:
+                events = future.result()
+            except (
+                requests.exceptions.RequestException,
+                json.JSONDecodeError,
+                ValueError,
+                AttributeError,
+            ) as e:
+                logger.error("Could not fetch events for %s: %s", year, e)
+                summary[year]["failed_year"] = 1
+                continue
+            if not events:
+                logger.error("No events found for %s", year)
+                summary[year]["failed_year"] = 1
+                continue
+
+            manifests[year] = SeasonManifest(
+                os.path.normpath(os.path.join(output_root, str(year)))
+            )
+            base_url = season_urls(year, fetcher.base_url)["EVENT_SPECIFIC_URL"]
+            for event in events:
+                if resume and state.is_done(year, event.get("id")):
+                    summary[year]["resumed"] += 1
+                    continue
+                jobs.append((year, event, base_url, manifests[year]))
+
+    def on_done(year: int, event: Dict, status: str, file_path: Optional[str]):
+        if status != "failed" and not dry_run:
+            state.mark_done(year, event.get("id"))
+        summary[year][status] += 1
+        progress["done"] += 1
+        logger.info(
+            "[%d/%d] %s %s: %s",
+            progress["done"],
+            progress["total"],
+            year,
+            event.get("title", "Unknown Title"),
+            status,
+        )
+
+    # Every season's events share one fetch pool, parse pool and window
+    progress["total"] = len(jobs)
+    pipeline = EventPipeline(
+        fetcher,
+        parse_workers=parse_workers,
+        incremental=incremental,
+        dry_run=dry_run,
+        compact=compact,
+    )
+    pipeline.run(jobs, on_done)
+
+    if not dry_run:
+        for manifest in manifests.values():
+            manifest.save()
+    fetcher.close()
+
+    lines = [
+        "--- Backfill Complete ---",
+        f"{'Year':<6} {'Saved':>6} {'Unchanged':>10} {'Resumed':>8} {'Failed':>7}",
+    ]
+    for year, counts in summary.items():
+        if counts["failed_year"]:
+            lines.append(f"{year:<6} events list unavailable")
+            continue
+        lines.append(
+            f"{year:<6} {counts['saved'] + counts['dry_run']:>6} "
+            f"{counts['unchanged']:>10} {counts['resumed']:>8} {counts['failed']:>7}"
+        )
+    logger.info("\n".join(lines))
+
+    # Start from scratch next time once everything has gone through
+    if not dry_run and not any(
+        counts["failed"] or counts["failed_year"] for counts in summary.values()
+    ):
+        state.clear()
+    return summary
+
+
+def parse_year_range(value: str) -> List[int]:
+    """
+    Parse a season argument such as "2025" or "2018-2026".
+
+    Args:
+        value: Single year or inclusive range
+
+    Returns:
+        List of years
+    """
+    try:
+        if "-" in value:
+            start, end = (int(part) for part in value.split("-", 1))
+            if start > end:
+                raise ValueError
+            return list(range(start, end + 1))
+        return [int(value)]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year or year range: {value!r}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Fetch DHL fastest pit stop data and save one JSON file per race."
+    )
+    parser.add_argument(
+        "years",
+        type=parse_year_range,
+        nargs="*",
+        default=[[max(F1_URLS)]],
+        help=f"season(s) or ranges such as 2018-2026 to fetch (default: {max(F1_URLS)})",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=".",
+        help="directory under which <year>/ folders are written (default: current directory)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="fetch and parse, but don't write any files",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="re-parse and rewrite every event, ignoring the manifest",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="process all seasons together over one shared worker pool, resuming an interrupted backfill",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help=f"concurrent requests (default: {MAX_CONCURRENT_REQUESTS})",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=PARSE_WORKERS,
+        help=f"processes parsing tables, 0 to parse in the main process (default: {PARSE_WORKERS})",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="with --backfill, ignore the progress of an interrupted backfill",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help=f"also write an unindented <Race>{COMPACT_SUFFIX} next to every race file",
+    )
+    parser.add_argument(
+        "--dataset",
+        metavar="DIR",
+        help="also refresh the processed seasons in a consolidated columnar dataset (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--base-url",
+        metavar="URL",
+        help=f"fetch from URL instead of {API_BASE_URL}, e.g. a local fake_api.py server",
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument(
+        "--record",
+        metavar="NAME",
+        help=f"keep every raw API response in the recording NAME under {REPLAY_DIR}",
+    )
+    replay.add_argument(
+        "--replay",
+        metavar="NAME",
+        help="serve the API responses from the recording NAME instead of the network",
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="also log every request and every event processed",
+    )
+    verbosity.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="only log warnings and errors",
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="log one JSON object per line instead of text",
+    )
+    parser.add_argument(
+        "--log-queue",
+        action="store_true",
+        help="write log records from a background thread",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="report wall/CPU time and bytes per stage and the slowest events",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="append one JSON line per timed stage to FILE (implies --timings)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="run under cProfile; print the top functions, or save the statistics to FILE",
+    )
+    args = parser.parse_args(argv)
+    args.years = sorted({year for years in args.years for year in years})
+    return args
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Run the command line described by parse_args().
+
+    Args:
+        args: Parsed arguments
+    """
+    replay_store = None
+    if args.record or args.replay:
+        try:
+            replay_store = ReplayStore(
+                args.record or args.replay, mode="record" if args.record else "replay"
+            )
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+    if args.backfill:
+        backfill(
+            args.years,
+            output_root=args.output_dir,
+            max_workers=args.workers,
+            incremental=not args.full,
+            dry_run=args.dry_run,
+            resume=not args.restart,
+            compact=args.compact,
+            replay_store=replay_store,
+            parse_workers=args.parse_workers,
+            base_url=args.base_url,
+        )
+    else:
+        for year in args.years:
+            main(
+                year,
+                incremental=not args.full,
+                output_dir=os.path.normpath(os.path.join(args.output_dir, str(year))),
+                dry_run=args.dry_run,
+                max_workers=args.workers,
+                compact=args.compact,
+                replay_store=replay_store,
+                parse_workers=args.parse_workers,
+                base_url=args.base_url,
+            )
+    if replay_store is not None and not replay_store.replaying:
+        replay_store.save()
+        logger.info(
+            "Recorded %d responses to %s",
+            len(replay_store.responses),
+            replay_store.path,
+        )
+    if args.dataset and not args.dry_run:
+        import archive
+
+        for file_path in archive.write_dataset(
+            args.output_dir, args.dataset, args.years
+        ):
+            logger.info("Updated dataset partition %s", file_path)
+    profiler = get_profiler()
+    if profiler.enabled:
+        logger.info("%s", profiler.report())
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    log_listener = configure_logging(
+        (
+            logging.DEBUG
+            if args.verbose
+            else logging.WARNING if args.quiet else logging.INFO
+        ),
+        json_lines=args.log_json,
+        use_queue=args.log_queue,
+    )
+    if args.timings or args.trace:
+        set_profiler(StageProfiler(trace_path=args.trace))
+    try:
+        if args.profile is None:
+            run(args)
+        else:
+            import cProfile
+            import pstats
+
+            profile = cProfile.Profile()
+            profile.runcall(run, args)
+            if args.profile:
+                profile.dump_stats(args.profile)
+                logger.info("cProfile statistics written to %s", args.profile)
+            else:
+                pstats.Stats(profile).sort_stats("cumulative").print_stats(30)
+    finally:
+        get_profiler().close()
+        if log_listener is not None:
+            log_listener.stop()
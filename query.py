@@ -0,0 +1,590 @@
+"""
+In-memory query index over the per-race JSON archive.
+
+Every pit stop of every season becomes one row of a set of parallel
+``array`` columns, with rows sorted by "Time (sec)". The Year, Race, Team
+and Driver indexes map each value to the ids of its rows in that same
+order, so the k fastest stops for any filter are the first k matches of
+the shortest posting list, and time ranges are found by bisection.
+
+The index is saved to a compact binary file (a JSON header followed by
+the raw column arrays) and loaded later without reading any race file.
+
+Usage:
+    python query.py fastest -k 10 --team Ferrari
+    python query.py between 1.8 2.0 --year 2024
+    python query.py best-by year,team
+    python query.py stats-by driver --year 2025
+"""
+
+import argparse
+import array
+import bisect
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from archive import iter_race_files, list_year_dirs
+
+INDEX_PATH = os.path.join(".cache", "pitstops.idx")
+FIELDS = ("year", "race", "team", "driver")  # fields that can be filtered and grouped
+
+_MAGIC = b"PSIX"
+_FORMAT_VERSION = 1
+# Column name and array typecode; Lap is -1 and Points NaN when missing
+_COLUMNS = [
+    ("year", "H"),
+    ("race", "H"),
+    ("team", "H"),
+    ("driver", "H"),
+    ("pos", "h"),
+    ("time", "d"),
+    ("lap", "h"),
+    ("points", "d"),
+]
+_STRING_FIELDS = ("race", "team", "driver")
+
+
+def archive_fingerprint(root: str = ".") -> str:
+    """
+    Hash the names, sizes and modification times of all race files.
+
+    Args:
+        root: Directory containing the ``<year>/`` race folders
+
+    Returns:
+        Hex SHA-256 digest that changes whenever a race file does
+    """
+    digest = hashlib.sha256()
+    for year, year_dir in list_year_dirs(root).items():
+        for race, file_path in iter_race_files(year_dir):
+            stat = os.stat(file_path)
+            digest.update(f"{year}/{race}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+class PitStopIndex:
+    """Time-sorted pit stop columns with hash indexes on year, race, team and driver."""
+
+    def __init__(
+        self,
+        columns: Dict[str, array.array],
+        strings: Dict[str, List[str]],
+        fingerprint: str = "",
+    ):
+        """
+        Initialize the PitStopIndex from columns already sorted by time.
+
+        Args:
+            columns: Parallel arrays, one per entry of ``_COLUMNS``
+            strings: Value tables of the race, team and driver columns
+            fingerprint: archive_fingerprint() of the archive the rows came from
+        """
+        self.columns = columns
+        self.strings = strings
+        self.fingerprint = fingerprint
+        self._string_ids = {
+            field: {value: i for i, value in enumerate(table)}
+            for field, table in strings.items()
+        }
+        self._postings: Dict[str, Dict[Any, array.array]] = {
+            field: {} for field in FIELDS
+        }
+        for field in FIELDS:
+            postings = self._postings[field]
+            table = self.strings.get(field)
+            for row, value in enumerate(self.columns[field]):
+                key = table[value] if table is not None else value
+                ids = postings.get(key)
+                if ids is None:
+                    ids = postings[key] = array.array("I")
+                ids.append(row)
+
+    @classmethod
+    def from_archive(cls, root: str = ".") -> "PitStopIndex":
+        """
+        Build the index by reading every race file of the archive once.
+
+        Args:
+            root: Directory containing the ``<year>/`` race folders
+
+        Returns:
+            New PitStopIndex
+        """
+        fingerprint = archive_fingerprint(root)
+        strings: Dict[str, List[str]] = {field: [] for field in _STRING_FIELDS}
+        string_ids: Dict[str, Dict[str, int]] = {field: {} for field in _STRING_FIELDS}
+
+        def intern(field: str, value: Optional[str]) -> int:
+            value = value or ""
+            ids = string_ids[field]
+            if value not in ids:
+                ids[value] = len(strings[field])
+                strings[field].append(value)
+            return ids[value]
+
+        rows = []
+        for year, year_dir in list_year_dirs(root).items():
+            for race, file_path in iter_race_files(year_dir):
+                with open(file_path, encoding="utf-8") as f:
+                    records = json.load(f)
+                race_id = intern("race", race)
+                for record in records:
+                    time_sec = record.get("Time (sec)")
+                    if time_sec is None:
+                        continue
+                    lap = record.get("Lap")
+                    points = record.get("Points")
+                    rows.append(
+                        (
+                            float(time_sec),
+                            year,
+                            race_id,
+                            intern("team", record.get("Team")),
+                            intern("driver", record.get("Driver")),
+                            int(record.get("Pos.") or 0),
+                            -1 if lap is None else int(lap),
+                            math.nan if points is None else float(points),
+                        )
+                    )
+
+        # Ties on time keep season, race and position order
+        race_names = strings["race"]
+        rows.sort(key=lambda row: (row[0], row[1], race_names[row[2]], row[5]))
+        columns = {name: array.array(typecode) for name, typecode in _COLUMNS}
+        for time_sec, year, race_id, team_id, driver_id, pos, lap, points in rows:
+            columns["time"].append(time_sec)
+            columns["year"].append(year)
+            columns["race"].append(race_id)
+            columns["team"].append(team_id)
+            columns["driver"].append(driver_id)
+            columns["pos"].append(pos)
+            columns["lap"].append(lap)
+            columns["points"].append(points)
+        return cls(columns, strings, fingerprint)
+
+    def save(self, path: str = INDEX_PATH) -> None:
+        """
+        Write the index to a binary file.
+
+        Layout: magic, little-endian uint32 header length, JSON header
+        (format version, fingerprint, row count, value tables, byte order),
+        then the raw bytes of every column in ``_COLUMNS`` order.
+
+        Args:
+            path: File to write
+        """
+        header = json.dumps(
+            {
+                "version": _FORMAT_VERSION,
+                "fingerprint": self.fingerprint,
+                "rows": len(self),
+                "byteorder": sys.byteorder,
+                "strings": self.strings,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for name, _ in _COLUMNS:
+                f.write(self.columns[name].tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "PitStopIndex":
+        """
+        Read an index written by save().
+
+        Args:
+            path: Index file
+
+        Returns:
+            PitStopIndex
+
+        Raises:
+            ValueError: If the file is not an index of a supported version
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != _MAGIC:
+            raise ValueError(f"{path} is not a pit stop index")
+        (header_size,) = struct.unpack_from("<I", data, 4)
+        offset = 8 + header_size
+        header = json.loads(data[8:offset])
+        if header.get("version") != _FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has index format {header.get('version')}, expected {_FORMAT_VERSION}"
+            )
+
+        columns = {}
+        for name, typecode in _COLUMNS:
+            column = array.array(typecode)
+            size = column.itemsize * header["rows"]
+            column.frombytes(data[offset : offset + size])
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns[name] = column
+            offset += size
+        return cls(columns, header["strings"], header["fingerprint"])
+
+    def __len__(self) -> int:
+        return len(self.columns["time"])
+
+    def values(self, field: str) -> List[Any]:
+        """Return the distinct values of a field, in sorted order."""
+        return sorted(self._postings[field])
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """Return a row in the layout of the race files, plus Year and Race."""
+        lap = self.columns["lap"][row]
+        points = self.columns["points"][row]
+        return {
+            "Year": self.columns["year"][row],
+            "Race": self.strings["race"][self.columns["race"][row]],
+            "Pos.": self.columns["pos"][row],
+            "Team": self.strings["team"][self.columns["team"][row]],
+            "Driver": self.strings["driver"][self.columns["driver"][row]],
+            "Time (sec)": self.columns["time"][row],
+            "Lap": None if lap < 0 else lap,
+            "Points": None if math.isnan(points) else points,
+        }
+
+    def _decode(self, field: str, value: int) -> Any:
+        table = self.strings.get(field)
+        return table[value] if table is not None else value
+
+    def _encode(self, field: str, value: Any) -> int:
+        ids = self._string_ids.get(field)
+        return ids.get(value, -1) if ids is not None else value
+
+    def _candidates(self, filters: Dict[str, Any]) -> Tuple[Sequence[int], List[str]]:
+        """
+        Pick the shortest posting list among the filters.
+
+        Returns:
+            Tuple of (time-ordered row ids, filter fields still to check per row)
+        """
+        unknown = set(filters) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        if not filters:
+            return range(len(self)), []
+        postings = {
+            field: self._postings[field].get(value, ())
+            for field, value in filters.items()
+        }
+        shortest = min(postings, key=lambda field: len(postings[field]))
+        return postings[shortest], [field for field in filters if field != shortest]
+
+    def _iter_matches(
+        self, filters: Dict[str, Any], low: float = None, high: float = None
+    ) -> Iterable[int]:
+        """Yield the ids of matching rows in time order, optionally within [low, high]."""
+        filters = {
+            field: value for field, value in filters.items() if value is not None
+        }
+        candidates, remaining = self._candidates(filters)
+        times = self.columns["time"]
+        start, stop = 0, len(candidates)
+        if low is not None:
+            start = bisect.bisect_left(candidates, low, key=times.__getitem__)
+        if high is not None:
+            stop = bisect.bisect_right(candidates, high, key=times.__getitem__)
+        # Remaining filters are compared on the encoded columns
+        checks = [
+            (self.columns[field], self._encode(field, filters[field]))
+            for field in remaining
+        ]
+        if not checks:
+            yield from candidates[start:stop]
+            return
+        for i in range(start, stop):
+            row = candidates[i]
+            if all(column[row] == value for column, value in checks):
+                yield row
+
+    def _check(
+        self, rows: Sequence[int], filters: Dict[str, Any], fields: List[str]
+    ) -> Sequence[int]:
+        """Keep the rows whose columns equal the filter values of some fields."""
+        checks = [
+            (self.columns[field], self._encode(field, filters[field]))
+            for field in fields
+        ]
+        if not checks:
+            return rows
+        return [
+            row for row in rows if all(column[row] == value for column, value in checks)
+        ]
+
+    def _split_rows(
+        self, fields: List[str], rows: Iterable[int], limit: int = None
+    ) -> Dict[Any, List[int]]:
+        """
+        Group row ids by the values of some fields, keeping their order.
+
+        Returns:
+            Mapping of decoded values (a tuple for several fields) to at
+            most limit row ids each
+        """
+        rows = list(rows)
+        keys = zip(*(map(self.columns[field].__getitem__, rows) for field in fields))
+        grouped: Dict[Tuple[int, ...], List[int]] = {}
+        for row, key in zip(rows, keys):
+            group_rows = grouped.get(key)
+            if group_rows is None:
+                group_rows = grouped[key] = []
+            if limit is None or len(group_rows) < limit:
+                group_rows.append(row)
+
+        decoded = {}
+        for key, group_rows in grouped.items():
+            values = tuple(
+                self._decode(field, value) for field, value in zip(fields, key)
+            )
+            decoded[values[0] if len(fields) == 1 else values] = group_rows
+        return decoded
+
+    def _group_rows(
+        self, fields: List[str], filters: Dict[str, Any], limit: int = None
+    ) -> Dict[Any, Sequence[int]]:
+        """
+        Group matching row ids, in time order, by the values of some fields.
+
+        The posting lists of the first field already hold each group in time
+        order, so they are used as they are unless a filter leaves fewer rows
+        to look at. Only the other fields are split row by row.
+
+        Args:
+            fields: Fields to group by
+            filters: Values of any of year, race, team and driver
+            limit: Row ids to keep per group (all if None)
+
+        Returns:
+            Mapping of group value, in sorted order, to row ids
+        """
+        filters = {
+            field: value for field, value in filters.items() if value is not None
+        }
+        candidates, _ = self._candidates(filters)
+        lead = fields[0]
+        postings = self._postings[lead]
+        if lead in filters:
+            postings = {filters[lead]: postings.get(filters[lead], ())}
+        if len(candidates) < sum(map(len, postings.values())):
+            grouped = self._split_rows(fields, self._iter_matches(filters), limit)
+            return dict(sorted(grouped.items()))
+
+        remaining = [field for field in filters if field != lead]
+        grouped = {}
+        for value, rows in postings.items():
+            rows = self._check(rows, filters, remaining)
+            if not rows:
+                continue
+            if len(fields) == 1:
+                grouped[value] = rows[:limit] if limit is not None else rows
+                continue
+            for key, group_rows in self._split_rows(fields[1:], rows, limit).items():
+                rest = key if len(fields) > 2 else (key,)
+                grouped[(value, *rest)] = group_rows
+        return dict(sorted(grouped.items()))
+
+    def fastest(self, k: int = 10, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Return the k fastest stops matching the filters.
+
+        Args:
+            k: Number of stops
+            **filters: Values of any of year, race, team and driver
+
+        Returns:
+            Rows in time order
+        """
+        rows = []
+        for row in self._iter_matches(filters):
+            if len(rows) == k:
+                break
+            rows.append(self.row(row))
+        return rows
+
+    def between(
+        self, low: float = None, high: float = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Return all stops with low <= Time (sec) <= high matching the filters.
+
+        Args:
+            low: Fastest time to include (unbounded if None)
+            high: Slowest time to include (unbounded if None)
+            **filters: Values of any of year, race, team and driver
+
+        Returns:
+            Rows in time order
+        """
+        return [self.row(row) for row in self._iter_matches(filters, low, high)]
+
+    def fastest_by(
+        self, group: Union[str, Sequence[str]], k: int = 1, **filters: Any
+    ) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Return the k fastest stops of every group, e.g. per team per season.
+
+        Args:
+            group: Field or fields to group by
+            k: Stops per group
+            **filters: Values of any of year, race, team and driver
+
+        Returns:
+            Mapping of group value (a tuple for several fields) to rows in time order
+        """
+        fields = [group] if isinstance(group, str) else list(group)
+        return {
+            key: [self.row(row) for row in rows]
+            for key, rows in self._group_rows(fields, filters, k).items()
+        }
+
+    def stats_by(
+        self, group: Union[str, Sequence[str]], **filters: Any
+    ) -> Dict[Any, Dict[str, float]]:
+        """
+        Summarise the stop times of every group.
+
+        Args:
+            group: Field or fields to group by
+            **filters: Values of any of year, race, team and driver
+
+        Returns:
+            Mapping of group value to count, fastest, median and mean time
+        """
+        fields = [group] if isinstance(group, str) else list(group)
+        times = self.columns["time"]
+        stats = {}
+        for key, rows in self._group_rows(fields, filters).items():
+            # Rows are in time order, so the median needs no extra sort
+            count = len(rows)
+            middle = count // 2
+            stats[key] = {
+                "count": count,
+                "fastest": times[rows[0]],
+                "median": (times[rows[middle - 1 + count % 2]] + times[rows[middle]])
+                / 2,
+                "mean": sum(map(times.__getitem__, rows)) / count,
+            }
+        return stats
+
+
+def load_or_build(
+    root: str = ".", path: str = INDEX_PATH, rebuild: bool = False
+) -> PitStopIndex:
+    """
+    Load the saved index, rebuilding it if the archive changed since it was written.
+
+    Args:
+        root: Directory containing the ``<year>/`` race folders
+        path: Index file
+        rebuild: Ignore any saved index
+
+    Returns:
+        Up-to-date PitStopIndex
+    """
+    if not rebuild and os.path.exists(path):
+        try:
+            index = PitStopIndex.load(path)
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is not None and index.fingerprint == archive_fingerprint(root):
+            return index
+    index = PitStopIndex.from_archive(root)
+    index.save(path)
+    return index
+
+
+def _print_rows(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        lap = "-" if row["Lap"] is None else row["Lap"]
+        print(
+            f"{row['Time (sec)']:>6.2f}  {row['Year']}  {row['Race']:<28} "
+            f"{row['Team']:<16} {row['Driver']:<14} lap {lap}"
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Query pit stops across seasons.")
+    parser.add_argument(
+        "--root", default=".", help="directory with the <year>/ folders"
+    )
+    parser.add_argument(
+        "--index", default=INDEX_PATH, help=f"index file (default: {INDEX_PATH})"
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="rebuild the index from the archive"
+    )
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--year", type=int)
+    filters.add_argument("--race", help='e.g. "Monaco Grand Prix"')
+    filters.add_argument("--team")
+    filters.add_argument("--driver")
+    subparsers = parser.add_subparsers(dest="query", required=True)
+
+    fastest_parser = subparsers.add_parser(
+        "fastest", parents=[filters], help="fastest stops"
+    )
+    fastest_parser.add_argument("-k", type=int, default=10)
+
+    between_parser = subparsers.add_parser(
+        "between", parents=[filters], help="stops within a time range"
+    )
+    between_parser.add_argument("low", type=float)
+    between_parser.add_argument("high", type=float)
+
+    for name, help_text in (
+        ("best-by", "fastest stops per group"),
+        ("stats-by", "time statistics per group"),
+    ):
+        group_parser = subparsers.add_parser(name, parents=[filters], help=help_text)
+        group_parser.add_argument(
+            "group", help=f"comma-separated fields from {', '.join(FIELDS)}"
+        )
+        if name == "best-by":
+            group_parser.add_argument("-k", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = load_or_build(args.root, args.index, args.rebuild)
+    filters = {field: getattr(args, field) for field in FIELDS}
+
+    if args.query == "fastest":
+        _print_rows(index.fastest(args.k, **filters))
+    elif args.query == "between":
+        _print_rows(index.between(args.low, args.high, **filters))
+    elif args.query == "best-by":
+        for key, rows in index.fastest_by(
+            args.group.split(","), args.k, **filters
+        ).items():
+            print(key)
+            _print_rows(rows)
+    elif args.query == "stats-by":
+        for key, stats in index.stats_by(args.group.split(","), **filters).items():
+            print(
+                f"{key}: {stats['count']} stops, fastest {stats['fastest']:.2f}, "
+                f"median {stats['median']:.2f}, mean {stats['mean']:.2f}"
+            )
@@ -0,0 +1,322 @@
+"""
+DHL Fastest Pit Stop Award standings computed from the saved race tables.
+
+Every race file carries the award points of each stop (25, 18, 15, ...,
+null for stops that scored nothing). A season's stops are reduced once
+per race to a small (Race, Team) table of points, finishing counts and
+fastest stop; standings and race-by-race progression are group-by
+operations on that table. When a race file is added or rewritten only
+that race is re-read and re-aggregated.
+
+Teams level on points are separated by count-back (most 25-point
+results, then most 18-point results, and so on), then by their fastest
+single stop of the season.
+
+Usage:
+    python standings.py 2024
+    python standings.py 2025 --progression
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from archive import iter_race_files
+from pitstop import F1_RACES
+
+_COUNT_PREFIX = "n_"  # columns counting the results worth a number of points
+
+
+def race_order(year: int, races: List[str]) -> List[str]:
+    """
+    Sort race names in calendar order.
+
+    Args:
+        year: Season of the races
+        races: Race names such as "Monaco Grand Prix"
+
+    Returns:
+        Races in the order of F1_RACES[year]; unknown races last, by name
+    """
+    calendar = {
+        race: i for i, race in enumerate(dict.fromkeys(F1_RACES.get(year, {}).values()))
+    }
+    return sorted(races, key=lambda race: (calendar.get(race, len(calendar)), race))
+
+
+def read_race(file_path: str, race: str) -> pd.DataFrame:
+    """
+    Read one race file into a DataFrame with a Race column.
+
+    Args:
+        file_path: Path of the ``<Race>.json`` file
+        race: Race name
+
+    Returns:
+        Stops of the race (Team, Time (sec) and Points are the columns used)
+    """
+    # json + DataFrame is several times faster than pd.read_json for these small files
+    with open(file_path, encoding="utf-8") as f:
+        records = json.load(f)
+    stops = pd.DataFrame.from_records(
+        records, columns=None if records else ["Team", "Time (sec)", "Points"]
+    )
+    stops["Race"] = race
+    return stops
+
+
+def _group_codes(*keys: pd.Series) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Number the distinct combinations of some key columns.
+
+    Returns:
+        Tuple of (group number of every row, values of each key per group)
+    """
+    codes, uniques = zip(*(pd.factorize(key, sort=False) for key in keys))
+    combined = np.zeros(len(keys[0]), dtype=np.int64)
+    for key_codes, key_uniques in zip(codes, uniques):
+        combined = combined * len(key_uniques) + key_codes
+    groups, inverse = np.unique(combined, return_inverse=True)
+    values = []
+    for key_uniques in reversed(uniques):
+        values.append(np.asarray(key_uniques)[groups % len(key_uniques)])
+        groups = groups // len(key_uniques)
+    return inverse, values[::-1]
+
+
+def aggregate_races(stops: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce stops to one row per (Race, Team).
+
+    Args:
+        stops: Stops with Race, Team, Time (sec) and Points columns
+
+    Returns:
+        DataFrame indexed by (Race, Team) with Points, Fastest and one
+        ``n_<points>`` column per scoring points value counting those results
+    """
+    if stops.empty:
+        return pd.DataFrame(
+            columns=["Points", "Fastest"],
+            index=pd.MultiIndex.from_arrays([[], []], names=["Race", "Team"]),
+        )
+    inverse, (races, teams) = _group_codes(stops["Race"], stops["Team"])
+    num_groups = len(races)
+    points = stops["Points"].to_numpy(dtype="float64", na_value=np.nan)
+    times = stops["Time (sec)"].to_numpy(dtype="float64", na_value=np.nan)
+
+    columns = {
+        "Points": np.bincount(
+            inverse, weights=np.nan_to_num(points), minlength=num_groups
+        ),
+        "Fastest": np.full(num_groups, np.nan),
+    }
+    np.fmin.at(columns["Fastest"], inverse, times)
+
+    scored = points > 0  # NaN compares False
+    values, value_codes = np.unique(points[scored], return_inverse=True)
+    counts = np.zeros((num_groups, len(values)), dtype=np.int64)
+    np.add.at(counts, (inverse[scored], value_codes), 1)
+    for i, value in enumerate(values):
+        columns[f"{_COUNT_PREFIX}{value:g}"] = counts[:, i]
+
+    index = pd.MultiIndex.from_arrays([races, teams], names=["Race", "Team"])
+    return pd.DataFrame(columns, index=index)
+
+
+def _count_columns(columns: pd.Index) -> List[str]:
+    """Return the ``n_<points>`` columns, highest points value first."""
+    counts = [column for column in columns if column.startswith(_COUNT_PREFIX)]
+    return sorted(counts, key=lambda column: -float(column[len(_COUNT_PREFIX) :]))
+
+
+def rank_teams(per_race: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the standings from per-race aggregates.
+
+    Args:
+        per_race: Output of aggregate_races() for some or all races of a season
+
+    Returns:
+        DataFrame indexed by Team, in standings order, with Position,
+        Points, Races (races with a stop), the count-back columns and Fastest
+    """
+    counts = _count_columns(per_race.columns)
+    if per_race.empty:
+        return pd.DataFrame(columns=["Position", "Points", "Races", *counts, "Fastest"])
+    inverse, (teams,) = _group_codes(per_race.index.get_level_values("Team"))
+    num_teams = len(teams)
+
+    def total(column: str) -> np.ndarray:
+        return np.bincount(
+            inverse,
+            weights=per_race[column].to_numpy(dtype="float64"),
+            minlength=num_teams,
+        )
+
+    points = total("Points")
+    count_totals = [total(column).astype(np.int64) for column in counts]
+    fastest = np.full(num_teams, np.nan)
+    np.fmin.at(fastest, inverse, per_race["Fastest"].to_numpy(dtype="float64"))
+
+    # np.lexsort sorts by its last key first
+    keys = [points, *count_totals]
+    order = np.lexsort([fastest, *(-key for key in reversed(keys))])
+    sorted_keys = np.column_stack([key[order] for key in keys + [fastest]])
+
+    # Teams equal on every key share the better position; two teams without
+    # a timed stop (NaN fastest) are equal on that key
+    position = np.arange(1, num_teams + 1)
+    current, previous = sorted_keys[1:], sorted_keys[:-1]
+    same = (current == previous) | (np.isnan(current) & np.isnan(previous))
+    tied = np.zeros(num_teams, dtype=bool)
+    tied[1:] = same.all(axis=1)
+    position = np.maximum.accumulate(np.where(tied, 0, position))
+
+    table = {
+        "Position": position,
+        "Points": points[order],
+        "Races": np.bincount(inverse, minlength=num_teams)[order],
+    }
+    for column, values in zip(counts, count_totals):
+        table[column] = values[order]
+    table["Fastest"] = fastest[order]
+    return pd.DataFrame(table, index=pd.Index(teams[order], name="Team"))
+
+
+def progression(per_race: pd.DataFrame, year: int) -> pd.DataFrame:
+    """
+    Compute each team's cumulative points after every race.
+
+    Args:
+        per_race: Output of aggregate_races() for a season
+        year: Season, used for the calendar order of the races
+
+    Returns:
+        DataFrame with one row per race in calendar order and one column
+        per team, ordered like the final standings
+    """
+    if per_race.empty:
+        return pd.DataFrame()
+    points = per_race["Points"].unstack("Team", fill_value=0.0)
+    points = points.reindex(race_order(year, list(points.index))).fillna(0.0)
+    return points.cumsum()[rank_teams(per_race).index]
+
+
+class SeasonStandings:
+    """Standings of one season, kept up to date as race files are added or rewritten."""
+
+    def __init__(self, year: int, root: str = "."):
+        """
+        Initialize the SeasonStandings. Nothing is read until refresh().
+
+        Args:
+            year: Season
+            root: Directory containing the ``<year>/`` race folders
+        """
+        self.year = year
+        self.year_dir = os.path.join(root, str(year))
+        self.per_race = pd.DataFrame()
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+
+    def refresh(self) -> List[str]:
+        """
+        Re-read the race files that were added, changed or removed since the last call.
+
+        Returns:
+            Names of the races that were (re)aggregated or dropped
+        """
+        files = dict(iter_race_files(self.year_dir))
+        signatures = {}
+        for race, file_path in files.items():
+            stat = os.stat(file_path)
+            signatures[race] = (stat.st_size, stat.st_mtime_ns)
+
+        changed = [
+            race
+            for race, signature in signatures.items()
+            if self._signatures.get(race) != signature
+        ]
+        removed = [race for race in self._signatures if race not in signatures]
+        if not changed and not removed:
+            return []
+
+        per_race = self.per_race
+        if not per_race.empty:
+            stale = per_race.index.get_level_values("Race").isin(changed + removed)
+            per_race = per_race[~stale]
+        if changed:
+            stops = pd.concat(
+                [read_race(files[race], race) for race in changed], ignore_index=True
+            )
+            per_race = pd.concat([per_race, aggregate_races(stops)])
+        counts = [
+            column for column in per_race.columns if column.startswith(_COUNT_PREFIX)
+        ]
+        self.per_race = per_race.fillna({column: 0 for column in counts})
+        self._signatures = signatures
+        return changed + removed
+
+    def standings(self) -> pd.DataFrame:
+        """Return the current standings (see rank_teams())."""
+        return rank_teams(self.per_race)
+
+    def progression(self) -> pd.DataFrame:
+        """Return the cumulative points after every race (see progression())."""
+        return progression(self.per_race, self.year)
+
+
+def compute_standings(year: int, root: str = ".") -> pd.DataFrame:
+    """
+    Compute a season's standings from scratch.
+
+    Args:
+        year: Season
+        root: Directory containing the ``<year>/`` race folders
+
+    Returns:
+        Standings as returned by rank_teams()
+    """
+    season = SeasonStandings(year, root)
+    season.refresh()
+    return season.standings()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="DHL Fastest Pit Stop Award standings from the saved race files."
+    )
+    parser.add_argument("year", type=int, help="season")
+    parser.add_argument(
+        "--root", default=".", help="directory with the <year>/ folders"
+    )
+    parser.add_argument(
+        "--progression",
+        action="store_true",
+        help="show cumulative points after every race instead",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    season = SeasonStandings(args.year, args.root)
+    if not season.refresh():
+        print(f"No race files found in {season.year_dir}")
+    elif args.progression:
+        print(season.progression().to_string(float_format="{:g}".format))
+    else:
+        print(season.standings().to_string(float_format="{:g}".format))
@@ -1,8 +1,25 @@
+import argparse
 import requests
 import json
 
+parser = argparse.ArgumentParser(description="Fetch the 2025 pit stop events")
+parser.add_argument(
+    "--base-url",
+    metavar="URL",
+    default="https://inmotion.dhl/api/f1-award-element-data",
+    help="fetch from URL instead of the DHL API, e.g. a local fake_api.py server",
+)
+parser.add_argument(
+    "--event-id",
+    type=int,
+    default=1086,
+    help="event whose results table is printed at the end (default: 1086)",
+)
+args = parser.parse_args()
+base_url = args.base_url.rstrip("/")
+
 # Define the URL to fetch data from
-url = "https://inmotion.dhl/api/f1-award-element-data/6367"
+url = f"{base_url}/6367"
 
 print(f"Attempting to fetch data from: {url}")
 
@@ -62,7 +79,7 @@ import time  # Import time for potential delays
 
 
 # --- 2. Configuration ---
-base_event_url = "https://inmotion.dhl/api/f1-award-element-data/6365"
+base_event_url = f"{base_url}/6365"
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
 }
@@ -139,7 +156,7 @@ print(f"Failed to fetch data for {failed_fetches} events.")
 # print(json.dumps(all_event_specific_data, indent=4))
 
 # Example: Print data for a specific event ID if it exists and wasn't an error
-target_id_to_show = 1086
+target_id_to_show = args.event_id
 if (
     target_id_to_show in all_event_specific_data
     and isinstance(all_event_specific_data[target_id_to_show], dict)
@@ -157,7 +174,7 @@ import io  # Needed to treat the string as a file for read_html
 import json
 
 # --- Sample Data (as provided in the prompt) ---
-# In a real scenario, this would come from your 'all_event_specific_data[1086]'
+# In a real scenario, this would come from 'all_event_specific_data[args.event_id]'
 sample_event_data = all_event_specific_data[target_id_to_show]
 
 
@@ -222,11 +239,11 @@ def html_table_to_dataframe(event_json_data):
 
 
 # --- Example Usage ---
-# Assuming 'sample_event_data' holds the JSON for Event ID 1086
+# Assuming 'sample_event_data' holds the JSON for the chosen event
 event_dataframe = html_table_to_dataframe(sample_event_data)
 
 if event_dataframe is not None:
-    print("\n--- DataFrame for Event ID 1086 ---")
+    print(f"\n--- DataFrame for Event ID {target_id_to_show} ---")
     # Display the DataFrame. print() works, but display() might be nicer in some environments.
     # Using print() for compatibility here.
     print(event_dataframe.to_string())  # .to_string() ensures all rows/cols are printed
@@ -0,0 +1,165 @@
+"""
+Tests for the asyncio event monitor of check.py.
+
+The monitor runs against fake_api.FakeDHLServer on localhost, serving a
+season whose events start without results and whose ``data.chart`` is
+populated while the monitor is running.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+import check
+from fake_api import FakeDHLServer, FaultProfile, records_to_html_table
+from pitstop import F1_URLS
+
+YEAR = max(F1_URLS)
+NUM_EVENTS = 6
+EMPTY_TABLE = records_to_html_table([])
+
+
+def stub_season(num_events=NUM_EVENTS):
+    """Build a season of undated events, none of them with results yet."""
+    events = [
+        {"id": 1000 + i, "title": f"FORMULA 1 STUB GRAND PRIX {i}"}
+        for i in range(num_events)
+    ]
+    payloads = {
+        str(event["id"]): {"data": {"chart": []}, "htmlList": {"table": EMPTY_TABLE}}
+        for event in events
+    }
+    return {YEAR: (events, payloads)}
+
+
+def publish_charts(server, events):
+    """Populate the chart of every event, leaving its results table empty."""
+    element_id = F1_URLS[YEAR]["EVENT_SPECIFIC_URL"].rsplit("/", 1)[1]
+    for event in events:
+        payload = {
+            "data": {"chart": [{"event": str(event["id"])}]},
+            "htmlList": {"table": EMPTY_TABLE},
+        }
+        server.bodies[element_id, str(event["id"])] = json.dumps(payload).encode()
+
+
+def make_watcher(server, tmp_path, max_interval=0.2):
+    return check.EventWatcher(
+        YEAR,
+        output_dir=str(tmp_path / "out"),
+        max_workers=4,
+        hot_interval=0.05,
+        max_interval=max_interval,
+        cache_dir=str(tmp_path / "cache"),
+        base_url=server.base_url,
+    )
+
+
+async def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return condition()
+
+
+def test_has_results():
+    assert not check.has_results(None)
+    assert not check.has_results({"data": {"chart": []}})
+    assert check.has_results({"data": {"chart": [{"id": 1}]}})
+    table = records_to_html_table(
+        [
+            {
+                "Pos.": 1,
+                "Team": "Ferrari",
+                "Driver": "Leclerc",
+                "Time (sec)": 2.1,
+                "Lap": 20,
+                "Points": 25.0,
+            }
+        ]
+    )
+    assert check.has_results({"data": {"chart": []}, "htmlList": {"table": table}})
+
+
+def test_monitor_detects_each_event_once(tmp_path, caplog):
+    caplog.set_level(logging.INFO, logger=check.logger.name)
+    seasons = stub_season()
+    events = seasons[YEAR][0]
+    with FakeDHLServer(seasons) as server:
+        watcher = make_watcher(server, tmp_path)
+
+        async def run():
+            task = asyncio.ensure_future(watcher.run())
+            # Every event is polled at least once before the results appear
+            assert await wait_for(lambda: watcher.stats.polls > NUM_EVENTS)
+            publish_charts(server, events)
+            assert await wait_for(lambda: watcher.stats.detections == NUM_EVENTS)
+            # Later polls of the same payloads must not count again
+            await asyncio.sleep(0.5)
+            watcher.stop()
+            await asyncio.wait_for(task, timeout=5)
+
+        asyncio.run(run())
+
+    stats = watcher.stats.as_dict()
+    assert stats["detections"] == NUM_EVENTS
+    assert stats["errors"] == 0
+    assert stats["not_modified"] > 0
+    assert stats["bytes"] > 0
+    assert stats["p50_ms"] is not None
+    detected = [r for r in caplog.records if "UPDATE DETECTED" in r.getMessage()]
+    assert sorted(r.getMessage() for r in detected) == sorted(
+        f">>> UPDATE DETECTED! {event['title']} <<<" for event in events
+    )
+    assert any(r.getMessage().startswith("Monitor stats:") for r in caplog.records)
+
+
+def test_monitor_backs_off_failing_events(tmp_path, caplog):
+    caplog.set_level(logging.INFO, logger=check.logger.name)
+    with FakeDHLServer(stub_season()) as server:
+        watcher = make_watcher(server, tmp_path, max_interval=0.5)
+
+        async def run():
+            task = asyncio.ensure_future(watcher.run())
+            assert await wait_for(lambda: watcher.stats.polls >= NUM_EVENTS)
+            server.faults = FaultProfile(error_rate=1.0, error_statuses=(503,))
+            requests_before = server.requests
+            await asyncio.sleep(1.0)
+            watcher.stop()
+            await asyncio.wait_for(task, timeout=5)
+            return server.requests - requests_before
+
+        failed_requests = asyncio.run(run())
+
+    # Each failing poll is a single request: the backoff belongs to the watcher
+    assert watcher.stats.errors == failed_requests
+    # Delays double from hot_interval (0.05 s) instead of polling at that pace,
+    # which would make about 20 requests per event in a second
+    assert failed_requests <= NUM_EVENTS * 8
+    assert watcher.stats.detections == 0
+    assert any("503" in r.getMessage() for r in caplog.records)
+    assert any(r.getMessage().startswith("Retrying") for r in caplog.records)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="no asyncio signal handlers")
+def test_monitor_stops_on_sigterm(tmp_path):
+    with FakeDHLServer(stub_season()) as server:
+        watcher = make_watcher(server, tmp_path)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.3, os.kill, os.getpid(), signal.SIGTERM)
+            started = time.monotonic()
+            await asyncio.wait_for(watcher.run(), timeout=5)
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(run())
+
+    assert elapsed < 2
+    assert watcher.stats.polls > 0
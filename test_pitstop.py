@@ -0,0 +1,295 @@
+"""
+Tests for pitstop.py.
+
+Run with ``python -m pytest``; no test reaches the network.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+import pitstop
+
+IMPORT_BUDGET_MS = 200  # median cumulative ``import pitstop`` time allowed
+# Modules that must not be loaded by a plain ``import pitstop``
+HEAVY_MODULES = ("pandas", "numpy", "lxml")
+
+
+def stop(pos, driver, lap, time_sec, team="Ferrari", points=None):
+    """Build one row of a race file."""
+    return {
+        "Pos.": pos,
+        "Team": team,
+        "Driver": driver,
+        "Time (sec)": time_sec,
+        "Lap": lap,
+        "Points": points,
+    }
+
+
+OLD_ROWS = [
+    stop(1, "Leclerc", 20, 2.1, points=25.0),
+    stop(2, "Sainz", 21, 2.3, points=18.0),
+    stop(3, "Hülkenberg", 18, 2.5, team="Haas", points=15.0),
+]
+
+
+def test_diff_records_unchanged():
+    assert pitstop.diff_records(OLD_ROWS, [dict(row) for row in OLD_ROWS]) == []
+
+
+def test_diff_records_added_row():
+    new = OLD_ROWS + [stop(4, "Magnussen", 30, 2.7, team="Haas")]
+    changes = pitstop.diff_records(OLD_ROWS, new)
+    assert changes == [
+        {"op": "insert", "key": {"Driver": "Magnussen", "Lap": 30}, "row": new[3]}
+    ]
+    assert pitstop.apply_changes(OLD_ROWS, changes) == new
+
+
+def test_diff_records_removed_row():
+    new = OLD_ROWS[:1] + [dict(OLD_ROWS[2], **{"Pos.": 2, "Points": 18.0})]
+    changes = pitstop.diff_records(OLD_ROWS, new)
+    assert [(change["op"], change["key"]) for change in changes] == [
+        ("update", {"Driver": "Hülkenberg", "Lap": 18}),
+        ("delete", {"Driver": "Sainz", "Lap": 21}),
+    ]
+    assert changes[1]["row"] == OLD_ROWS[1]
+    assert pitstop.apply_changes(OLD_ROWS, changes) == new
+
+
+def test_diff_records_revised_row():
+    # A corrected time that moves Hülkenberg ahead of Sainz
+    new = [
+        OLD_ROWS[0],
+        stop(2, "Hülkenberg", 18, 2.2, team="Haas", points=18.0),
+        stop(3, "Sainz", 21, 2.3, points=15.0),
+    ]
+    changes = pitstop.diff_records(OLD_ROWS, new)
+    assert [change["op"] for change in changes] == ["update", "update"]
+    assert changes[0]["key"] == {"Driver": "Hülkenberg", "Lap": 18}
+    assert changes[0]["old"] == {"Pos.": 3, "Time (sec)": 2.5, "Points": 15.0}
+    assert changes[1]["old"] == {"Pos.": 2, "Points": 18.0}
+    assert pitstop.apply_changes(OLD_ROWS, changes) == new
+
+
+def test_diff_records_new_lap_is_insert_and_delete():
+    # The key is (Driver, Lap): a stop moved to another lap is a different stop
+    new = [OLD_ROWS[0], OLD_ROWS[1], dict(OLD_ROWS[2], Lap=19)]
+    changes = pitstop.diff_records(OLD_ROWS, new)
+    assert [(change["op"], change["key"]) for change in changes] == [
+        ("insert", {"Driver": "Hülkenberg", "Lap": 19}),
+        ("delete", {"Driver": "Hülkenberg", "Lap": 18}),
+    ]
+    assert pitstop.apply_changes(OLD_ROWS, changes) == new
+
+
+def test_diff_records_repeated_key():
+    # Rows without a lap share a key and are told apart by their occurrence
+    old = [stop(1, "Sainz", None, 2.1), stop(2, "Sainz", None, 2.4)]
+    new = [old[0], dict(old[1], **{"Time (sec)": 2.5})]
+    changes = pitstop.diff_records(old, new)
+    assert changes == [
+        {
+            "op": "update",
+            "key": {"Driver": "Sainz", "Lap": None, "Occurrence": 1},
+            "row": new[1],
+            "old": {"Time (sec)": 2.4},
+        }
+    ]
+    assert pitstop.apply_changes(old, changes) == new
+
+
+def test_diff_records_new_race():
+    changes = pitstop.diff_records([], OLD_ROWS)
+    assert [change["op"] for change in changes] == ["insert"] * 3
+    assert pitstop.apply_changes([], changes) == OLD_ROWS
+
+
+def record_race(manifest, tmp_path, records):
+    """Write a race file and record it in the manifest, with its row changes."""
+    file_path = os.path.join(tmp_path, "Monaco Grand Prix.json")
+    old = []
+    if os.path.exists(file_path):
+        with open(file_path, encoding="utf-8") as f:
+            old = json.load(f)
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    changes = pitstop.diff_records(old, records)
+    manifest.record(1, "FORMULA 1 MONACO GRAND PRIX", "hash", file_path, changes)
+
+
+def test_change_log_holds_only_the_current_run(tmp_path):
+    manifest = pitstop.SeasonManifest(str(tmp_path))
+    record_race(manifest, tmp_path, OLD_ROWS)
+    manifest.save()
+    with open(manifest.changes_path, encoding="utf-8") as f:
+        assert [json.loads(line)["op"] for line in f] == ["insert"] * 3
+
+    revised = OLD_ROWS[:2]
+    manifest = pitstop.SeasonManifest(str(tmp_path))
+    record_race(manifest, tmp_path, revised)
+    manifest.save()
+    with open(manifest.changes_path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["op"] for line in lines] == ["delete"]
+    assert pitstop.apply_changes(OLD_ROWS, lines) == revised
+
+
+def test_change_log_removed_by_a_run_without_changes(tmp_path):
+    manifest = pitstop.SeasonManifest(str(tmp_path))
+    record_race(manifest, tmp_path, OLD_ROWS)
+    manifest.save()
+    assert os.path.exists(manifest.changes_path)
+
+    # Nothing recorded at all, as when every event is up to date
+    manifest = pitstop.SeasonManifest(str(tmp_path))
+    manifest.save()
+    assert not os.path.exists(manifest.changes_path)
+
+
+def test_change_log_accumulates_across_saves_of_one_run(tmp_path):
+    # check.py saves the manifest after every event it processes
+    manifest = pitstop.SeasonManifest(str(tmp_path))
+    record_race(manifest, tmp_path, OLD_ROWS[:1])
+    manifest.save()
+    record_race(manifest, tmp_path, OLD_ROWS)
+    manifest.save()
+    manifest.save()
+    with open(manifest.changes_path, encoding="utf-8") as f:
+        assert [json.loads(line)["op"] for line in f] == ["insert"] * 3
+
+
+def import_times(module):
+    """Return the cumulative import time in ms of every module loaded by module."""
+    env = dict(os.environ)
+    # Bytecode may be written, so the measured runs see a warm cache
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[1].isdigit():
+            times[fields[2]] = int(fields[1]) / 1000
+    return times
+
+
+def test_import_loads_no_heavy_modules():
+    loaded = {name.split(".")[0] for name in import_times("pitstop")}
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_import_time_within_budget():
+    import_times("pitstop")  # warm the bytecode cache
+    median_ms = statistics.median(import_times("pitstop")["pitstop"] for _ in range(5))
+    assert median_ms <= IMPORT_BUDGET_MS
+
+
+def event_body(content_bytes):
+    """Encode an event payload padded with content_bytes of article HTML."""
+    payload = {
+        "data": {"chart": [{"id": 1, "lastName": "Leclerc"}], "sort": "1"},
+        "htmlList": {"table": "<table></table>", "content": "x" * content_bytes},
+    }
+    return json.dumps(payload).encode("utf-8")
+
+
+def test_extract_json_small_and_streamed_bodies_agree():
+    paths = (pitstop.EVENT_TABLE_PATH, pitstop.EVENT_CHART_PATH)
+    expected = {
+        "htmlList": {"table": "<table></table>"},
+        "data": {"chart": [{"id": 1, "lastName": "Leclerc"}]},
+    }
+    small = event_body(16)
+    large = event_body(pitstop.STREAM_DECODE_MIN_BYTES)
+    assert len(large) >= pitstop.STREAM_DECODE_MIN_BYTES
+    assert pitstop.extract_json(small, *paths) == expected
+    assert pitstop.extract_json(large, *paths) == expected
+
+
+def test_extract_json_missing_path():
+    body = event_body(pitstop.STREAM_DECODE_MIN_BYTES)
+    assert pitstop.extract_json(body, pitstop.EVENTS_LIST_PATH) == {}
+
+
+@pytest.mark.parametrize("padding", [0, pitstop.STREAM_DECODE_MIN_BYTES])
+def test_extract_json_invalid_body(padding):
+    body = b'{"htmlList": ' + b" " * padding
+    with pytest.raises(json.JSONDecodeError):
+        pitstop.extract_json(body, pitstop.EVENT_TABLE_PATH)
+
+
+def test_resolver_prefers_the_longest_key():
+    # Table order would pick the sponsor: a first-hit scan returns Qatar here
+    resolver = pitstop.RaceNameResolver(
+        {"QATAR": "Qatar Grand Prix", "BRITISH": "British Grand Prix"}
+    )
+    title = "FORMULA 1 QATAR AIRWAYS BRITISH GRAND PRIX 2025"
+    assert resolver.resolve(title) == "British Grand Prix"
+    assert resolver.ambiguous == {}
+
+
+def test_resolver_nested_keys():
+    resolver = pitstop.RaceNameResolver(
+        {"MEXICO": "Mexican Grand Prix", "MEXICO CITY": "Mexico City Grand Prix"}
+    )
+    assert resolver.resolve("FORMULA 1 MEXICO CITY GRAND PRIX") == (
+        "Mexico City Grand Prix"
+    )
+    assert resolver.resolve("FORMULA 1 GRAN PREMIO DE MEXICO") == "Mexican Grand Prix"
+
+
+def test_resolver_finds_overlapping_keys():
+    resolver = pitstop.RaceNameResolver(
+        {"UNITED STATES": "United States", "STATES": "States", "TED": "Ted"}
+    )
+    assert resolver.find_keys("united states grand prix") == [
+        "TED",
+        "UNITED STATES",
+        "STATES",
+    ]
+
+
+def test_resolver_reports_ambiguous_titles(caplog):
+    resolver = pitstop.RaceNameResolver(
+        {"MIAMI": "Miami Grand Prix", "SPAIN": "Spanish Grand Prix"}
+    )
+    title = "FORMULA 1 SPAIN MIAMI GRAND PRIX"
+    assert resolver.resolve(title) == "Miami Grand Prix"  # first in table order
+    assert resolver.ambiguous == {title: ["Miami Grand Prix", "Spanish Grand Prix"]}
+    assert any("Ambiguous race name" in r.getMessage() for r in caplog.records)
+    # Cached: a second lookup neither warns nor records it again
+    caplog.clear()
+    assert resolver.resolve(title) == "Miami Grand Prix"
+    assert not caplog.records
+
+
+def test_resolver_unmatched_title():
+    resolver = pitstop.RaceNameResolver({"MONACO": "Monaco Grand Prix"})
+    assert resolver.resolve("FORMULA 1 HEINEKEN DUTCH GRAND PRIX") == (
+        "HEINEKEN DUTCH Grand Prix"
+    )
+    assert resolver.resolve("PIT STOP AWARD") == "Unknown Grand Prix"
+    assert resolver.unmatched == [
+        "FORMULA 1 HEINEKEN DUTCH GRAND PRIX",
+        "PIT STOP AWARD",
+    ]
+
+
+def test_resolver_every_season_key():
+    for year, races in pitstop.F1_RACES.items():
+        resolver = pitstop.RaceNameResolver(races)
+        for key, race in races.items():
+            assert resolver.resolve(f"FORMULA 1 {key} GRAND PRIX {year}") == race
+        assert resolver.ambiguous == {}
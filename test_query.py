@@ -0,0 +1,63 @@
+"""
+Tests for query.py, run against the archive in this repository.
+"""
+
+import os
+import statistics
+
+import pytest
+
+import query
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GROUPS = [("year",), ("team",), ("year", "team"), ("team", "driver", "year")]
+FILTERS = [{}, {"year": 2024}, {"team": "Ferrari", "year": None}, {"driver": "Nobody"}]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return query.PitStopIndex.from_archive(ROOT)
+
+
+def scan_groups(index, fields, filters):
+    """Group every row matching the filters, the slow way, in time order."""
+    grouped = {}
+    for i in range(len(index)):
+        row = index.row(i)
+        values = {field: row[field.capitalize()] for field in query.FIELDS}
+        if any(
+            value is not None and values[field] != value
+            for field, value in filters.items()
+        ):
+            continue
+        key = tuple(values[field] for field in fields)
+        grouped.setdefault(key[0] if len(fields) == 1 else key, []).append(row)
+    return dict(sorted(grouped.items()))
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("fields", GROUPS)
+def test_fastest_by_matches_a_scan(index, fields, filters):
+    expected = {
+        key: rows[:2] for key, rows in scan_groups(index, fields, filters).items()
+    }
+    assert index.fastest_by(fields, 2, **filters) == expected
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("fields", GROUPS)
+def test_stats_by_matches_a_scan(index, fields, filters):
+    stats = index.stats_by(fields, **filters)
+    groups = scan_groups(index, fields, filters)
+    assert list(stats) == list(groups)
+    for key, rows in groups.items():
+        times = [row["Time (sec)"] for row in rows]
+        assert stats[key]["count"] == len(times)
+        assert stats[key]["fastest"] == min(times)
+        assert stats[key]["median"] == statistics.median(times)
+        assert stats[key]["mean"] == pytest.approx(statistics.fmean(times))
+
+
+def test_group_by_unknown_filter(index):
+    with pytest.raises(ValueError):
+        index.stats_by("team", season=2024)
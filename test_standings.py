@@ -0,0 +1,73 @@
+"""
+Tests for standings.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+import standings
+
+
+def stops(*rows):
+    """Build stops from (race, team, time, points) tuples."""
+    return pd.DataFrame.from_records(
+        rows, columns=["Race", "Team", "Time (sec)", "Points"]
+    )
+
+
+def test_rank_teams_count_back_and_fastest():
+    per_race = standings.aggregate_races(
+        stops(
+            ("Monaco Grand Prix", "Ferrari", 2.1, 25.0),
+            ("Monaco Grand Prix", "McLaren", 2.2, 18.0),
+            ("Monaco Grand Prix", "Haas", 2.6, None),
+            ("Miami Grand Prix", "McLaren", 2.0, 25.0),
+            ("Miami Grand Prix", "Ferrari", 2.3, 18.0),
+            ("Miami Grand Prix", "Haas", 2.4, None),
+        )
+    )
+    table = standings.rank_teams(per_race)
+    # Ferrari and McLaren are level on points and count-back; McLaren's
+    # 2.0 s stop is the faster one
+    assert list(table.index) == ["McLaren", "Ferrari", "Haas"]
+    assert list(table["Position"]) == [1, 2, 3]
+    assert list(table["Points"]) == [43.0, 43.0, 0.0]
+
+
+def test_rank_teams_ties_on_equal_keys():
+    per_race = standings.aggregate_races(
+        stops(
+            ("Monaco Grand Prix", "Ferrari", 2.1, 25.0),
+            ("Monaco Grand Prix", "Haas", 2.5, None),
+            ("Monaco Grand Prix", "Sauber", 2.5, None),
+        )
+    )
+    table = standings.rank_teams(per_race)
+    assert list(table["Position"]) == [1, 2, 2]
+
+
+def test_rank_teams_ties_teams_without_a_timed_stop():
+    per_race = standings.aggregate_races(
+        stops(
+            ("Monaco Grand Prix", "Ferrari", 2.1, 25.0),
+            ("Monaco Grand Prix", "Haas", None, None),
+            ("Monaco Grand Prix", "Sauber", None, None),
+        )
+    )
+    table = standings.rank_teams(per_race)
+    assert table.loc["Ferrari", "Position"] == 1
+    assert table.loc[["Haas", "Sauber"], "Fastest"].isna().all()
+    assert list(table.loc[["Haas", "Sauber"], "Position"]) == [2, 2]
+
+
+def test_rank_teams_timed_stop_ranks_ahead_of_none():
+    per_race = standings.aggregate_races(
+        stops(
+            ("Monaco Grand Prix", "Haas", None, None),
+            ("Monaco Grand Prix", "Sauber", 3.0, None),
+        )
+    )
+    table = standings.rank_teams(per_race)
+    assert list(table.index) == ["Sauber", "Haas"]
+    assert list(table["Position"]) == [1, 2]
+    assert np.isnan(table.loc["Haas", "Fastest"])
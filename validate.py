@@ -0,0 +1,128 @@
+"""
+Validate every saved race file against the declared table schema.
+
+All seasons are checked in one pass with pitstop.validate_records(), so the
+check is cheap enough to run on every CI invocation. The exit status is 1
+when any file has a schema error (or any warning, with --strict).
+
+Usage:
+    python validate.py
+    python validate.py --strict
+    python validate.py --fix    # rewrite non-canonical team and driver names
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from archive import iter_race_files, list_year_dirs
+from pitstop import (
+    COMPACT_SUFFIX,
+    SchemaIssue,
+    format_records_json,
+    normalize_records,
+    validate_records,
+    write_file_atomic,
+)
+
+
+def fix_race_file(file_path: str, records: List[Dict]) -> bool:
+    """
+    Rewrite a race file (and its compact copy, if any) with canonical names.
+
+    Args:
+        file_path: Path of the ``<Race>.json`` file
+        records: Its rows, as loaded
+
+    Returns:
+        True if the file was rewritten
+    """
+    if not normalize_records(records):
+        return False
+    write_file_atomic(file_path, format_records_json(records).encode("utf-8"))
+    compact_file = file_path[: -len(".json")] + COMPACT_SUFFIX
+    if os.path.exists(compact_file):
+        write_file_atomic(
+            compact_file, format_records_json(records, indent=0).encode("utf-8")
+        )
+    return True
+
+
+def validate_archive(
+    root: str = ".", fix: bool = False
+) -> Tuple[Dict[str, List[SchemaIssue]], int, int]:
+    """
+    Validate all race files of a JSON archive.
+
+    Args:
+        root: Directory containing the ``<year>/`` race folders
+        fix: Rewrite files whose team or driver names have a canonical
+            spelling; they are then validated as rewritten
+
+    Returns:
+        Tuple of (issues per file path, files checked, rows checked)
+    """
+    issues, files, rows = {}, 0, 0
+    for year_dir in list_year_dirs(root).values():
+        for _, file_path in iter_race_files(year_dir):
+            with open(file_path, encoding="utf-8") as f:
+                records = json.load(f)
+            if fix and fix_race_file(file_path, records):
+                print(f"Fixed names in {file_path}")
+            files += 1
+            rows += len(records)
+            file_issues = validate_records(records)
+            if file_issues:
+                issues[file_path] = file_issues
+    return issues, files, rows
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Validate the saved race files against the table schema."
+    )
+    parser.add_argument(
+        "--root", default=".", help="directory with the <year>/ folders"
+    )
+    parser.add_argument(
+        "--strict", action="store_true", help="fail on warnings as well as errors"
+    )
+    parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="rewrite team and driver names that have a canonical spelling",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    issues, files, rows = validate_archive(args.root, fix=args.fix)
+    elapsed = time.perf_counter() - start
+
+    errors = warnings = 0
+    for file_path, file_issues in issues.items():
+        for issue in file_issues:
+            print(f"{file_path}: {issue}")
+            if issue.severity == "error":
+                errors += 1
+            else:
+                warnings += 1
+    print(
+        f"Validated {files} files ({rows} rows) in {elapsed * 1000:.0f} ms:"
+        f" {errors} errors, {warnings} warnings"
+    )
+    sys.exit(1 if errors or (args.strict and warnings) else 0)